@@ -0,0 +1,68 @@
+"""
+Compare loading a deck from CSV with opening its compiled, memory-mapped version.
+
+Each measurement runs in a fresh interpreter so the reported peak RSS belongs to that load only.
+
+Usage: python benchmarks/bench_compiled_deck.py [--sizes 1000 100000 1000000]
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import synthetic
+from compiled_deck import compiled_deck_path
+from quiz_logic import QuizLogic
+
+
+def child(root_dir: str, mode: str) -> None:
+    csv_path = os.path.join(root_dir, "words.csv")
+    start = time.perf_counter()
+    quiz_logic = QuizLogic(root_dir)
+    if mode == "csv":
+        deck = quiz_logic.load_word_data(csv_path, 0)
+    else:
+        deck = quiz_logic.load_deck(csv_path, 0)
+    quiz_logic.next_question()
+    elapsed = time.perf_counter() - start
+    print(json.dumps({
+        "mode": mode,
+        "deck": type(deck).__name__,
+        "load_ms": round(elapsed * 1000, 2),
+        "max_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    }))
+
+
+def bench_size(size: int) -> dict:
+    result = {"size": size}
+    with tempfile.TemporaryDirectory() as root_dir:
+        csv_path = synthetic.make_root_dir(root_dir, size)
+        start = time.perf_counter()
+        QuizLogic(root_dir).compile_deck(csv_path, 0, compiled_deck_path(csv_path))
+        result["compile_ms"] = round((time.perf_counter() - start) * 1000, 2)
+        for mode in ["csv", "compiled"]:
+            out = subprocess.run(
+                [sys.executable, __file__, "--child", root_dir, mode], capture_output=True, text=True, check=True
+            )
+            result[mode] = json.loads(out.stdout.strip().splitlines()[-1])
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 100_000, 1_000_000])
+    parser.add_argument("--child", nargs=2, metavar=("ROOT_DIR", "MODE"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        child(*args.child)
+        return
+    for size in args.sizes:
+        print(json.dumps(bench_size(size)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Compare memory use and lookup speed of a list of `WordData` namedtuples against `Deck`.
+
+Usage: python benchmarks/bench_deck.py [--sizes 1000 100000 1000000]
+"""
+import argparse
+import gc
+import json
+import random
+import time
+import tracemalloc
+
+import synthetic
+from deck import Deck
+
+LOOKUPS = 100_000
+
+
+def measure_memory(build):
+    gc.collect()
+    tracemalloc.start()
+    obj = build()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return obj, current
+
+
+def time_per_op(func, count):
+    start = time.perf_counter()
+    func(count)
+    return (time.perf_counter() - start) / count * 1e9
+
+
+def bench_size(size: int) -> dict:
+    rng = random.Random(42)
+    ids = [rng.randrange(size) for _ in range(LOOKUPS)]
+    words = [f"word{i:07d}" for i in ids]
+
+    as_list, list_bytes = measure_memory(lambda: synthetic.make_words(size))
+
+    by_word = {w.word: w for w in as_list}
+
+    def list_lookup(count):
+        for word in words[:count]:
+            by_word[word]
+
+    list_ns = time_per_op(list_lookup, LOOKUPS)
+    del as_list, by_word
+
+    deck, deck_bytes = measure_memory(lambda: Deck.from_word_data(synthetic.make_word(i) for i in range(size)))
+
+    deck.id_for_word(words[0])
+
+    def deck_lookup(count):
+        for word in words[:count]:
+            deck.id_for_word(word)
+
+    deck_ns = time_per_op(deck_lookup, LOOKUPS)
+
+    def deck_sample(count):
+        for _ in range(count):
+            random.sample(range(len(deck)), 3)
+
+    sample_ns = time_per_op(deck_sample, LOOKUPS)
+
+    return {
+        "size": size,
+        "list_bytes": list_bytes,
+        "deck_bytes": deck_bytes,
+        "list_lookup_ns": round(list_ns, 1),
+        "deck_lookup_ns": round(deck_ns, 1),
+        "deck_sample_ns": round(sample_ns, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 100_000, 1_000_000])
+    args = parser.parse_args()
+    for size in args.sizes:
+        print(json.dumps(bench_size(size)))
+
+
+if __name__ == "__main__":
+    main()
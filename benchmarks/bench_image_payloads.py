@@ -0,0 +1,83 @@
+"""
+Compare the server work and payload size of the images of one Streamlit rerun.
+
+Before, the app opened each option's image with PIL and passed it to `st.image`, which encodes a
+PIL image as a quality 100 JPEG on every rerun. Now it passes the shared `ImagePayloads` bytes,
+for which Streamlit only reads the header. Both paths are reproduced here without a running
+Streamlit server, over the deck images in `word_images` (or their `build-assets` variants), three
+images per rerun as in the app.
+
+Usage: python benchmarks/bench_image_payloads.py [--reruns 200]
+"""
+import argparse
+import io
+import json
+import random
+import statistics
+import time
+
+import synthetic
+from image_payloads import ImagePayloads
+from quiz_logic import QuizLogic, word_col_index_for_language, words_path_for_language
+
+DISPLAY_SIZE = 360
+OPTIONS_PER_RERUN = 3
+
+
+def pil_rerun(paths) -> int:
+    """What a rerun did before: decode each image, then Streamlit encodes it as JPEG."""
+    from PIL import Image
+
+    sent = 0
+    for path in paths:
+        image = Image.open(path)
+        out = io.BytesIO()
+        image.convert("RGB").save(out, "JPEG", quality=100)
+        sent += len(out.getvalue())
+    return sent
+
+
+def payload_rerun(payloads: ImagePayloads, paths) -> int:
+    """What a rerun does now: look up the payloads, Streamlit only parses their headers."""
+    from PIL import Image
+
+    sent = 0
+    for path in paths:
+        data = payloads.get(path).data
+        Image.open(io.BytesIO(data)).format
+        sent += len(data)
+    return sent
+
+
+def measure(rerun, questions) -> dict:
+    cpu, sent = [], []
+    for paths in questions:
+        start = time.process_time()
+        sent.append(rerun(paths))
+        cpu.append(time.process_time() - start)
+    return {"cpu_ms_p50": round(statistics.median(cpu) * 1000, 3), "bytes_per_rerun": round(statistics.mean(sent))}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--reruns", type=int, default=200)
+    args = parser.parse_args()
+
+    quiz_logic = QuizLogic(synthetic.REPO_ROOT)
+    quiz_logic.load_word_data(words_path_for_language(synthetic.REPO_ROOT, "en"), word_col_index_for_language("en"))
+    rng = random.Random(1234)
+    questions = [
+        [quiz_logic.image_path_for_word(i, size=DISPLAY_SIZE) for i in rng.sample(range(len(quiz_logic.deck)), 3)]
+        for _ in range(args.reruns)
+    ]
+    payloads = ImagePayloads(DISPLAY_SIZE)
+    for paths in questions:
+        payload_rerun(payloads, paths)
+
+    print(json.dumps({"path": "pil", **measure(pil_rerun, questions)}))
+    print(json.dumps({"path": "payloads", **measure(lambda paths: payload_rerun(payloads, paths), questions),
+                      "encode_p50_ms": round(payloads.stats()["encode_p50_ms"], 2)}))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Measure switching the Tk app between languages on large synthetic decks.
+
+Reports how long loading the English and Greek decks takes one after the other and concurrently
+through `DeckRegistry`, how long a switch took when it reloaded the deck of the new language, and
+how long `LanguageQuizApp.update_language` takes now that it only swaps preloaded decks. The app
+runs headless with stand-in widgets, and image and sound lookups are stubbed so only the switch
+itself is timed.
+
+Usage: python benchmarks/bench_language_switch.py [--sizes 10000 100000] [--switches 1000]
+"""
+import argparse
+import json
+import statistics
+import tempfile
+import time
+from unittest.mock import MagicMock, patch
+
+import synthetic
+import deck_cache
+from deck_registry import DeckRegistry
+from language_quiz_app import LanguageQuizApp
+from quiz_logic import QuizLogic, word_col_index_for_language, words_path_for_language
+
+
+class StubWidget(dict):
+    def __init__(self, master=None, **kwargs):
+        super().__init__(**kwargs)
+
+    def config(self, **kwargs):
+        self.update(kwargs)
+
+    def pack(self, **kwargs):
+        pass
+
+    def grid(self, **kwargs):
+        pass
+
+    def paste(self, img):
+        pass
+
+
+def timed(func) -> float:
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+def reload_switch(root_dir: str, language: str) -> None:
+    """What switching language did before the registry: build a new `QuizLogic` and load its deck."""
+    quiz_logic = QuizLogic(root_dir, language)
+    quiz_logic.load_deck(words_path_for_language(root_dir, language), word_col_index_for_language(language))
+    quiz_logic.next_question()
+
+
+def bench_size(size: int, switches: int) -> dict:
+    with tempfile.TemporaryDirectory() as root_dir:
+        synthetic.make_root_dir(root_dir, size)
+        synthetic.write_translated_csv(words_path_for_language(root_dir, "el"), size)
+
+        deck_cache.clear()
+        sequential = timed(lambda: DeckRegistry(root_dir).load(workers=1))
+        deck_cache.clear()
+        concurrent = timed(lambda: DeckRegistry(root_dir).load())
+        reload = statistics.median(timed(lambda: reload_switch(root_dir, "el")) for _ in range(5))
+
+        language = MagicMock(get=lambda: "English")
+        with patch("language_quiz_app.tk.StringVar", MagicMock(return_value=language)), \
+                patch("language_quiz_app.tk.OptionMenu", MagicMock()), \
+                patch("language_quiz_app.shared_store", MagicMock(return_value=None)), \
+                patch("language_quiz_app.generate_sound_if_not_found", lambda *args: None), \
+                patch("language_quiz_app.ThumbnailCache.get", lambda self, path: None), \
+                patch("language_quiz_app.DeckRegistry", lambda root, languages: DeckRegistry(root_dir, languages)):
+            app = LanguageQuizApp(
+                frame_factory=StubWidget, label_factory=StubWidget, button_factory=StubWidget,
+                image_factory=StubWidget, prefetch_depth=0,
+            )
+            durations = []
+            for i in range(switches):
+                language.get = (lambda: "Greek") if i % 2 == 0 else (lambda: "English")
+                durations.append(timed(app.update_language))
+            app.audio_player.close()
+
+    durations.sort()
+    return {
+        "size": size,
+        "load_sequential_ms": round(sequential * 1000, 2),
+        "load_concurrent_ms": round(concurrent * 1000, 2),
+        "reload_switch_ms": round(reload * 1000, 3),
+        "switch_p50_us": round(durations[len(durations) // 2] * 1e6, 1),
+        "switch_p95_us": round(durations[int(len(durations) * 0.95)] * 1e6, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--switches", type=int, default=1000)
+    args = parser.parse_args()
+    for size in args.sizes:
+        print(json.dumps(bench_size(size, args.switches)))
+
+
+if __name__ == "__main__":
+    main()
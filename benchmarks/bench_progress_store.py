@@ -0,0 +1,70 @@
+"""
+Measure recording answers in the progress store from many concurrent sessions.
+
+Each session records its answers on its own thread, as Streamlit sessions do. The benchmark
+reports the p50 and p99 time of `ProgressStore.record_answer`, the time until every answer is
+written and the number of batches the writer thread committed.
+
+Usage: python benchmarks/bench_progress_store.py [--sessions 50] [--answers 200]
+"""
+import argparse
+import json
+import os
+import tempfile
+import threading
+import time
+from unittest.mock import patch
+
+import synthetic  # noqa: F401
+from progress_store import ProgressStore
+
+
+def bench(sessions: int, answers: int) -> dict:
+    latencies = []
+    lock = threading.Lock()
+
+    def session(i):
+        local = []
+        for j in range(answers):
+            start = time.perf_counter()
+            store.record_answer(f"user{i % 10}", "en", f"word{j}", j % 2 == 0)
+            local.append(time.perf_counter() - start)
+        with lock:
+            latencies.extend(local)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        store = ProgressStore(os.path.join(tmp_dir, "progress.sqlite3"))
+        try:
+            with patch.object(ProgressStore, "_write", wraps=ProgressStore._write) as mock_write:
+                start = time.perf_counter()
+                threads = [threading.Thread(target=session, args=(i,)) for i in range(sessions)]
+                for thread in threads:
+                    thread.start()
+                for thread in threads:
+                    thread.join()
+                store.flush()
+                elapsed = time.perf_counter() - start
+        finally:
+            store.close()
+
+    latencies.sort()
+    return {
+        "sessions": sessions,
+        "answers": sessions * answers,
+        "record_p50_us": round(latencies[len(latencies) // 2] * 1e6, 1),
+        "record_p99_us": round(latencies[int(len(latencies) * 0.99)] * 1e6, 1),
+        "written_ms": round(elapsed * 1000, 1),
+        "batches": mock_write.call_count,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=50)
+    parser.add_argument("--answers", type=int, default=200, help="Answers recorded by each session.")
+    args = parser.parse_args()
+    print(json.dumps(bench(args.sessions, args.answers)))
+
+
+if __name__ == "__main__":
+    main()
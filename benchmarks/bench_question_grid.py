@@ -0,0 +1,112 @@
+"""
+Measure showing questions in the Tk app's question grid over a long session.
+
+Runs the app headless with stand-in widgets on a synthetic deck, asks a few hundred questions to
+warm up and then reports the p50 and p95 time of `LanguageQuizApp.next_question`, how much traced
+memory grew over the session and how many buttons and photo images were created after the
+warm-up, which should be none. Image and sound lookups are stubbed, so only the grid itself is timed.
+
+Usage: python benchmarks/bench_question_grid.py [--size 10000] [--questions 3000]
+"""
+import argparse
+import json
+import tempfile
+import time
+import tracemalloc
+from unittest.mock import MagicMock, patch
+
+from PIL import Image
+
+import synthetic
+from deck_registry import DeckRegistry
+from language_quiz_app import LanguageQuizApp
+
+WARM_UP = 200
+
+
+class StubWidget(dict):
+    def __init__(self, master=None, **kwargs):
+        super().__init__(**kwargs)
+
+    def config(self, **kwargs):
+        self.update(kwargs)
+
+    def pack(self, **kwargs):
+        pass
+
+    def grid(self, **kwargs):
+        pass
+
+
+class StubPhoto:
+    created = 0
+
+    def __init__(self, img):
+        StubPhoto.created += 1
+        self.img = img
+
+    def paste(self, img):
+        self.img = img
+
+
+def bench(size: int, questions: int) -> dict:
+    thumbnail = Image.new("RGB", (180, 180), "blue")
+    buttons = 0
+
+    def button_factory(master=None, **kwargs):
+        nonlocal buttons
+        buttons += 1
+        return StubWidget(master, **kwargs)
+
+    with tempfile.TemporaryDirectory() as root_dir:
+        synthetic.make_root_dir(root_dir, size)
+        with patch("language_quiz_app.tk.StringVar", MagicMock(return_value=MagicMock(get=lambda: "English"))), \
+                patch("language_quiz_app.tk.OptionMenu", MagicMock()), \
+                patch("language_quiz_app.shared_store", MagicMock(return_value=None)), \
+                patch("language_quiz_app.generate_sound_if_not_found", lambda *args: None), \
+                patch("language_quiz_app.ThumbnailCache.get", lambda self, path: thumbnail), \
+                patch("language_quiz_app.DeckRegistry", lambda root, languages: DeckRegistry(root_dir, languages)):
+            app = LanguageQuizApp(
+                frame_factory=StubWidget, label_factory=StubWidget, button_factory=button_factory,
+                image_factory=StubPhoto, prefetch_depth=0,
+            )
+            for _ in range(WARM_UP):
+                app.next_question()
+            buttons_before, photos_before = buttons, StubPhoto.created
+
+            tracemalloc.start()
+            before, _ = tracemalloc.get_traced_memory()
+            for _ in range(questions):
+                app.next_question()
+            after, _ = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+            durations = []
+            for _ in range(questions):
+                start = time.perf_counter()
+                app.next_question()
+                durations.append(time.perf_counter() - start)
+            app.audio_player.close()
+
+    durations.sort()
+    return {
+        "size": size,
+        "questions": questions,
+        "next_question_p50_us": round(durations[len(durations) // 2] * 1e6, 1),
+        "next_question_p95_us": round(durations[int(len(durations) * 0.95)] * 1e6, 1),
+        "memory_growth_kib": round((after - before) / 1024, 1),
+        "buttons_created": buttons - buttons_before,
+        "photos_created": StubPhoto.created - photos_before,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", type=int, default=10_000)
+    parser.add_argument("--questions", type=int, default=3000)
+    args = parser.parse_args()
+    print(json.dumps(bench(args.size, args.questions)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Replay simulated learners against the question schedulers.
+
+Each simulated learner remembers a word with a probability that grows with how often it has
+answered that word correctly. The benchmark reports questions per second and the accuracy of the
+final stretch of questions, which shows whether a scheduler helps the learner.
+
+Usage: python benchmarks/bench_scheduler.py [--deck-size 100000] [--questions 200000] [--learners 4]
+"""
+import argparse
+import json
+import random
+import time
+
+import synthetic  # noqa: F401
+from scheduler import SCHEDULERS
+
+N_CHOICES = 3
+
+
+def simulate(scheduler_name: str, deck_size: int, questions: int, seed: int) -> dict:
+    rng = random.Random(seed)
+    scheduler = SCHEDULERS[scheduler_name](random.Random(seed))
+    strength = {}
+    correct_tail = 0
+    tail = max(1, questions // 10)
+
+    start = time.perf_counter()
+    for i in range(questions):
+        target_id, option_ids = scheduler.pick(deck_size, N_CHOICES)
+        known = strength.get(target_id, 0)
+        if rng.random() < 1 - 0.7 ** (known + 1):
+            selected_id = target_id
+            strength[target_id] = known + 1
+        else:
+            selected_id = rng.choice([o for o in option_ids if o != target_id])
+        correct = selected_id == target_id
+        scheduler.record(target_id, selected_id, correct)
+        if i >= questions - tail:
+            correct_tail += correct
+    elapsed = time.perf_counter() - start
+
+    return {
+        "scheduler": scheduler_name,
+        "questions_per_sec": round(questions / elapsed),
+        "final_accuracy": round(correct_tail / tail, 3),
+        "words_seen": len(strength),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--deck-size", type=int, default=100_000)
+    parser.add_argument("--questions", type=int, default=200_000)
+    parser.add_argument("--learners", type=int, default=4)
+    parser.add_argument("--schedulers", nargs="+", default=sorted(SCHEDULERS), choices=sorted(SCHEDULERS))
+    args = parser.parse_args()
+    for name in args.schedulers:
+        runs = [simulate(name, args.deck_size, args.questions, seed) for seed in range(args.learners)]
+        print(json.dumps({
+            "scheduler": name,
+            "deck_size": args.deck_size,
+            "questions_per_sec": min(run["questions_per_sec"] for run in runs),
+            "final_accuracy": round(sum(run["final_accuracy"] for run in runs) / len(runs), 3),
+        }))
+
+
+if __name__ == "__main__":
+    main()
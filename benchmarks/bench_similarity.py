@@ -0,0 +1,116 @@
+"""
+Time building the image similarity index and the hard-mode queries that use it.
+
+Decoding is timed on the deck images in `word_images`. The features, neighbour table and queries
+are timed on `--images` synthetic thumbnails drawn around a few thousand base pictures, so near
+duplicates exist as in a real deck. The approximate neighbours are checked against an exhaustive
+search over a sample of images.
+
+Usage: python benchmarks/bench_similarity.py [--images 100000] [--queries 20000]
+"""
+import argparse
+import json
+import os
+import statistics
+import tempfile
+import time
+
+import numpy as np
+
+import synthetic
+import similarity_index
+from quiz_logic import QuizLogic
+from similarity_index import (
+    SimilarityIndex, colour_histograms, decode_image, difference_hashes, feature_vectors, nearest_neighbours,
+)
+
+N_BASE_IMAGES = 3000
+RECALL_SAMPLE = 500
+
+
+def synthetic_thumbnails(n: int, rng: np.random.Generator):
+    which = rng.integers(0, N_BASE_IMAGES, size=n)
+    grays = rng.integers(0, 256, size=(N_BASE_IMAGES, 8, 9))[which]
+    rgbs = rng.integers(0, 256, size=(N_BASE_IMAGES, 256, 3))[which]
+    grays = np.clip(grays + rng.normal(0, 12, size=grays.shape), 0, 255).astype(np.uint8)
+    rgbs = np.clip(rgbs + rng.normal(0, 12, size=rgbs.shape), 0, 255).astype(np.uint8)
+    return grays, rgbs
+
+
+def recall_at_1(features: np.ndarray, neighbours: np.ndarray, rng: np.random.Generator) -> float:
+    rows = rng.choice(len(features), RECALL_SAMPLE, replace=False)
+    distances = np.stack([((features - features[row]) ** 2).sum(axis=1) for row in rows])
+    distances[np.arange(len(rows)), rows] = np.inf
+    exact = distances.argmin(axis=1)
+    found = distances[np.arange(len(rows)), neighbours[rows, 0]]
+    return float(np.mean(found <= distances[np.arange(len(rows)), exact]))
+
+
+def time_per_call(fn, args_list) -> float:
+    start = time.perf_counter()
+    for args in args_list:
+        fn(*args)
+    return (time.perf_counter() - start) / len(args_list)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--images", type=int, default=100_000)
+    parser.add_argument("--queries", type=int, default=20_000)
+    args = parser.parse_args()
+    rng = np.random.default_rng(1234)
+
+    image_dir = os.path.join(synthetic.REPO_ROOT, "word_images")
+    paths = [os.path.join(image_dir, name) for name in sorted(os.listdir(image_dir))]
+    decode_seconds = []
+    for path in paths:
+        start = time.perf_counter()
+        decode_image(path)
+        decode_seconds.append(time.perf_counter() - start)
+    print(json.dumps({"stage": "decode", "images": len(paths),
+                      "ms_per_image_p50": round(statistics.median(decode_seconds) * 1000, 3)}))
+
+    grays, rgbs = synthetic_thumbnails(args.images, rng)
+    start = time.perf_counter()
+    hashes = difference_hashes(grays)
+    histograms = colour_histograms(rgbs)
+    features_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    features = feature_vectors(hashes, histograms)
+    neighbours = nearest_neighbours(features)
+    neighbours_seconds = time.perf_counter() - start
+    print(json.dumps({"stage": "build", "images": args.images, "features_s": round(features_seconds, 3),
+                      "neighbours_s": round(neighbours_seconds, 3),
+                      "recall_at_1": round(recall_at_1(features, neighbours, rng), 3)}))
+
+    with tempfile.TemporaryDirectory() as root_dir:
+        os.makedirs(os.path.join(root_dir, "word_images"))
+        names = [synthetic.make_word(i, args.images).image for i in range(args.images)]
+        index = SimilarityIndex(names, hashes, histograms, neighbours, similarity_index._image_dir_stamp(root_dir))
+        start = time.perf_counter()
+        index.save(similarity_index.index_path(root_dir))
+        save_seconds = time.perf_counter() - start
+        start = time.perf_counter()
+        index = similarity_index.load_index(root_dir)
+        load_seconds = time.perf_counter() - start
+
+        targets = rng.integers(0, args.images, size=args.queries).tolist()
+        similar_us = time_per_call(index.similar, [(names[i],) for i in targets]) * 1e6
+        hamming_us = time_per_call(similarity_index.hamming_distances, [(hashes[0], hashes)] * 20) * 1e6
+
+        words = [synthetic.make_word(i, args.images) for i in range(args.images)]
+        results = {}
+        for difficulty in ("easy", "hard"):
+            quiz_logic = QuizLogic(root_dir, difficulty=difficulty)
+            quiz_logic.set_questions(words)
+            quiz_logic.similarity_index()
+            results[f"{difficulty}_question_us"] = round(
+                time_per_call(quiz_logic.next_question, [()] * args.queries) * 1e6, 2
+            )
+        print(json.dumps({"stage": "query", "images": args.images, "save_s": round(save_seconds, 3),
+                          "load_s": round(load_seconds, 3), "similar_us": round(similar_us, 2),
+                          "full_hamming_scan_us": round(hamming_us, 1), **results}))
+
+
+if __name__ == "__main__":
+    main()
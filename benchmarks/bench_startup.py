@@ -0,0 +1,107 @@
+"""
+Measure how long it takes before the first question can be asked.
+
+For large synthetic decks, compares loading the whole CSV with `load_word_data` against the
+streaming `load_word_data_in_background`, which is ready after the first few valid rows.
+
+With `--app`, also starts the Tk app in fresh processes and reports the time from process start
+until the app module is imported, until the first frame is drawn and until the first question can
+be answered. Importing needs no display, the other two are skipped without one.
+
+Usage: python benchmarks/bench_startup.py [--sizes 10000 100000 500000] [--app] [--runs 5]
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import synthetic
+from quiz_logic import QuizLogic
+
+
+def bench_size(size: int) -> dict:
+    with tempfile.TemporaryDirectory() as root_dir:
+        csv_path = synthetic.make_root_dir(root_dir, size)
+
+        start = time.perf_counter()
+        QuizLogic(root_dir).load_word_data(csv_path, 0)
+        full_load = time.perf_counter() - start
+
+        start = time.perf_counter()
+        quiz_logic = QuizLogic(root_dir)
+        ready = quiz_logic.load_word_data_in_background(csv_path, 0)
+        ready.wait()
+        quiz_logic.next_question()
+        first_question = time.perf_counter() - start
+        quiz_logic.loaded.wait()
+        streaming_total = time.perf_counter() - start
+
+    return {
+        "size": size,
+        "full_load_ms": round(full_load * 1000, 2),
+        "first_question_ms": round(first_question * 1000, 2),
+        "streaming_total_ms": round(streaming_total * 1000, 2),
+    }
+
+
+def run_app() -> None:
+    """Start the app in this process and print when each startup stage was reached."""
+    marks = {"imported": None, "first_frame": None, "interactive": None, "error": None}
+    import language_quiz_app
+    marks["imported"] = time.time()
+    try:
+        root = language_quiz_app.tk.Tk()
+    except language_quiz_app.tk.TclError as e:
+        marks["error"] = str(e)
+    else:
+        app = language_quiz_app.LanguageQuizApp(root)
+        root.update()
+        marks["first_frame"] = time.time()
+        while app.quiz_logic.current_id is None:
+            root.update()
+            time.sleep(0.001)
+        marks["interactive"] = time.time()
+        root.destroy()
+    print(json.dumps(marks))
+
+
+def bench_app(runs: int) -> dict:
+    timings = {"imported": [], "first_frame": [], "interactive": []}
+    error = None
+    for _ in range(runs):
+        start = time.time()
+        output = subprocess.run(
+            [sys.executable, __file__, "--run-app"], capture_output=True, text=True, check=True
+        ).stdout
+        marks = json.loads(output.splitlines()[-1])
+        error = marks.pop("error")
+        for stage, mark in marks.items():
+            if mark is not None:
+                timings[stage].append(mark - start)
+    result = {f"{stage}_ms": round(statistics.median(values) * 1000, 2) for stage, values in timings.items() if values}
+    if error:
+        result["skipped"] = error
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="*", default=[10_000, 100_000, 500_000])
+    parser.add_argument("--app", action="store_true", help="Also time starting the Tk app.")
+    parser.add_argument("--runs", type=int, default=5, help="App starts to take the median of.")
+    parser.add_argument("--run-app", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.run_app:
+        run_app()
+        return
+    for size in args.sizes:
+        print(json.dumps(bench_size(size)))
+    if args.app:
+        print(json.dumps({"app": bench_app(args.runs)}))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""
+Measure how `validate-deck` scales with the number of worker processes.
+
+Builds a synthetic deck with one distinct JPEG per word and checks every image, optionally also
+writing thumbnails, once per worker count. On an otherwise idle machine the time should drop
+close to linearly until the worker count reaches the number of cores.
+
+Usage: python benchmarks/bench_validate.py [--images 10000] [--image-size 512] [--workers 1 2 4 8]
+"""
+import argparse
+import json
+import os
+import shutil
+import tempfile
+
+import synthetic
+from validate_deck import available_cores, jobs_for_decks, validate_images
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--images", type=int, default=10_000)
+    parser.add_argument("--image-size", type=int, default=512)
+    parser.add_argument("--workers", type=int, nargs="+", default=None,
+                        help="Worker counts to try, powers of two up to the core count by default.")
+    parser.add_argument("--thumbnails", type=int, default=180, help="Thumbnail size to generate, 0 to skip.")
+    args = parser.parse_args()
+
+    cores = available_cores()
+    worker_counts = args.workers or sorted({1, *[2 ** i for i in range(cores.bit_length()) if 2 ** i <= cores], cores})
+    with tempfile.TemporaryDirectory() as root_dir:
+        synthetic.make_root_dir(root_dir, args.images, args.images, image_size=args.image_size)
+        thumbnail_dir = os.path.join(root_dir, "thumbnail_cache")
+        jobs = jobs_for_decks(root_dir, ["en"], thumbnail_dir=thumbnail_dir, thumbnail_size=args.thumbnails)
+        single = None
+        for workers in worker_counts:
+            shutil.rmtree(thumbnail_dir, ignore_errors=True)
+            summary = validate_images(jobs, workers)
+            single = single or summary.elapsed
+            print(json.dumps({
+                "images": len(jobs),
+                "cores": cores,
+                "workers": workers,
+                "seconds": round(summary.elapsed, 3),
+                "images_per_s": round(len(jobs) / summary.elapsed, 1),
+                "speedup": round(single / summary.elapsed, 2),
+                "failed": len(summary.failed),
+            }))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,234 @@
+"""
+Benchmark suite for the question lifecycle on synthetic decks.
+
+For each deck size this times:
+
+- `QuizLogic.load_word_data` parsing the CSV,
+- `next_question` and `check_answer` throughput,
+- `generate_batch` throughput for offline quiz sets,
+- `LanguageQuizApp.get_word_image` decoding and resizing images, cold, from the on-disk thumbnail
+  cache and from memory (with a stand-in for the Tk PhotoImage, so no display is needed),
+- `sound_path_for_word` plus the existence check done by `generate_sound_if_not_found`.
+
+A stub text-to-speech backend that writes empty files is selected through `PYTKQUIZ_TTS`, so the
+suite needs no network. Results are printed as JSON lines and can be written to a file with
+`--output`. Passing a previous results file with `--baseline` prints the change of every metric and
+exits with status 1 if any got slower by more than `--threshold`.
+
+Usage:
+    python benchmarks/run_suite.py --output results.json
+    python benchmarks/run_suite.py --baseline results.json
+"""
+import argparse
+import contextlib
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import synthetic
+import sound_gen
+from image_cache import ThumbnailCache
+from language_quiz_app import LanguageQuizApp
+from quiz_logic import QuizLogic
+from scheduler import RandomScheduler
+
+QUESTIONS = 20_000
+BATCH_QUESTIONS = 1_000_000
+IMAGE_SIZE = 180
+SEED = 1234
+
+
+class StubPhoto:
+    """Stands in for `ImageTk.PhotoImage`, which needs a Tk display."""
+
+    def __init__(self, img):
+        self.img = img
+
+    def paste(self, img):
+        self.img = img
+
+
+class StubSynthesizer:
+    """A text-to-speech backend that writes empty clips, so timings do not depend on the network."""
+
+    extension = ".mp3"
+
+    def voice_id(self, language: str) -> str:
+        return f"stub:{language}"
+
+    def save(self, language: str, text: str, sound_path: str) -> None:
+        open(sound_path, "wb").close()
+
+
+def median_time(func, repeat: int) -> float:
+    """Run `func` `repeat` times and return the median duration in seconds."""
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        durations.append(time.perf_counter() - start)
+    return statistics.median(durations)
+
+
+def bench_load(csv_path: str, root_dir: str, repeat: int) -> float:
+    return median_time(lambda: QuizLogic(root_dir).load_word_data(csv_path, 0), repeat)
+
+
+def bench_questions(quiz_logic: QuizLogic, repeat: int) -> tuple:
+    def ask():
+        for _ in range(QUESTIONS):
+            quiz_logic.next_question()
+
+    def answer():
+        quiz_logic.next_question()
+        selected = quiz_logic.option_ids[0]
+        for _ in range(QUESTIONS):
+            quiz_logic.check_answer(selected)
+
+    return median_time(ask, repeat) / QUESTIONS, median_time(answer, repeat) / QUESTIONS
+
+
+def bench_batch(quiz_logic: QuizLogic, repeat: int) -> float:
+    return median_time(lambda: quiz_logic.generate_batch(BATCH_QUESTIONS, SEED), repeat) / BATCH_QUESTIONS
+
+
+def bench_images(quiz_logic: QuizLogic, root_dir: str, n_images: int) -> dict:
+    options = [quiz_logic.deck[i] for i in range(min(n_images, len(quiz_logic.deck)))]
+
+    def app_with_cache(cache):
+        return SimpleNamespace(
+            quiz_logic=quiz_logic, thumbnail_cache=cache, photo_pool=[None], image_factory=StubPhoto,
+            image_size=IMAGE_SIZE,
+        )
+
+    def show_all(app):
+        start = time.perf_counter()
+        for option in options:
+            LanguageQuizApp.get_word_image(app, option)
+        return (time.perf_counter() - start) / len(options)
+
+    cache_dir = os.path.join(root_dir, "thumbnail_cache")
+    cold = show_all(app_with_cache(ThumbnailCache(cache_dir, IMAGE_SIZE)))
+    # A new cache object has an empty memory LRU, so images come from the thumbnails on disk.
+    app = app_with_cache(ThumbnailCache(cache_dir, IMAGE_SIZE, memory_items=len(options)))
+    disk = show_all(app)
+    memory = show_all(app)
+    return {"image_cold_ms": cold * 1000, "image_disk_ms": disk * 1000, "image_memory_ms": memory * 1000}
+
+
+def bench_sounds(quiz_logic: QuizLogic, repeat: int) -> tuple:
+    os.makedirs(os.path.join(quiz_logic.root_dir, quiz_logic.sound_dir()), exist_ok=True)
+    options = [quiz_logic.deck[i] for i in range(min(QUESTIONS, len(quiz_logic.deck)))]
+
+    def check_all():
+        for option in options:
+            sound_gen.generate_sound_if_not_found(
+                quiz_logic.language, option.word, quiz_logic.sound_path_for_word(option)
+            )
+
+    # The first pass creates the stub files, later passes only check that they exist.
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        missing = median_time(check_all, 1) / len(options)
+    existing = median_time(check_all, repeat) / len(options)
+    return missing, existing
+
+
+def bench_size(size: int, n_images: int, image_size: int, repeat: int) -> dict:
+    with tempfile.TemporaryDirectory() as root_dir:
+        csv_path = synthetic.make_root_dir(root_dir, size, n_images, image_size=image_size)
+        quiz_logic = QuizLogic(root_dir, scheduler=RandomScheduler(random.Random(SEED)))
+        quiz_logic.load_word_data(csv_path, 0)
+
+        metrics = {"load_word_data_ms": bench_load(csv_path, root_dir, repeat) * 1000}
+        next_question, check_answer = bench_questions(quiz_logic, repeat)
+        metrics["next_question_us"] = next_question * 1e6
+        metrics["check_answer_us"] = check_answer * 1e6
+        metrics["generate_batch_ns"] = bench_batch(quiz_logic, repeat) * 1e9
+        metrics.update(bench_images(quiz_logic, root_dir, n_images))
+        missing, existing = bench_sounds(quiz_logic, repeat)
+        metrics["sound_generate_stub_us"] = missing * 1e6
+        metrics["sound_lookup_us"] = existing * 1e6
+    return {name: round(value, 3) for name, value in metrics.items()}
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list:
+    """
+    Compare two results files. All metrics are durations, so a higher value is worse.
+
+    Returns:
+        list: One dict per metric present in both, with the ratio and whether it regressed.
+    """
+    rows = []
+    for size, metrics in results["results"].items():
+        base_metrics = baseline["results"].get(size, {})
+        for name, value in metrics.items():
+            base = base_metrics.get(name)
+            if not base:
+                continue
+            ratio = value / base
+            rows.append({
+                "size": size,
+                "metric": name,
+                "baseline": base,
+                "current": value,
+                "ratio": round(ratio, 3),
+                "regressed": ratio > 1 + threshold,
+            })
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 100_000])
+    parser.add_argument("--images", type=int, default=100, help="Number of distinct images per deck.")
+    parser.add_argument("--image-size", type=int, default=1024, help="Width and height of the synthetic JPEGs.")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per timing, the median is reported.")
+    parser.add_argument("--output", help="Write the results to this JSON file.")
+    parser.add_argument("--baseline", help="Compare against a results file written with --output.")
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="Relative slowdown counted as a regression when comparing, default 0.10.")
+    args = parser.parse_args()
+
+    results = {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "images": args.images,
+            "image_size": args.image_size,
+            "repeat": args.repeat,
+        },
+        "results": {},
+    }
+    # Selected the way users pick a backend, so every module generating sounds uses the stub.
+    with patch.dict(sound_gen.SYNTHESIZERS, {"stub": StubSynthesizer}), \
+            patch.dict(os.environ, {sound_gen.TTS_BACKEND_ENV: "stub"}):
+        for size in args.sizes:
+            metrics = bench_size(size, args.images, args.image_size, args.repeat)
+            results["results"][str(size)] = metrics
+            print(json.dumps({"size": size, **metrics}))
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        rows = compare(results, baseline, args.threshold)
+        for row in rows:
+            print(json.dumps(row))
+        regressions = [row for row in rows if row["regressed"]]
+        if regressions:
+            print(f"{len(regressions)} of {len(rows)} metrics regressed by more than {args.threshold:.0%}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Helpers for generating synthetic decks for the benchmarks.
+
+Benchmarks are plain scripts run from the repository root, e.g. `python benchmarks/bench_deck.py`.
+Importing this module puts the `pytkquiz` directory on `sys.path`, the same way the apps import
+their sibling modules, and the repository root for the modules imported as `pytkquiz.<name>`.
+"""
+import csv
+import os
+import random
+import sys
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, REPO_ROOT)
+sys.path.insert(0, os.path.join(REPO_ROOT, "pytkquiz"))
+
+from deck import WordData  # noqa: E402
+
+N_IMAGES = 100
+
+
+def make_word(i: int, n_images: int = N_IMAGES) -> WordData:
+    """Return the i-th synthetic word. Images and sounds are shared between words, as in real decks."""
+    image = f"img{i % n_images:05d}.jpg"
+    return WordData(
+        word=f"word{i:07d}",
+        image=image,
+        sound=image.replace(".jpg", ".mp3"),
+        definition=f"Definition number {i} of a synthetic benchmark word",
+        filename=f"word{i:07d}",
+    )
+
+
+def make_words(count: int, n_images: int = N_IMAGES) -> list:
+    return [make_word(i, n_images) for i in range(count)]
+
+
+def write_csv(path: str, count: int, n_images: int = N_IMAGES) -> None:
+    """Write a words.csv style file with `count` rows."""
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["Word", "Image", "Sound", "Definition"])
+        for i in range(count):
+            word = make_word(i, n_images)
+            writer.writerow([word.word, word.image, word.sound, word.definition])
+
+
+def write_translated_csv(path: str, count: int, n_images: int = N_IMAGES) -> None:
+    """Write a words_el.csv style file with `count` rows, using the same images as `write_csv`."""
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["Word", "Image", "Sound", "Definition", "Greek", "Transliteration"])
+        for i in range(count):
+            word = make_word(i, n_images)
+            writer.writerow([word.word, word.image, word.sound, word.definition, f"λέξη{i:07d}", f"lexi{i:07d}"])
+
+
+def make_root_dir(root_dir: str, count: int, n_images: int = N_IMAGES, image_size: int = 0) -> str:
+    """
+    Create a root directory with a words.csv of `count` rows and its `word_images` directory.
+
+    With `image_size` 0 the images are empty placeholder files, otherwise real JPEGs of that size.
+    Returns the path of the CSV file.
+    """
+    image_dir = os.path.join(root_dir, "word_images")
+    os.makedirs(image_dir, exist_ok=True)
+    rng = random.Random(1234)
+    for i in range(n_images):
+        path = os.path.join(image_dir, f"img{i:05d}.jpg")
+        if image_size:
+            from PIL import Image
+            color = (rng.randrange(256), rng.randrange(256), rng.randrange(256))
+            Image.new("RGB", (image_size, image_size), color).save(path, quality=90)
+        else:
+            open(path, "wb").close()
+    csv_path = os.path.join(root_dir, "words.csv")
+    write_csv(csv_path, count, n_images)
+    return csv_path
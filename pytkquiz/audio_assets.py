@@ -0,0 +1,108 @@
+import os
+import threading
+from collections import OrderedDict
+from typing import Optional, Union
+
+DEFAULT_MAX_BYTES = 16 * 1024 * 1024
+# If set, clips under the root directory are served from this URL instead of inline, e.g.
+# "app/static/" with Streamlit static file serving or the URL of a CDN holding word_sounds*/.
+AUDIO_BASE_URL_ENV = "PYTKQUIZ_AUDIO_BASE_URL"
+
+HIDDEN_AUDIO_CSS = """
+<style>
+  div[data-testid="stVerticalBlockBorderWrapper"]:has(
+    >div>div>div[data-testid="element-container"]
+    .hide-the-container
+  ) {
+    display: none;
+  }
+</style>
+"""
+
+
+class AudioAssets:
+    """
+    Serves sound clips to the Streamlit app from a bounded in-memory cache.
+
+    Clip bytes are cached by path and modification time, so every session shares one copy and a
+    rerun does not read the file again. The cache holds at most `max_bytes`, evicting the least
+    recently used clips. When `base_url` is set, clips are referenced by URL instead, so the browser
+    fetches and caches them itself and no audio bytes are sent with the page.
+    """
+
+    def __init__(self, root_dir: str, max_bytes: int = DEFAULT_MAX_BYTES, base_url: Optional[str] = None) -> None:
+        self.root_dir = root_dir
+        self.max_bytes = max_bytes
+        self.base_url = base_url
+        self.cached_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.bytes_inline = 0
+        self._clips = OrderedDict()
+        self._lock = threading.Lock()
+
+    def read(self, sound_path: str) -> bytes:
+        """Return the contents of `sound_path`, from the cache when possible."""
+        key = (sound_path, os.stat(sound_path).st_mtime_ns)
+        with self._lock:
+            data = self._clips.get(key)
+            if data is not None:
+                self._clips.move_to_end(key)
+                self.hits += 1
+                return data
+            self.misses += 1
+
+        with open(sound_path, "rb") as f:
+            data = f.read()
+
+        if len(data) <= self.max_bytes:
+            with self._lock:
+                if key not in self._clips:
+                    self._clips[key] = data
+                    self.cached_bytes += len(data)
+                while self.cached_bytes > self.max_bytes:
+                    _, evicted = self._clips.popitem(last=False)
+                    self.cached_bytes -= len(evicted)
+        return data
+
+    def url_for(self, sound_path: str) -> Optional[str]:
+        """Return the static URL for `sound_path`, or None if it has to be sent inline."""
+        if not self.base_url:
+            return None
+        rel_path = os.path.relpath(sound_path, self.root_dir)
+        if rel_path.startswith(os.pardir):
+            return None
+        return self.base_url.rstrip("/") + "/" + rel_path.replace(os.sep, "/")
+
+    def source_for(self, sound_path: str) -> Union[str, bytes]:
+        """Return what to pass to `st.audio`: a URL if clips are served statically, else the bytes."""
+        url = self.url_for(sound_path)
+        if url is not None:
+            return url
+        data = self.read(sound_path)
+        with self._lock:
+            self.bytes_inline += len(data)
+        return data
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "cached_clips": len(self._clips),
+                "cached_bytes": self.cached_bytes,
+                "bytes_inline": self.bytes_inline,
+            }
+
+
+_shared = {}
+_shared_lock = threading.Lock()
+
+
+def shared_assets(root_dir: str) -> AudioAssets:
+    """Return the process-wide `AudioAssets` for `root_dir`."""
+    with _shared_lock:
+        assets = _shared.get(root_dir)
+        if assets is None:
+            assets = _shared[root_dir] = AudioAssets(root_dir, base_url=os.environ.get(AUDIO_BASE_URL_ENV))
+        return assets
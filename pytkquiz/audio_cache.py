@@ -0,0 +1,238 @@
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+import unicodedata
+from collections import deque
+
+import instrumentation
+from instrumentation import percentile
+import single_flight
+from sound_gen import FEEDBACK_PHRASES, GTTSSynthesizer, default_synthesizer, save_atomically
+
+AUDIO_CACHE_DIR = "audio_cache"
+# Environment variable overriding where the apps keep the cache, `AUDIO_CACHE_DIR` in the repo by default.
+AUDIO_CACHE_DIR_ENV = "PYTKQUIZ_AUDIO_CACHE_DIR"
+INDEX_NAME = "index.jsonl"
+LATENCY_WINDOW = 256
+
+
+def normalize_text(text: str) -> str:
+    """Normalize text before hashing, so spelling variants that sound the same share a clip."""
+    return " ".join(unicodedata.normalize("NFC", text).split()).lower()
+
+
+class AudioCache:
+    """
+    A content-addressed cache of synthesized speech.
+
+    Clips are stored as `<cache_dir>/<hh>/<hash><ext>`, where the hash covers the language, the
+    normalized text and the voice of the backend, so the same text in another language or voice
+    gets its own clip. An append-only index file maps hashes to clips. It is read into memory, so a
+    lookup of a known clip only checks that the file is still there. Clips are written to a temporary file and
+    renamed into place, so a concurrent reader never sees a partial clip.
+
+    Hit and miss counts and synthesis latency are kept for `stats` and also reported to
+    `instrumentation`.
+    """
+
+    def __init__(self, cache_dir: str, synthesizer=None) -> None:
+        self.cache_dir = cache_dir
+        self.synthesizer = synthesizer if synthesizer is not None else default_synthesizer()
+        self.index_path = os.path.join(cache_dir, INDEX_NAME)
+        self.hits = 0
+        self.misses = 0
+        self.synth_seconds = deque(maxlen=LATENCY_WINDOW)
+        self._index = {}
+        self._index_offset = 0
+        self._lock = threading.Lock()
+        with self._lock:
+            self._read_index()
+
+    def key(self, language: str, text: str, voice: str = None) -> str:
+        """Hash `text` in `language` as spoken by `voice`, the cache's backend's voice by default."""
+        voice = voice if voice is not None else self.synthesizer.voice_id(language)
+        payload = json.dumps([language, normalize_text(text), voice], ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _relative_path(self, key: str, extension: str = None) -> str:
+        return os.path.join(key[:2], key + (extension or self.synthesizer.extension))
+
+    def clip_path(self, language: str, text: str) -> str:
+        """Return where the clip for `text` is stored, whether or not it exists yet."""
+        return os.path.join(self.cache_dir, self._relative_path(self.key(language, text)))
+
+    def _read_index(self) -> None:
+        """Read index entries appended since the last call, including by other processes."""
+        try:
+            with open(self.index_path, "rb") as f:
+                f.seek(self._index_offset)
+                data = f.read()
+        except FileNotFoundError:
+            return
+        # Only complete lines, a writer may be in the middle of appending one.
+        end = data.rfind(b"\n") + 1
+        for line in data[:end].splitlines():
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue
+            self._index[entry["key"]] = entry["path"]
+        self._index_offset += end
+
+    def _append_index(self, entry: dict) -> None:
+        line = (json.dumps(entry, ensure_ascii=False) + "\n").encode("utf-8")
+        os.makedirs(self.cache_dir, exist_ok=True)
+        # A single O_APPEND write, so lines from several processes do not interleave.
+        fd = os.open(self.index_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(fd, line)
+        finally:
+            os.close(fd)
+
+    def _remember(self, key: str, rel_path: str, language: str, text: str, voice: str = None) -> None:
+        entry = {"key": key, "path": rel_path, "language": language, "text": normalize_text(text),
+                 "voice": voice if voice is not None else self.synthesizer.voice_id(language)}
+        with self._lock:
+            if self._index.get(key) != rel_path:
+                self._index[key] = rel_path
+                self._append_index(entry)
+
+    def lookup(self, language: str, text: str, voice: str = None):
+        """
+        Return the path of the cached clip for `text`, or None if it has not been synthesized.
+
+        A clip that is indexed but was deleted from disk counts as missing, so `get` makes it again.
+        """
+        key = self.key(language, text, voice)
+        with self._lock:
+            rel_path = self._index.get(key)
+            if rel_path is None:
+                self._read_index()
+                rel_path = self._index.get(key)
+        if rel_path is None:
+            return None
+        path = os.path.join(self.cache_dir, rel_path)
+        return path if os.path.exists(path) else None
+
+    def get(self, language: str, text: str, wait: bool = True):
+        """
+        Return the path of the clip for `text` in `language`, synthesizing it if needed.
+
+        Concurrent requests for a missing clip, from threads or other processes, synthesize it once.
+
+        Args:
+            language (str): Language code of the text.
+            text (str): The text to speak.
+            wait (bool): If False, return at once and synthesize a missing clip in the background.
+
+        Returns:
+            Optional[str]: Path of the clip, or None if `wait` is False and it is not ready yet.
+        """
+        path = self.lookup(language, text)
+        if path is not None:
+            with self._lock:
+                self.hits += 1
+            instrumentation.count("audio_cache_hit")
+            return path
+
+        key = self.key(language, text)
+        with self._lock:
+            # Where a deleted clip was, unless it is in another format, otherwise where a new one goes.
+            rel_path = self._index.get(key)
+        if rel_path is None or not rel_path.endswith(self.synthesizer.extension):
+            rel_path = self._relative_path(key)
+        path = os.path.join(self.cache_dir, rel_path)
+        if not os.path.exists(path):
+            ready = single_flight.run_once(
+                os.path.abspath(path), lambda: os.path.exists(path),
+                lambda: self._synthesize(language, text, path), wait=wait,
+            )
+            if not ready:
+                return None
+        with self._lock:
+            self.misses += 1
+        self._remember(key, rel_path, language, text)
+        instrumentation.count("audio_cache_miss")
+        return path
+
+    def add(self, language: str, text: str, source_path: str, voice: str = None) -> str:
+        """
+        Copy an existing clip of `text` into the cache, unless the cache already has one.
+
+        Args:
+            voice (str): The voice the clip was recorded with, the cache's backend's voice if None.
+        """
+        path = self.lookup(language, text, voice)
+        if path is not None:
+            return path
+        key = self.key(language, text, voice)
+        rel_path = self._relative_path(key, os.path.splitext(source_path)[1])
+        path = os.path.join(self.cache_dir, rel_path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        shutil.copyfile(source_path, tmp_path)
+        os.replace(tmp_path, path)
+        self._remember(key, rel_path, language, text, voice)
+        return path
+
+    def _synthesize(self, language: str, text: str, path: str) -> None:
+        start = time.perf_counter()
+        save_atomically(self.synthesizer, language, text, path)
+        with self._lock:
+            self.synth_seconds.append(time.perf_counter() - start)
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            latencies = sorted(self.synth_seconds)
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "clips": len(self._index),
+                "synth_p50_ms": percentile(latencies, 0.50) * 1000,
+                "synth_p95_ms": percentile(latencies, 0.95) * 1000,
+            }
+
+
+_shared = {}
+_shared_lock = threading.Lock()
+
+
+def add_shipped_feedback_clips(cache: AudioCache, root_dir: str) -> None:
+    """
+    Add the English gTTS clips of the feedback phrases that ship in `word_sounds` to the cache.
+
+    They are keyed with the gTTS voice they were recorded with, and only added when the cache
+    synthesizes with that voice too, so the apps can use them without synthesizing anything.
+    """
+    voice = GTTSSynthesizer().voice_id("en")
+    if not isinstance(cache.synthesizer, GTTSSynthesizer) or cache.synthesizer.voice_id("en") != voice:
+        return
+    for phrase in FEEDBACK_PHRASES:
+        shipped_name = "".join(c if c.isalnum() else "_" for c in phrase.lower()) + ".mp3"
+        shipped_path = os.path.join(root_dir, "word_sounds", shipped_name)
+        if os.path.exists(shipped_path):
+            cache.add("en", phrase, shipped_path, voice=voice)
+
+
+def audio_cache_dir(root_dir: str) -> str:
+    """
+    Return the cache directory the apps use, `PYTKQUIZ_AUDIO_CACHE_DIR` if set, else `AUDIO_CACHE_DIR`
+    in `root_dir`.
+    """
+    return os.environ.get(AUDIO_CACHE_DIR_ENV) or os.path.join(root_dir, AUDIO_CACHE_DIR)
+
+
+def shared_audio_cache(root_dir: str) -> AudioCache:
+    """Return the process-wide `AudioCache` for `root_dir`, using the default backend."""
+    cache_dir = audio_cache_dir(root_dir)
+    with _shared_lock:
+        cache = _shared.get(cache_dir)
+        if cache is None:
+            cache = _shared[cache_dir] = AudioCache(cache_dir)
+            add_shipped_feedback_clips(cache, root_dir)
+        return cache
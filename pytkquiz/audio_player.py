@@ -0,0 +1,139 @@
+import multiprocessing
+import queue
+import threading
+from typing import Callable, NamedTuple, Optional
+
+POLL_INTERVAL = 0.02
+
+
+def play_file(sound_path: str) -> None:
+    from playsound import playsound
+
+    playsound(sound_path)
+
+
+class ProcessClip:
+    """Plays a sound file with playsound in a child process, so it can be stopped part way."""
+
+    def __init__(self, sound_path: str) -> None:
+        self.process = multiprocessing.Process(target=play_file, args=(sound_path,), daemon=True)
+        self.process.start()
+
+    def is_alive(self) -> bool:
+        return self.process.is_alive()
+
+    def stop(self) -> None:
+        self.process.terminate()
+        self.process.join()
+
+
+class PlayRequest(NamedTuple):
+    sound_path: str
+    generation: int
+    on_done: Optional[Callable[[bool], None]]
+    prepare: Optional[Callable[[], None]]
+
+
+class AudioPlayer:
+    """
+    Plays sounds on a background worker thread so the GUI never waits for a clip to finish.
+
+    Only the most recent request matters: calling `play` while a clip is playing stops it and
+    skips any clips that were queued but not started yet. When a request ends, its `on_done`
+    callback receives True if the clip played to the end and False if it was replaced or failed.
+    Callbacks are handed to `schedule` (normally `master.after`) so they run on the Tk thread.
+    """
+
+    def __init__(
+            self,
+            schedule: Optional[Callable[..., object]] = None,
+            clip_factory: Callable[[str], object] = ProcessClip,
+    ) -> None:
+        """
+        Args:
+            schedule (Optional[Callable]): Called as `schedule(0, callback, completed)` to deliver
+                completion callbacks, e.g. `master.after`. If None, callbacks run on the worker thread.
+            clip_factory (Callable[[str], object]): Starts playing a file and returns an object with
+                `is_alive()` and `stop()` methods.
+        """
+        self.schedule = schedule
+        self.clip_factory = clip_factory
+        self._requests = queue.Queue()
+        self._generation = 0
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._worker = threading.Thread(target=self._run, name="audio-player", daemon=True)
+        self._worker.start()
+
+    def play(
+            self,
+            sound_path: str,
+            on_done: Optional[Callable[[bool], None]] = None,
+            prepare: Optional[Callable[[], None]] = None,
+    ) -> None:
+        """
+        Play `sound_path`, interrupting whatever is playing now. Returns immediately.
+
+        Args:
+            sound_path (str): The file to play.
+            on_done (Optional[Callable[[bool], None]]): Called when the request ends.
+            prepare (Optional[Callable[[], None]]): Run on the worker before playing, e.g. to generate
+                the sound file, so slow preparation does not block the caller either.
+        """
+        with self._lock:
+            self._generation += 1
+            generation = self._generation
+        self._requests.put(PlayRequest(sound_path, generation, on_done, prepare))
+        self._wakeup.set()
+
+    def stop(self) -> None:
+        """Stop the current clip and drop any pending ones."""
+        with self._lock:
+            self._generation += 1
+        self._wakeup.set()
+
+    def close(self) -> None:
+        """Stop playback and shut down the worker thread."""
+        self.stop()
+        self._requests.put(None)
+        self._worker.join()
+
+    def _is_current(self, request: PlayRequest) -> bool:
+        with self._lock:
+            return request.generation == self._generation
+
+    def _run(self) -> None:
+        while True:
+            request = self._requests.get()
+            if request is None:
+                return
+            completed = False
+            if self._is_current(request):
+                try:
+                    completed = self._play(request)
+                except Exception as e:
+                    print(f"Failed to play {request.sound_path}: {e}")
+            self._finish(request, completed)
+
+    def _play(self, request: PlayRequest) -> bool:
+        if request.prepare is not None:
+            request.prepare()
+            if not self._is_current(request):
+                return False
+
+        clip = self.clip_factory(request.sound_path)
+        while clip.is_alive():
+            if not self._is_current(request):
+                clip.stop()
+                return False
+            self._wakeup.wait(POLL_INTERVAL)
+            self._wakeup.clear()
+        return True
+
+    def _finish(self, request: PlayRequest, completed: bool) -> None:
+        if request.on_done is None:
+            return
+        if self.schedule is None:
+            request.on_done(completed)
+        else:
+            self.schedule(0, request.on_done, completed)
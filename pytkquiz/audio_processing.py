@@ -0,0 +1,490 @@
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import threading
+import time
+import wave
+from typing import NamedTuple, Optional
+
+import single_flight
+
+PROCESSED_DIR = "processed_audio"
+MANIFEST_NAME = "manifest.jsonl"
+# Bump when the processing changes, so clips processed the old way are processed again.
+PROCESSING_VERSION = 1
+# A granule whose global gain is this many steps (1.5 dB each) under the loudest one counts as silence.
+SILENCE_GAIN_DROP = 30
+# Median global gain of the audible frames each clip is moved towards, about that of a gTTS clip.
+TARGET_GAIN = 160
+MAX_GAIN_STEPS = 4
+# Frames kept around the audible part, so the first and last sounds are not clipped.
+PAD_FRAMES = 1
+# WAV clips: level under the peak that counts as silence, padding kept and peak after normalizing.
+WAV_SILENCE_DB = 45
+WAV_PAD_MS = 20
+WAV_PEAK_DBFS = -1.0
+# Used to re-encode MP3 clips when the ffmpeg binary is installed.
+FFMPEG_BITRATE = "32k"
+FFMPEG_FILTERS = (
+    "silenceremove=start_periods=1:start_threshold=-45dB:start_silence=0.02,areverse,"
+    "silenceremove=start_periods=1:start_threshold=-45dB:start_silence=0.02,areverse,"
+    "loudnorm=I=-16:TP=-1.5:LRA=11"
+)
+METHODS = ("auto", "frames", "ffmpeg")
+DEFAULT_WORKERS = 4
+
+MPEG1_BITRATES = (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320)
+MPEG2_BITRATES = (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160)
+MPEG1_SAMPLE_RATES = (44100, 48000, 32000)
+
+
+class Mp3Frame(NamedTuple):
+    offset: int
+    size: int
+    # Start and length of the side info, which follows the header and the optional CRC.
+    side_offset: int
+    side_size: int
+    main_data_begin: int
+    # `(part2_3_length, global_gain, bit position of global_gain in the side info)` per granule and channel.
+    granules: tuple
+    samples: int
+    sample_rate: int
+    has_crc: bool
+
+    @property
+    def level(self) -> Optional[int]:
+        """The highest global gain of a granule with any spectral data, None for an empty frame."""
+        return max((gain for length, gain, _ in self.granules if length), default=None)
+
+    @property
+    def main_data_size(self) -> int:
+        return self.size - (self.side_offset - self.offset) - self.side_size
+
+
+def parse_mp3_frames(data: bytes) -> list[Mp3Frame]:
+    """
+    Return the MPEG audio Layer III frames of `data`, skipping an ID3v2 tag at the start.
+
+    Parsing stops at the first bytes that are not a frame, e.g. a trailing ID3v1 tag.
+    """
+    i = 0
+    if data[:3] == b"ID3" and len(data) >= 10:
+        i = 10 + ((data[6] << 21) | (data[7] << 14) | (data[8] << 7) | data[9])
+    frames = []
+    while i + 4 <= len(data):
+        header = int.from_bytes(data[i:i + 4], "big")
+        version, layer = (header >> 19) & 3, (header >> 17) & 3
+        bitrate_index, rate_index = (header >> 12) & 15, (header >> 10) & 3
+        if header >> 21 != 0x7FF or version == 1 or layer != 1 or bitrate_index in (0, 15) or rate_index == 3:
+            break
+        mpeg1 = version == 3
+        has_crc = not (header >> 16) & 1
+        mono = (header >> 6) & 3 == 3
+        channels = 1 if mono else 2
+        bitrate = (MPEG1_BITRATES if mpeg1 else MPEG2_BITRATES)[bitrate_index] * 1000
+        sample_rate = MPEG1_SAMPLE_RATES[rate_index] >> {3: 0, 2: 1, 0: 2}[version]
+        size = (144 if mpeg1 else 72) * bitrate // sample_rate + ((header >> 9) & 1)
+        side_offset = i + 4 + (2 if has_crc else 0)
+        if mpeg1:
+            side_size = 17 if mono else 32
+            prefix, n_granules, granule_bits = 9 + (5 if mono else 3) + 4 * channels, 2, 59
+        else:
+            side_size = 9 if mono else 17
+            prefix, n_granules, granule_bits = 8 + (1 if mono else 2), 1, 63
+        if i + size > len(data) or side_offset + side_size > i + size:
+            break
+        side = int.from_bytes(data[side_offset:side_offset + side_size], "big")
+        total_bits = side_size * 8
+
+        def bits(position, length):
+            return (side >> (total_bits - position - length)) & ((1 << length) - 1)
+
+        granules = []
+        for g in range(n_granules * channels):
+            position = prefix + g * granule_bits
+            granules.append((bits(position, 12), bits(position + 21, 8), position + 21))
+        frames.append(Mp3Frame(
+            i, size, side_offset, side_size, bits(0, 9 if mpeg1 else 8), tuple(granules),
+            1152 if mpeg1 else 576, sample_rate, has_crc,
+        ))
+        i += size
+    return frames
+
+
+def _frame_ms(frame: Mp3Frame) -> float:
+    return frame.samples * 1000 / frame.sample_rate
+
+
+class ClipResult(NamedTuple):
+    data: bytes
+    method: str
+    # Silence before the first audible frame or sample, before and after processing.
+    lead_ms_before: float
+    lead_ms_after: float
+    duration_ms_before: float
+    duration_ms_after: float
+    gain_db: float
+
+
+def process_mp3_frames(data: bytes, target_gain: int = TARGET_GAIN) -> ClipResult:
+    """
+    Trim silent frames off both ends of an MP3 and move its level towards `target_gain`, losslessly.
+
+    Nothing is decoded or re-encoded. A frame is silent when none of its granules has spectral
+    data at a global gain within `SILENCE_GAIN_DROP` steps of the loudest granule. The level is
+    changed the way mp3gain does it, by adding the same number of steps to every global gain, so
+    it moves in 1.5 dB steps. It is estimated from the median gain of the audible frames rather
+    than measured on decoded audio, so the change is limited to `MAX_GAIN_STEPS`. The frames
+    before the first audible one that hold its bit reservoir data are kept with their side info
+    cleared, so they decode as silence. A Xing or Info frame is dropped, since its counts would no
+    longer be right, and ID3 tags are dropped.
+
+    Raises:
+        ValueError: If `data` holds no Layer III frames or uses CRCs, which would need updating.
+    """
+    frames = parse_mp3_frames(data)
+    if not frames:
+        raise ValueError("no MPEG audio Layer III frames found")
+    if any(frame.has_crc for frame in frames):
+        raise ValueError("frames with CRCs are not supported")
+    first_main = frames[0].side_offset + frames[0].side_size
+    if data[first_main:first_main + 4] in (b"Xing", b"Info"):
+        frames = frames[1:]
+    frame_ms = _frame_ms(frames[0])
+    duration_before = len(frames) * frame_ms
+    levels = [frame.level for frame in frames]
+    clip_level = max((level for level in levels if level is not None), default=None)
+    if clip_level is None:
+        raise ValueError("the clip is silent")
+    loud = [i for i, level in enumerate(levels) if level is not None and level >= clip_level - SILENCE_GAIN_DROP]
+    first, last = loud[0], loud[-1]
+
+    start = max(first - PAD_FRAMES, 0)
+    while start > 0 and sum(f.main_data_size for f in frames[start:first]) < frames[first].main_data_begin:
+        start -= 1
+    end = min(last + PAD_FRAMES + 1, len(frames))
+    median_level = statistics.median_low(levels[i] for i in loud)
+    steps = max(-MAX_GAIN_STEPS, min(MAX_GAIN_STEPS, target_gain - median_level))
+
+    out = bytearray()
+    for i in range(start, end):
+        frame = frames[i]
+        raw = bytearray(data[frame.offset:frame.offset + frame.size])
+        side_start = frame.side_offset - frame.offset
+        side_end = side_start + frame.side_size
+        if i < first:
+            # Kept only for the bit reservoir, an all-zero side info decodes as silence.
+            raw[side_start:side_end] = bytes(frame.side_size)
+        elif steps:
+            side = int.from_bytes(raw[side_start:side_end], "big")
+            total_bits = frame.side_size * 8
+            for length, gain, position in frame.granules:
+                if length:
+                    shift = total_bits - position - 8
+                    new_gain = max(0, min(255, gain + steps))
+                    side = (side & ~(0xFF << shift)) | (new_gain << shift)
+            raw[side_start:side_end] = side.to_bytes(frame.side_size, "big")
+        out += raw
+    return ClipResult(
+        bytes(out), "frames", first * frame_ms, (first - start) * frame_ms, duration_before,
+        (end - start) * frame_ms, steps * 1.5,
+    )
+
+
+def mp3_timing(data: bytes):
+    """Return the estimated leading silence and the duration in milliseconds of an MP3."""
+    frames = parse_mp3_frames(data)
+    levels = [frame.level for frame in frames]
+    clip_level = max((level for level in levels if level is not None), default=None)
+    if clip_level is None:
+        return 0.0, 0.0
+    frame_ms = _frame_ms(frames[0])
+    first = next(i for i, level in enumerate(levels) if level is not None and level >= clip_level - SILENCE_GAIN_DROP)
+    return first * frame_ms, len(frames) * frame_ms
+
+
+def process_mp3_ffmpeg(data: bytes, source_path: str) -> ClipResult:
+    """Trim, loudness-normalize and re-encode an MP3 at `FFMPEG_BITRATE` mono with ffmpeg."""
+    result = subprocess.run(
+        ["ffmpeg", "-nostdin", "-loglevel", "error", "-i", source_path, "-af", FFMPEG_FILTERS,
+         "-ac", "1", "-codec:a", "libmp3lame", "-b:a", FFMPEG_BITRATE, "-f", "mp3", "pipe:1"],
+        capture_output=True, check=True,
+    )
+    lead_before, duration_before = mp3_timing(data)
+    lead_after, duration_after = mp3_timing(result.stdout)
+    return ClipResult(result.stdout, "ffmpeg", lead_before, lead_after, duration_before, duration_after, 0.0)
+
+
+def process_wav(path: str) -> ClipResult:
+    """Trim silence off both ends of a WAV clip, mix it to mono and normalize its peak, as 16-bit PCM."""
+    import io
+
+    import numpy as np
+
+    with wave.open(path, "rb") as f:
+        channels, width, rate = f.getnchannels(), f.getsampwidth(), f.getframerate()
+        raw = f.readframes(f.getnframes())
+    if width == 1:
+        samples = (np.frombuffer(raw, dtype=np.uint8).astype(np.float32) - 128) * 256
+    elif width == 2:
+        samples = np.frombuffer(raw, dtype="<i2").astype(np.float32)
+    else:
+        raise ValueError(f"{8 * width}-bit WAV clips are not supported")
+    samples = samples.reshape(-1, channels).mean(axis=1)
+    duration_before = len(samples) * 1000 / rate
+    peak = float(np.abs(samples).max()) if len(samples) else 0.0
+    if peak == 0:
+        raise ValueError("the clip is silent")
+
+    audible = np.flatnonzero(np.abs(samples) >= peak * 10 ** (-WAV_SILENCE_DB / 20))
+    pad = int(rate * WAV_PAD_MS / 1000)
+    start, end = max(audible[0] - pad, 0), min(audible[-1] + pad + 1, len(samples))
+    gain = 32767 * 10 ** (WAV_PEAK_DBFS / 20) / peak
+    trimmed = np.clip(np.round(samples[start:end] * gain), -32768, 32767).astype("<i2")
+
+    out = io.BytesIO()
+    with wave.open(out, "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(rate)
+        f.writeframes(trimmed.tobytes())
+    return ClipResult(
+        out.getvalue(), "wav", audible[0] * 1000 / rate, (audible[0] - start) * 1000 / rate, duration_before,
+        len(trimmed) * 1000 / rate, 20 * float(np.log10(gain)),
+    )
+
+
+def process_clip(path: str, method: str = "auto") -> ClipResult:
+    """
+    Process one clip, keeping its format.
+
+    Args:
+        path (str): An MP3 or WAV clip.
+        method (str): For MP3 clips, "ffmpeg" to re-encode with ffmpeg, "frames" to edit the frames
+            losslessly, or "auto" to use ffmpeg when it is installed.
+    """
+    if path.endswith(".wav"):
+        return process_wav(path)
+    with open(path, "rb") as f:
+        data = f.read()
+    if method == "ffmpeg" or (method == "auto" and shutil.which("ffmpeg")):
+        return process_mp3_ffmpeg(data, path)
+    return process_mp3_frames(data)
+
+
+class AudioProcessor:
+    """
+    Trimmed and normalized copies of the sound clips under `root_dir`, made once per clip.
+
+    Processed clips are stored under `processed_audio/` at the same relative path as their
+    source. An append-only manifest records the size and modification time of each source when it
+    was processed, so a clip is processed again only after it changes, and processes share their
+    work. Sources that cannot be processed are served as they are.
+    """
+
+    def __init__(self, root_dir: str, method: str = "auto") -> None:
+        self.root_dir = root_dir
+        self.method = method
+        self.processed_dir = os.path.join(root_dir, PROCESSED_DIR)
+        self.manifest_path = os.path.join(self.processed_dir, MANIFEST_NAME)
+        self._entries = {}
+        self._manifest_offset = 0
+        # Source modification time of each clip that could not be processed, guarded by `_lock`.
+        self._failed = {}
+        self._lock = threading.Lock()
+        with self._lock:
+            self._read_manifest()
+
+    def _read_manifest(self) -> None:
+        """Read manifest entries appended since the last call, including by other processes."""
+        try:
+            with open(self.manifest_path, "rb") as f:
+                f.seek(self._manifest_offset)
+                data = f.read()
+        except FileNotFoundError:
+            return
+        # Only complete lines, a writer may be in the middle of appending one.
+        end = data.rfind(b"\n") + 1
+        for line in data[:end].splitlines():
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue
+            if entry.get("version") == PROCESSING_VERSION:
+                self._entries[entry["source"]] = entry
+        self._manifest_offset += end
+
+    def _append_manifest(self, entry: dict) -> None:
+        line = (json.dumps(entry, ensure_ascii=False) + "\n").encode("utf-8")
+        os.makedirs(self.processed_dir, exist_ok=True)
+        # A single O_APPEND write, so lines from several processes do not interleave.
+        fd = os.open(self.manifest_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(fd, line)
+        finally:
+            os.close(fd)
+
+    def _relative_path(self, sound_path: str) -> Optional[str]:
+        rel_path = os.path.relpath(os.path.abspath(sound_path), os.path.abspath(self.root_dir))
+        if rel_path.startswith(os.pardir) or rel_path.startswith(PROCESSED_DIR + os.sep):
+            return None
+        return rel_path
+
+    def entry_for(self, sound_path: str) -> Optional[dict]:
+        """Return the manifest entry of `sound_path` if it was processed in its current version."""
+        rel_path = self._relative_path(sound_path)
+        if rel_path is None:
+            return None
+        try:
+            stat = os.stat(sound_path)
+        except FileNotFoundError:
+            return None
+        with self._lock:
+            entry = self._entries.get(rel_path)
+            if entry is None or entry["source_mtime_ns"] != stat.st_mtime_ns:
+                self._read_manifest()
+                entry = self._entries.get(rel_path)
+        if entry is None or (entry["source_bytes"], entry["source_mtime_ns"]) != (stat.st_size, stat.st_mtime_ns):
+            return None
+        return entry
+
+    def resolve(self, sound_path: str) -> str:
+        """Return the processed copy of `sound_path` if there is an up to date one, else `sound_path`."""
+        entry = self.entry_for(sound_path)
+        return sound_path if entry is None else os.path.join(self.processed_dir, entry["path"])
+
+    def _has_failed(self, rel_path: str, stamp: int) -> bool:
+        with self._lock:
+            return self._failed.get(rel_path) == stamp
+
+    def get(self, sound_path: str, wait: bool = True) -> str:
+        """
+        Return the processed copy of `sound_path`, processing it first if needed.
+
+        Concurrent requests for the same clip, from threads or other processes, process it once.
+        Returns `sound_path` itself if it cannot be processed, or if `wait` is False and it is not
+        processed yet, in which case it is processed in the background for later requests.
+        """
+        entry = self.entry_for(sound_path)
+        if entry is not None:
+            return os.path.join(self.processed_dir, entry["path"])
+        rel_path = self._relative_path(sound_path)
+        if rel_path is None or not os.path.exists(sound_path):
+            return sound_path
+        stamp = os.stat(sound_path).st_mtime_ns
+        if self._has_failed(rel_path, stamp):
+            return sound_path
+        out_path = os.path.join(self.processed_dir, rel_path)
+        single_flight.run_once(
+            os.path.abspath(out_path),
+            lambda: self.entry_for(sound_path) is not None or self._has_failed(rel_path, stamp),
+            lambda: self._process_or_skip(sound_path, rel_path, out_path, stamp), wait=wait,
+        )
+        return self.resolve(sound_path)
+
+    def _process_or_skip(self, sound_path: str, rel_path: str, out_path: str, stamp: int) -> None:
+        """Process a clip, or remember that this version of it cannot be processed."""
+        try:
+            self._process(sound_path, rel_path, out_path)
+        except (OSError, ValueError, EOFError, wave.Error, subprocess.CalledProcessError) as e:
+            print(f"Could not process {sound_path}, using it as it is: {e}")
+            with self._lock:
+                self._failed[rel_path] = stamp
+
+    def _process(self, sound_path: str, rel_path: str, out_path: str) -> dict:
+        stat = os.stat(sound_path)
+        result = process_clip(sound_path, self.method)
+        os.makedirs(os.path.dirname(out_path), exist_ok=True)
+        tmp_path = f"{out_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(result.data)
+        os.replace(tmp_path, out_path)
+        entry = {
+            "source": rel_path, "path": rel_path, "version": PROCESSING_VERSION, "method": result.method,
+            "source_bytes": stat.st_size, "source_mtime_ns": stat.st_mtime_ns, "bytes": len(result.data),
+            "lead_ms_before": round(result.lead_ms_before, 1), "lead_ms_after": round(result.lead_ms_after, 1),
+            "duration_ms_before": round(result.duration_ms_before, 1),
+            "duration_ms_after": round(result.duration_ms_after, 1), "gain_db": round(result.gain_db, 1),
+        }
+        self._append_manifest(entry)
+        with self._lock:
+            self._entries[rel_path] = entry
+        return entry
+
+
+_shared = {}
+_shared_lock = threading.Lock()
+
+
+def shared_processor(root_dir: str) -> AudioProcessor:
+    """Return the process-wide `AudioProcessor` for `root_dir`."""
+    with _shared_lock:
+        processor = _shared.get(root_dir)
+        if processor is None:
+            processor = _shared[root_dir] = AudioProcessor(root_dir)
+        return processor
+
+
+class ProcessSummary(NamedTuple):
+    entries: list
+    failed: list
+    elapsed: float
+
+    def format(self) -> str:
+        lines = [f"Processed {len(self.entries)} clips, {len(self.failed)} failed in {self.elapsed:.2f}s"]
+        if self.entries:
+            before = sum(entry["source_bytes"] for entry in self.entries)
+            after = sum(entry["bytes"] for entry in self.entries)
+            lines.append(
+                f"  payload: {after / 1024:.1f} KiB vs {before / 1024:.1f} KiB originals "
+                f"({1 - after / before:.1%} smaller)"
+            )
+            for name, label in (("lead_ms", "time to first audible sound"), ("duration_ms", "duration")):
+                mean_before = statistics.mean(entry[name + "_before"] for entry in self.entries)
+                mean_after = statistics.mean(entry[name + "_after"] for entry in self.entries)
+                lines.append(f"  {label}: {mean_after:.0f} ms vs {mean_before:.0f} ms on average")
+            methods = sorted({entry["method"] for entry in self.entries})
+            lines.append(f"  method: {', '.join(methods)}")
+        return "\n".join(lines)
+
+
+def process_clips(processor: AudioProcessor, sound_paths, workers: int = DEFAULT_WORKERS) -> ProcessSummary:
+    """Process every clip in `sound_paths` that exists, on `workers` threads."""
+    from concurrent.futures import ThreadPoolExecutor
+
+    start = time.perf_counter()
+    sound_paths = [path for path in dict.fromkeys(sound_paths) if os.path.exists(path)]
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        results = list(executor.map(processor.get, sound_paths))
+    entries, failed = [], []
+    for sound_path, result in zip(sound_paths, results):
+        entry = processor.entry_for(sound_path) if result != sound_path else None
+        if entry is None:
+            failed.append(sound_path)
+        else:
+            entries.append(entry)
+    return ProcessSummary(entries, failed, time.perf_counter() - start)
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--languages", nargs="+", default=["en", "el"], help="Decks whose sounds to process.")
+    parser.add_argument("--method", default="auto", choices=METHODS,
+                        help="How to process MP3 clips, ffmpeg when installed by default.")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="Number of parallel workers.")
+
+
+def run(args) -> int:
+    from build_audio import sound_jobs_for_csv
+    from quiz_logic import words_path_for_language
+
+    sound_paths = [
+        job.sound_path
+        for language in args.languages
+        for job in sound_jobs_for_csv(args.root_dir, words_path_for_language(args.root_dir, language), language)
+    ]
+    summary = process_clips(AudioProcessor(args.root_dir, args.method), sound_paths, args.workers)
+    print(summary.format())
+    return 1 if summary.failed else 0
@@ -0,0 +1,246 @@
+import argparse
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import NamedTuple
+
+from PIL import Image, features
+
+from image_assets import ASSET_DIR, MANIFEST_VERSION, ImageManifest, manifest_path
+from quiz_logic import QuizLogic, word_col_index_for_language, words_path_for_language
+
+# Longest side in pixels. 180 is the Tk app's default image size, the larger ones cover the
+# Streamlit columns and high DPI screens.
+DEFAULT_SIZES = (90, 180, 360, 720)
+FORMATS = {
+    "webp": ("WEBP", ".webp"),
+    "jpeg": ("JPEG", ".jpg"),
+}
+DEFAULT_FORMAT = "webp" if features.check("webp") else "jpeg"
+DEFAULT_QUALITY = 80
+DEFAULT_WORKERS = 4
+
+
+class AssetSummary(NamedTuple):
+    built: int
+    reused: int
+    failed: list
+    source_bytes: int
+    variant_bytes: dict
+    elapsed: float
+
+    def format(self) -> str:
+        lines = [
+            f"Built variants for {self.built} images, reused {self.reused} up to date, "
+            f"{len(self.failed)} failed in {self.elapsed:.2f}s"
+        ]
+        for size, total in sorted(self.variant_bytes.items()):
+            saved = 1 - total / self.source_bytes if self.source_bytes else 0.0
+            lines.append(
+                f"  {size:>4} px: {total / 1024:.1f} KiB vs {self.source_bytes / 1024:.1f} KiB originals "
+                f"({saved:.1%} smaller)"
+            )
+        return "\n".join(lines)
+
+
+def file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def image_names_for_decks(root_dir: str, languages) -> list[str]:
+    """Return the names of every image used by the decks of `languages`."""
+    names = set()
+    for language in languages:
+        quiz_logic = QuizLogic(root_dir=root_dir, language=language)
+        words = quiz_logic.load_word_data(
+            words_path_for_language(root_dir, language), word_col_index_for_language(language)
+        )
+        names.update(word.image for word in words)
+    return sorted(names)
+
+
+def build_variants(root_dir: str, image_name: str, sizes, fmt: str, quality: int) -> dict:
+    """
+    Write the resized variants of one image and return its manifest entry.
+
+    The image is decoded once and each variant is resized from the next larger one. Variants are
+    never upscaled, and their file names include a hash of their content, so a changed variant
+    gets a new URL. Each file is written to a temporary name and renamed into place.
+    """
+    source_path = os.path.join(root_dir, "word_images", image_name)
+    stat = os.stat(source_path)
+    pil_format, ext = FORMATS[fmt]
+    out_dir = os.path.join(root_dir, ASSET_DIR)
+    os.makedirs(out_dir, exist_ok=True)
+    stem = os.path.splitext(image_name)[0]
+
+    with Image.open(source_path) as source:
+        img = source.convert("RGB")
+    width, height = img.size
+    variants = []
+    for size in sorted(sizes, reverse=True):
+        if size >= max(width, height):
+            continue
+        img = img.copy()
+        img.thumbnail((size, size), Image.LANCZOS)
+        tmp_path = os.path.join(out_dir, f"{stem}-{size}.{os.getpid()}.tmp{ext}")
+        img.save(tmp_path, pil_format, quality=quality)
+        digest = file_sha256(tmp_path)
+        rel_path = f"{ASSET_DIR}/{stem}-{size}-{digest[:12]}{ext}"
+        os.replace(tmp_path, os.path.join(root_dir, rel_path))
+        variants.append({
+            "size": size,
+            "path": rel_path,
+            "width": img.width,
+            "height": img.height,
+            "bytes": os.path.getsize(os.path.join(root_dir, rel_path)),
+            "sha256": digest,
+        })
+
+    return {
+        "source_sha256": file_sha256(source_path),
+        "source_bytes": stat.st_size,
+        "source_mtime_ns": stat.st_mtime_ns,
+        "width": width,
+        "height": height,
+        "variants": sorted(variants, key=lambda v: v["size"]),
+    }
+
+
+def _is_current(root_dir: str, entry: dict, sizes, source_sha256: str) -> bool:
+    if entry is None or entry["source_sha256"] != source_sha256:
+        return False
+    expected = {size for size in sizes if size < max(entry["width"], entry["height"])}
+    if {v["size"] for v in entry["variants"]} != expected:
+        return False
+    return all(os.path.exists(os.path.join(root_dir, v["path"])) for v in entry["variants"])
+
+
+def build_assets(root_dir: str, image_names, sizes=DEFAULT_SIZES, fmt: str = DEFAULT_FORMAT,
+                 quality: int = DEFAULT_QUALITY, workers: int = DEFAULT_WORKERS) -> AssetSummary:
+    """
+    Build the size variants of `image_names` and write the manifest.
+
+    Images whose source hash, sizes and format match the existing manifest are not rebuilt.
+    Variant files no longer referenced by the manifest are removed.
+
+    Args:
+        root_dir (str): Directory containing `word_images`.
+        image_names: Names of the images in `word_images` to build.
+        sizes: Longest side in pixels of each variant.
+        fmt (str): "webp" or "jpeg".
+        quality (int): Encoder quality.
+        workers (int): Number of images to process in parallel.
+
+    Returns:
+        AssetSummary: Counts and the total size of the originals and of each variant size.
+    """
+    start = time.monotonic()
+    old_images = {}
+    previous = ImageManifest.load(root_dir)
+    if previous is not None and previous.format == fmt:
+        old_images = previous.images
+
+    def process(image_name):
+        source_path = os.path.join(root_dir, "word_images", image_name)
+        entry = old_images.get(image_name)
+        if _is_current(root_dir, entry, sizes, file_sha256(source_path)):
+            stat = os.stat(source_path)
+            return image_name, dict(entry, source_bytes=stat.st_size, source_mtime_ns=stat.st_mtime_ns), False
+        return image_name, build_variants(root_dir, image_name, sizes, fmt, quality), True
+
+    images = {}
+    built = reused = 0
+    failed = []
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        futures = [executor.submit(process, name) for name in image_names]
+        for name, future in zip(image_names, futures):
+            try:
+                image_name, entry, was_built = future.result()
+            except (OSError, ValueError) as e:
+                print(f"Failed to build variants of {name}: {e}")
+                failed.append(name)
+                continue
+            images[image_name] = entry
+            if was_built:
+                built += 1
+            else:
+                reused += 1
+
+    data = {"version": MANIFEST_VERSION, "format": fmt, "sizes": sorted(sizes), "images": images}
+    path = manifest_path(root_dir)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=1, sort_keys=True)
+    os.replace(tmp_path, path)
+
+    referenced = {os.path.basename(v["path"]) for entry in images.values() for v in entry["variants"]}
+    for name in os.listdir(os.path.join(root_dir, ASSET_DIR)):
+        if name != os.path.basename(path) and name not in referenced and ".tmp" not in name:
+            os.remove(os.path.join(root_dir, ASSET_DIR, name))
+
+    variant_bytes = {}
+    for entry in images.values():
+        for size in sizes:
+            match = next((v for v in entry["variants"] if v["size"] >= size), None)
+            variant_bytes[size] = variant_bytes.get(size, 0) + (match["bytes"] if match else entry["source_bytes"])
+    return AssetSummary(
+        built=built,
+        reused=reused,
+        failed=failed,
+        source_bytes=sum(entry["source_bytes"] for entry in images.values()),
+        variant_bytes=variant_bytes,
+        elapsed=time.monotonic() - start,
+    )
+
+
+def decode_seconds(paths) -> float:
+    """Return how long it takes to fully decode every image in `paths`."""
+    start = time.perf_counter()
+    for path in paths:
+        with Image.open(path) as img:
+            img.load()
+    return time.perf_counter() - start
+
+
+def decode_report(root_dir: str, image_names, sizes) -> list[str]:
+    """Compare decoding the originals with decoding the variant picked for each display size."""
+    quiz_logic = QuizLogic(root_dir=root_dir)
+    originals = [os.path.join(root_dir, "word_images", name) for name in image_names]
+    original_time = decode_seconds(originals)
+    lines = []
+    for size in sorted(sizes):
+        paths = [quiz_logic.image_variant_path(name, size) for name in image_names]
+        variant_time = decode_seconds(paths)
+        speedup = original_time / variant_time if variant_time else 0.0
+        lines.append(
+            f"  decode at {size:>4} px: {variant_time * 1000:.0f} ms vs {original_time * 1000:.0f} ms "
+            f"for the originals ({speedup:.1f}x faster)"
+        )
+    return lines
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--languages", nargs="+", default=["en", "el"], help="Decks whose images to build.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES),
+                        help="Longest side in pixels of each variant.")
+    parser.add_argument("--format", default=DEFAULT_FORMAT, choices=sorted(FORMATS), help="Variant image format.")
+    parser.add_argument("--quality", type=int, default=DEFAULT_QUALITY, help="Encoder quality.")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="Number of parallel workers.")
+    parser.add_argument("--no-report", action="store_true", help="Skip timing decodes of originals and variants.")
+
+
+def run(args) -> int:
+    image_names = image_names_for_decks(args.root_dir, args.languages)
+    summary = build_assets(args.root_dir, image_names, args.sizes, args.format, args.quality, args.workers)
+    print(summary.format())
+    if not args.no_report:
+        for line in decode_report(args.root_dir, [n for n in image_names if n not in summary.failed], args.sizes):
+            print(line)
+    return 1 if summary.failed else 0
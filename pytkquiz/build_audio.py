@@ -0,0 +1,201 @@
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import NamedTuple, Optional
+
+from quiz_logic import QuizLogic, word_col_index_for_language, words_path_for_language
+from audio_cache import AudioCache, add_shipped_feedback_clips, audio_cache_dir
+import single_flight
+from sound_gen import FEEDBACK_PHRASES, SYNTHESIZERS, TTS_BACKEND_ENV, default_backend, save_atomically
+
+DEFAULT_WORKERS = 4
+DEFAULT_RETRIES = 3
+DEFAULT_BACKOFF = 0.5
+
+
+class SoundJob(NamedTuple):
+    language: str
+    text: str
+    sound_path: str
+
+
+class BuildSummary(NamedTuple):
+    generated: int
+    skipped: int
+    failed: list
+    total_bytes: int
+    elapsed: float
+
+    def format(self) -> str:
+        rate = self.generated / self.elapsed if self.elapsed > 0 else 0.0
+        return (
+            f"Generated {self.generated} clips ({self.total_bytes / 1024:.1f} KiB), "
+            f"skipped {self.skipped} existing, {len(self.failed)} failed "
+            f"in {self.elapsed:.2f}s ({rate:.1f} clips/s)"
+        )
+
+
+def sound_jobs_for_csv(root_dir: str, csv_path: str, language: str, extension: str = None) -> list[SoundJob]:
+    """
+    Work out every word sound file the apps may ask for with the given word CSV.
+
+    This is one clip per word, at the path from `QuizLogic.sound_path_for_word`, with `extension`
+    if given, else that of the default backend. The answer feedback phrases live in the audio
+    cache, see `warm_feedback_phrases`.
+    """
+    quiz_logic = QuizLogic(root_dir=root_dir, language=language)
+    if extension is not None:
+        quiz_logic.sound_extension = extension
+    words = quiz_logic.load_word_data(csv_path, word_col_index_for_language(language))
+    return [SoundJob(language, word.word, quiz_logic.sound_path_for_word(word)) for word in words]
+
+
+def warm_feedback_phrases(audio_cache: AudioCache, languages) -> list:
+    """
+    Make sure the audio cache has the answer feedback phrases for each language.
+
+    Returns:
+        list: The (language, phrase) pairs that could not be synthesized.
+    """
+    failed = []
+    for language in languages:
+        for phrase in FEEDBACK_PHRASES:
+            try:
+                audio_cache.get(language, phrase)
+            except Exception as e:
+                print(f"Failed to generate {phrase!r} in {language}: {e}")
+                failed.append((language, phrase))
+    return failed
+
+
+def synthesize_atomically(synthesizer, job: SoundJob, retries: int, backoff: float) -> int:
+    """
+    Generate one clip, writing to a temporary file and renaming it into place.
+
+    If an app is generating the same clip at the time, this waits for it instead. Failed attempts
+    are retried with exponential backoff. Returns the size of the new file.
+    """
+    for attempt in range(retries + 1):
+        try:
+            single_flight.run_once(
+                os.path.abspath(job.sound_path),
+                lambda: os.path.exists(job.sound_path),
+                lambda: save_atomically(synthesizer, job.language, job.text, job.sound_path),
+            )
+            return os.path.getsize(job.sound_path)
+        except Exception:
+            if attempt == retries:
+                raise
+            time.sleep(backoff * 2 ** attempt)
+    return 0
+
+
+def build_audio(
+        jobs: list[SoundJob],
+        synthesizer,
+        workers: int = DEFAULT_WORKERS,
+        retries: int = DEFAULT_RETRIES,
+        backoff: float = DEFAULT_BACKOFF,
+) -> BuildSummary:
+    """
+    Generate the missing sound files for `jobs` using a bounded pool of worker threads.
+
+    Args:
+        jobs (list[SoundJob]): The clips that should exist.
+        synthesizer: Backend with a `save(language, text, sound_path)` method.
+        workers (int): Maximum number of clips generated at the same time.
+        retries (int): How many times to retry a failing clip.
+        backoff (float): Delay in seconds before the first retry, doubled for each further retry.
+
+    Returns:
+        BuildSummary: Counts, failures and timing for the run.
+    """
+    start = time.perf_counter()
+    unique_jobs = list({job.sound_path: job for job in jobs}.values())
+    missing = [job for job in unique_jobs if not os.path.exists(job.sound_path)]
+
+    generated = 0
+    total_bytes = 0
+    failed = []
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            executor.submit(synthesize_atomically, synthesizer, job, retries, backoff): job
+            for job in missing
+        }
+        for future in as_completed(futures):
+            job = futures[future]
+            try:
+                total_bytes += future.result()
+                generated += 1
+            except Exception as e:
+                print(f"Failed to generate {job.sound_path}: {e}")
+                failed.append(job)
+
+    return BuildSummary(
+        generated=generated,
+        skipped=len(unique_jobs) - len(missing),
+        failed=failed,
+        total_bytes=total_bytes,
+        elapsed=time.perf_counter() - start,
+    )
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--languages", nargs="+", default=["en", "el"], help="Languages to build audio for.")
+    parser.add_argument("--csv", help="Word CSV to read instead of the standard one (needs a single language).")
+    parser.add_argument("--backend", choices=sorted(SYNTHESIZERS),
+                        help="Text-to-speech backend. The apps use $PYTKQUIZ_TTS, gtts if unset, so it must match.")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="Number of parallel workers.")
+    parser.add_argument("--retries", type=int, default=DEFAULT_RETRIES, help="Retries per failing clip.")
+    parser.add_argument("--backoff", type=float, default=DEFAULT_BACKOFF, help="Initial retry delay in seconds.")
+
+
+def run(args) -> int:
+    if args.csv and len(args.languages) != 1:
+        print("--csv needs exactly one language")
+        return 2
+
+    try:
+        backend = default_backend()
+    except ValueError as e:
+        print(e)
+        return 2
+    if args.backend and args.backend != backend:
+        # The apps would look for clips in the other backend's format and synthesize them again.
+        print(f"--backend {args.backend} does not match the {backend} backend the apps use, "
+              f"set {TTS_BACKEND_ENV}={args.backend} for both")
+        return 2
+
+    synthesizer = SYNTHESIZERS[backend]()
+    jobs = []
+    for language in args.languages:
+        csv_path = args.csv or words_path_for_language(args.root_dir, language)
+        jobs.extend(sound_jobs_for_csv(args.root_dir, csv_path, language, synthesizer.extension))
+
+    summary = build_audio(jobs, synthesizer, args.workers, args.retries, args.backoff)
+    print(summary.format())
+    audio_cache = AudioCache(audio_cache_dir(args.root_dir), synthesizer)
+    add_shipped_feedback_clips(audio_cache, args.root_dir)
+    failed_phrases = warm_feedback_phrases(audio_cache, args.languages)
+    stats = audio_cache.stats()
+    print(f"Feedback phrases: {stats['misses']} generated, {stats['hits']} already cached, {len(failed_phrases)} failed")
+    return 1 if summary.failed or failed_phrases else 0
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="pytkquiz-build-audio", description="Generate all missing word sound files ahead of time."
+    )
+    parser.add_argument(
+        "--root-dir",
+        default=os.path.abspath(os.path.join(__file__, "..", "..")),
+        help="Directory containing the word CSV files.",
+    )
+    add_arguments(parser)
+    return run(parser.parse_args(argv))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,161 @@
+import argparse
+import os
+import sys
+import time
+from typing import Optional
+
+import audio_processing
+import build_assets
+import build_audio
+import quiz_batch
+import similarity_index
+import validate_deck
+from compiled_deck import compiled_deck_path
+from image_cache import ThumbnailCache
+from quiz_logic import N_CHOICES, QuizLogic, word_col_index_for_language, words_path_for_language
+
+LANGUAGES = ["en", "el"]
+DEFAULT_IMAGE_SIZE = 180
+
+
+def default_root_dir() -> str:
+    return os.path.abspath(os.path.join(__file__, "..", ".."))
+
+
+def load_words(root_dir: str, language: str):
+    """Load the word list for `language` from the standard CSV in `root_dir`."""
+    quiz_logic = QuizLogic(root_dir=root_dir, language=language)
+    return quiz_logic, quiz_logic.load_word_data(
+        words_path_for_language(root_dir, language),
+        word_col_index_for_language(language),
+    )
+
+
+def warm_thumbnails(args) -> int:
+    cache = ThumbnailCache(os.path.join(args.root_dir, "thumbnail_cache"), args.size)
+    image_paths = set()
+    for language in args.languages:
+        quiz_logic, words = load_words(args.root_dir, language)
+        # The same paths the apps read, so the prebuilt variants once `build-assets` has run.
+        image_paths.update(quiz_logic.image_path_for_word(word, size=args.size) for word in words)
+
+    if args.workers == 1:
+        generated = cached = failed = 0
+        for path in sorted(image_paths):
+            try:
+                new, old = cache.warm([path])
+            except (OSError, ValueError) as e:
+                print(f"Failed to make a thumbnail of {os.path.basename(path)}: {e}")
+                failed += 1
+                continue
+            generated += new
+            cached += old
+    else:
+        # Thumbnails are generated while checking the images, in parallel processes.
+        jobs = [
+            validate_deck.ImageJob(os.path.basename(path), path, sys.maxsize, sys.maxsize, cache.cache_dir, args.size)
+            for path in sorted(image_paths)
+        ]
+        summary = validate_deck.validate_images(jobs, args.workers)
+        for report in summary.failed:
+            print(f"Failed to make a thumbnail of {report.image}: {report.detail}")
+        generated = sum(report.thumbnail_generated for report in summary.reports)
+        failed = len(summary.failed)
+        cached = len(jobs) - generated - failed
+    # Thumbnails of edited or removed images would otherwise stay on disk forever. The paths are the
+    # ones the apps read, so every thumbnail they use is kept.
+    removed = cache.prune(image_paths)
+    print(f"Thumbnails: {generated} generated, {cached} already cached, {failed} failed, "
+          f"{removed} stale removed in {cache.cache_dir}")
+    return 1 if failed else 0
+
+
+def compile_decks(args) -> int:
+    for language in args.languages:
+        csv_path = words_path_for_language(args.root_dir, language)
+        out_path = compiled_deck_path(csv_path)
+        quiz_logic = QuizLogic(root_dir=args.root_dir, language=language)
+        count = quiz_logic.compile_deck(csv_path, word_col_index_for_language(language), out_path)
+        print(f"Compiled {count} words from {csv_path} to {out_path}")
+    return 0
+
+
+def generate_quiz(args) -> int:
+    quiz_logic, words = load_words(args.root_dir, args.language)
+    start = time.perf_counter()
+    batch = quiz_logic.generate_batch(args.count, args.seed, args.choices)
+    generated = time.perf_counter() - start
+    write = quiz_batch.WRITERS[args.format]
+    if args.output:
+        with open(args.output, "w", newline="", encoding="utf-8") as f:
+            write(quiz_logic.deck, batch, f)
+    else:
+        write(quiz_logic.deck, batch, sys.stdout)
+    rate = len(batch) / generated if generated > 0 else 0.0
+    print(
+        f"Generated {len(batch)} questions from {len(words)} words in {generated:.3f}s ({rate:,.0f} questions/s)",
+        file=sys.stderr,
+    )
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="pytkquiz", description="PyTkQuiz maintenance commands.")
+    parser.add_argument("--root-dir", default=default_root_dir(), help="Directory containing the word CSV files.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    warm = subparsers.add_parser("warm-thumbnails", help="Pre-generate the thumbnail cache for all word images.")
+    warm.add_argument("--size", type=int, default=DEFAULT_IMAGE_SIZE, help="Thumbnail size in pixels.")
+    warm.add_argument("--languages", nargs="+", default=LANGUAGES, choices=LANGUAGES)
+    warm.add_argument("--workers", type=int, default=None, help="Number of processes, all cores by default.")
+    warm.set_defaults(func=warm_thumbnails)
+
+    compile_deck = subparsers.add_parser("compile-deck", help="Compile the word CSVs into binary deck files.")
+    compile_deck.add_argument("--languages", nargs="+", default=LANGUAGES, choices=LANGUAGES)
+    compile_deck.set_defaults(func=compile_decks)
+
+    audio = subparsers.add_parser("build-audio", help="Generate all missing word sound files ahead of time.")
+    build_audio.add_arguments(audio)
+    audio.set_defaults(func=build_audio.run)
+
+    process_audio = subparsers.add_parser(
+        "process-audio", help="Trim silence off the word sounds, normalize their loudness and shrink them."
+    )
+    audio_processing.add_arguments(process_audio)
+    process_audio.set_defaults(func=audio_processing.run)
+
+    validate = subparsers.add_parser(
+        "validate-deck", help="Check in parallel that every deck image decodes and is not oversized."
+    )
+    validate_deck.add_arguments(validate)
+    validate.set_defaults(func=validate_deck.run)
+
+    assets = subparsers.add_parser("build-assets", help="Build smaller image variants for each display size.")
+    build_assets.add_arguments(assets)
+    assets.set_defaults(func=build_assets.run)
+
+    similarity = subparsers.add_parser(
+        "build-similarity", help="Index the word images so hard mode can offer similar-looking choices."
+    )
+    similarity_index.add_arguments(similarity)
+    similarity.set_defaults(func=similarity_index.run)
+
+    quiz = subparsers.add_parser("generate-quiz", help="Export a set of random questions as JSON lines or CSV.")
+    quiz.add_argument("--language", default="en", choices=LANGUAGES)
+    quiz.add_argument("--count", type=int, default=100, help="Number of questions.")
+    quiz.add_argument("--seed", type=int, default=None, help="Seed for a reproducible set.")
+    quiz.add_argument("--choices", type=int, default=N_CHOICES, help="Options per question.")
+    quiz.add_argument("--format", default="jsonl", choices=sorted(quiz_batch.WRITERS))
+    quiz.add_argument("--output", help="File to write, standard output by default.")
+    quiz.set_defaults(func=generate_quiz)
+
+    return parser
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
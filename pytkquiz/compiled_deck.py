@@ -0,0 +1,176 @@
+import mmap
+import os
+import struct
+import sys
+from array import array
+
+from deck import Deck
+
+MAGIC = b"PTKQDECK"
+VERSION = 1
+# magic, version, column count, row count, source CSV mtime and size, word_images mtime, language
+HEADER = struct.Struct("<8sHHIqqq8s")
+COLUMNS = ("words", "images", "sounds", "definitions", "filenames", "image_paths", "sound_paths")
+
+
+def compiled_deck_path(csv_path: str) -> str:
+    """Return where the compiled version of a word CSV is stored, e.g. words.csv -> words.deck."""
+    return os.path.splitext(csv_path)[0] + ".deck"
+
+
+def _source_stamp(csv_path: str, image_dir: str):
+    csv_stat = os.stat(csv_path)
+    try:
+        image_dir_mtime = os.stat(image_dir).st_mtime_ns
+    except FileNotFoundError:
+        image_dir_mtime = 0
+    return csv_stat.st_mtime_ns, csv_stat.st_size, image_dir_mtime
+
+
+def write_compiled_deck(out_path: str, rows, csv_path: str, image_dir: str, language: str) -> int:
+    """
+    Write a compiled deck file.
+
+    The file holds a fixed header, a table of string offsets and one UTF-8 string table with
+    every column of every row, including the image and sound paths relative to the root
+    directory, so it can be opened without parsing anything per row.
+
+    Args:
+        out_path (str): The file to write.
+        rows: Tuples with one value per entry of `COLUMNS`.
+        csv_path (str): The source CSV, recorded so stale files can be detected.
+        image_dir (str): The image directory the rows were validated against.
+        language (str): Language code of the deck.
+
+    Returns:
+        int: The number of rows written.
+    """
+    offsets = array("I", [0])
+    strings = bytearray()
+    row_count = 0
+    for row in rows:
+        for value in row:
+            strings += value.encode("utf-8")
+            offsets.append(len(strings))
+        row_count += 1
+    if sys.byteorder != "little":
+        offsets.byteswap()
+
+    csv_mtime, csv_size, image_dir_mtime = _source_stamp(csv_path, image_dir)
+    header = HEADER.pack(
+        MAGIC, VERSION, len(COLUMNS), row_count, csv_mtime, csv_size, image_dir_mtime, language.encode("ascii")
+    )
+    tmp_path = f"{out_path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(header)
+        f.write(offsets.tobytes())
+        f.write(strings)
+    os.replace(tmp_path, out_path)
+    return row_count
+
+
+class StringColumn:
+    """A read-only view of one column of a compiled deck, decoding strings on access."""
+
+    __slots__ = ("_deck", "_column")
+
+    def __init__(self, deck: "CompiledDeck", column: int) -> None:
+        self._deck = deck
+        self._column = column
+
+    def __len__(self) -> int:
+        return self._deck.row_count
+
+    def __getitem__(self, row: int) -> str:
+        if row < 0:
+            row += self._deck.row_count
+        if not 0 <= row < self._deck.row_count:
+            raise IndexError("deck index out of range")
+        return self._deck.string_at(row * self._deck.column_count + self._column)
+
+    def __iter__(self):
+        for row in range(self._deck.row_count):
+            yield self[row]
+
+
+class CompiledDeck(Deck):
+    """
+    A `Deck` backed by a memory-mapped compiled deck file.
+
+    Strings are decoded from the mapping when they are read, so opening the file costs the same
+    for any deck size. Compiled decks are read-only.
+    """
+
+    __slots__ = ("path", "language", "row_count", "column_count", "source_stamp", "image_paths", "sound_paths",
+                 "_file", "_mmap", "_offsets", "_strings_start")
+
+    def __init__(self, path: str) -> None:
+        super().__init__()
+        self.path = path
+        self._file = open(path, "rb")
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, column_count, row_count, csv_mtime, csv_size, image_dir_mtime, language = (
+            HEADER.unpack_from(self._mmap, 0)
+        )
+        if magic != MAGIC or version != VERSION or column_count != len(COLUMNS):
+            self.close()
+            raise ValueError(f"{path} is not a version {VERSION} compiled deck")
+
+        self.language = language.rstrip(b"\0").decode("ascii")
+        self.row_count = row_count
+        self.column_count = column_count
+        self.source_stamp = (csv_mtime, csv_size, image_dir_mtime)
+        offsets_size = (row_count * column_count + 1) * 4
+        self._offsets = memoryview(self._mmap)[HEADER.size:HEADER.size + offsets_size].cast("I")
+        if sys.byteorder != "little":
+            offsets = array("I", self._offsets)
+            offsets.byteswap()
+            self._offsets.release()
+            self._offsets = memoryview(offsets)
+        self._strings_start = HEADER.size + offsets_size
+        (self.words, self.images, self.sounds, self.definitions, self.filenames, self.image_paths,
+         self.sound_paths) = [StringColumn(self, i) for i in range(column_count)]
+
+    def string_at(self, index: int) -> str:
+        start = self._strings_start + self._offsets[index]
+        end = self._strings_start + self._offsets[index + 1]
+        return self._mmap[start:end].decode("utf-8")
+
+    def is_fresh(self, csv_path: str, image_dir: str) -> bool:
+        """Return True if the deck was compiled from the current versions of the CSV and images."""
+        try:
+            return self.source_stamp == _source_stamp(csv_path, image_dir)
+        except FileNotFoundError:
+            return False
+
+    def append(self, entry) -> int:
+        raise TypeError("compiled decks are read-only")
+
+    def close(self) -> None:
+        if getattr(self, "_offsets", None) is not None:
+            self._offsets.release()
+            self._offsets = None
+        self._mmap.close()
+        self._file.close()
+
+
+def open_compiled_deck(csv_path: str, image_dir: str, language: str):
+    """
+    Open the compiled version of `csv_path` if it exists and is up to date.
+
+    Returns:
+        CompiledDeck or None: None if there is no usable compiled deck and the CSV should be parsed.
+    """
+    path = compiled_deck_path(csv_path)
+    if not os.path.exists(path):
+        return None
+    try:
+        deck = CompiledDeck(path)
+    except (ValueError, struct.error, OSError) as e:
+        print(f"Ignoring compiled deck {path}: {e}")
+        return None
+    if deck.language != language or not deck.is_fresh(csv_path, image_dir):
+        print(f"Ignoring stale compiled deck {path}")
+        deck.close()
+        return None
+    return deck
@@ -0,0 +1,145 @@
+import hashlib
+import sys
+import threading
+from collections import namedtuple
+from collections.abc import Sequence
+
+WordData = namedtuple("WordData", ["word", "image", "sound", "definition", "filename"])
+
+
+class Deck(Sequence):
+    """
+    A column-oriented word list addressed by integer word IDs.
+
+    Each field of `WordData` is stored in its own list, with the often repeated image and sound
+    names interned, instead of one namedtuple per word. `WordData` records are only built when an
+    entry is read by index, so large decks stay compact and questions can be handled as plain IDs.
+
+    Lookup indexes by word, filename and image are built on first use. A deck shared between
+    sessions should be treated as read-only.
+    """
+
+    __slots__ = ("words", "images", "sounds", "definitions", "filenames", "_word_index", "_filename_index",
+                 "_image_index", "_fingerprint", "_lock")
+
+    def __init__(self) -> None:
+        self.words = []
+        self.images = []
+        self.sounds = []
+        self.definitions = []
+        self.filenames = []
+        self._word_index = None
+        self._filename_index = None
+        self._image_index = None
+        self._fingerprint = None
+        self._lock = threading.Lock()
+
+    # Precomputed image and sound paths relative to the root directory, if the deck has them.
+    image_paths = None
+    sound_paths = None
+
+    @classmethod
+    def from_word_data(cls, word_data) -> "Deck":
+        deck = cls()
+        for entry in word_data:
+            deck.append(entry)
+        return deck
+
+    def append(self, entry: WordData) -> int:
+        """
+        Add a word and return its ID.
+
+        The deck may be read while another thread appends to it, e.g. during a background load.
+        The `words` column is extended last because it defines the length of the deck.
+        """
+        with self._lock:
+            word_id = len(self.words)
+            self.images.append(sys.intern(entry.image))
+            self.sounds.append(sys.intern(entry.sound))
+            self.definitions.append(entry.definition)
+            self.filenames.append(entry.filename)
+            self.words.append(entry.word)
+            if self._word_index is not None:
+                self._word_index.setdefault(entry.word, word_id)
+            if self._filename_index is not None:
+                self._filename_index.setdefault(entry.filename, word_id)
+            if self._image_index is not None:
+                self._image_index.setdefault(entry.image, []).append(word_id)
+            self._fingerprint = None
+        return word_id
+
+    def __len__(self) -> int:
+        return len(self.words)
+
+    def __getitem__(self, word_id):
+        if isinstance(word_id, slice):
+            return [self[i] for i in range(*word_id.indices(len(self)))]
+        return WordData(
+            word=self.words[word_id],
+            image=self.images[word_id],
+            sound=self.sounds[word_id],
+            definition=self.definitions[word_id],
+            filename=self.filenames[word_id],
+        )
+
+    def id_for_word(self, word: str):
+        """Return the ID of the first entry with this word, or None."""
+        if self._word_index is None:
+            with self._lock:
+                if self._word_index is None:
+                    self._word_index = self._build_index(self.words)
+        return self._word_index.get(word)
+
+    def id_for_filename(self, filename: str):
+        """Return the ID of the first entry with this filename, or None."""
+        if self._filename_index is None:
+            with self._lock:
+                if self._filename_index is None:
+                    self._filename_index = self._build_index(self.filenames)
+        return self._filename_index.get(filename)
+
+    def ids_for_image(self, image: str) -> list:
+        """Return the IDs of all entries that use this image."""
+        if self._image_index is None:
+            with self._lock:
+                if self._image_index is None:
+                    index = {}
+                    for word_id, name in enumerate(self.images):
+                        index.setdefault(name, []).append(word_id)
+                    self._image_index = index
+        return self._image_index.get(image, [])
+
+    def fingerprint(self) -> bytes:
+        """
+        Return 8 bytes identifying the words and images of this deck, in order.
+
+        Decks with the same content have the same fingerprint in every process, so a word ID
+        handed out by one process can be checked against the deck of another.
+        """
+        fingerprint = self._fingerprint
+        if fingerprint is None:
+            digest = hashlib.sha256()
+            for column in (self.words, self.images):
+                for value in column:
+                    digest.update(value.encode("utf-8"))
+                    digest.update(b"\0")
+                digest.update(b"\1")
+            fingerprint = self._fingerprint = digest.digest()[:8]
+        return fingerprint
+
+    def id_of(self, entry: WordData):
+        """Return the ID of an entry equal to `entry`, or None if it is not in the deck."""
+        word_id = self.id_for_filename(entry.filename)
+        if word_id is not None and self[word_id] == entry:
+            return word_id
+        for word_id in self.ids_for_image(entry.image):
+            if self[word_id] == entry:
+                return word_id
+        return None
+
+    @staticmethod
+    def _build_index(column) -> dict:
+        index = {}
+        for word_id, value in enumerate(column):
+            index.setdefault(value, word_id)
+        return index
@@ -0,0 +1,63 @@
+import os
+import threading
+
+from deck import Deck
+from quiz_logic import QuizLogic, word_col_index_for_language, words_path_for_language
+from single_flight import KeyedLock
+
+_decks = {}
+_lock = threading.Lock()
+# Held while a deck loads, so decks of different languages can load at the same time.
+_loading = KeyedLock()
+
+
+def get_deck(root_dir: str, language: str) -> Deck:
+    """
+    Return the parsed word list for `language`, shared by every caller in this process.
+
+    The deck is loaded once and cached, read-only, keyed by (csv path, mtime, language),
+    so editing the CSV is picked up on the next call while unchanged decks are never re-parsed.
+    Concurrent callers for the same deck wait for a single load instead of parsing it twice,
+    while different decks load in parallel.
+
+    Args:
+        root_dir (str): Directory containing the word CSV files and `word_images`.
+        language (str): Language code, e.g. "en" or "el".
+
+    Returns:
+        Deck: The words with an existing image.
+    """
+    path = words_path_for_language(root_dir, language)
+    key = (path, os.stat(path).st_mtime_ns, language)
+    deck = _decks.get(key)
+    if deck is not None:
+        return deck
+
+    with _loading.hold(f"{path}|{language}"):
+        deck = _decks.get(key)
+        if deck is None:
+            quiz_logic = QuizLogic(root_dir=root_dir, language=language)
+            deck = quiz_logic.load_deck(path, word_col_index_for_language(language))
+            _store(key, deck)
+    return deck
+
+
+def put(root_dir: str, language: str, deck: Deck) -> None:
+    """Share a deck that was parsed elsewhere, e.g. streamed by the Tk app, as the current deck of `language`."""
+    path = words_path_for_language(root_dir, language)
+    _store((path, os.stat(path).st_mtime_ns, language), deck)
+
+
+def _store(key, deck: Deck) -> None:
+    path, _, language = key
+    with _lock:
+        # Drop older versions of the same deck so edits do not accumulate.
+        for old_key in [k for k in _decks if k[0] == path and k[2] == language]:
+            del _decks[old_key]
+        _decks[key] = deck
+
+
+def clear() -> None:
+    """Forget all cached decks."""
+    with _lock:
+        _decks.clear()
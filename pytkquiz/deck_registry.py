@@ -0,0 +1,90 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+import deck_cache
+from deck import Deck
+
+LANGUAGES = ("en", "el")
+
+
+class DeckRegistry:
+    """
+    The decks of several languages, loaded together so that switching language needs no file I/O.
+
+    All decks are loaded up front through `deck_cache`, concurrently, and kept by language, so
+    switching is a dictionary lookup. The decks of different languages name the same files in their
+    `Image` column. `images` lists each of them once, so resources derived from an image, such as
+    thumbnails, are prepared once for all languages instead of once per deck.
+    """
+
+    def __init__(self, root_dir: str, languages=LANGUAGES) -> None:
+        self.root_dir = root_dir
+        self.languages = tuple(languages)
+        self.decks = {}
+        # Why each language that failed to load did so.
+        self.errors = {}
+        self._lock = threading.Lock()
+
+    def load(self, workers: Optional[int] = None) -> "DeckRegistry":
+        """
+        Load the deck of every language, or reload those whose CSV changed since the last call.
+
+        Args:
+            workers (Optional[int]): Number of decks to load at the same time, all of them if None.
+                With 1 they are loaded one after the other on this thread.
+
+        Returns:
+            DeckRegistry: This registry.
+        """
+        workers = workers or len(self.languages)
+        if workers == 1:
+            results = {language: self._load_one(language) for language in self.languages}
+        else:
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="load-deck") as executor:
+                futures = {language: executor.submit(self._load_one, language) for language in self.languages}
+            results = {language: future.result() for language, future in futures.items()}
+        with self._lock:
+            # Replaced as a whole, so readers see either the old or the new set of decks.
+            self.decks = {language: result for language, result in results.items() if isinstance(result, Deck)}
+            self.errors = {language: result for language, result in results.items() if not isinstance(result, Deck)}
+        return self
+
+    def _load_one(self, language: str):
+        try:
+            return deck_cache.get_deck(self.root_dir, language)
+        except (OSError, ValueError) as e:
+            return e
+
+    def deck(self, language: str) -> Deck:
+        """Return the loaded deck for `language`, raising KeyError if it failed to load."""
+        return self.decks[language]
+
+    @property
+    def images(self) -> list[str]:
+        """Every distinct `Image` used by the loaded decks, in order of first use."""
+        return list(dict.fromkeys(image for deck in self.decks.values() for image in deck.images))
+
+    def image_paths(self) -> list[str]:
+        return [os.path.join(self.root_dir, "word_images", image) for image in self.images]
+
+
+_registries = {}
+_registries_lock = threading.Lock()
+
+
+def shared_registry(root_dir: str, languages=LANGUAGES) -> DeckRegistry:
+    """
+    Return the process-wide registry for `root_dir`, with every deck loaded.
+
+    The first call loads all decks concurrently. Later calls only check that the CSVs did not
+    change, which `deck_cache` does with one `stat` per language.
+    """
+    key = (root_dir, tuple(languages))
+    with _registries_lock:
+        registry = _registries.get(key)
+        if registry is None:
+            registry = _registries[key] = DeckRegistry(root_dir, languages).load()
+            return registry
+    return registry.load(workers=1)
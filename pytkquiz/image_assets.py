@@ -0,0 +1,102 @@
+import bisect
+import json
+import os
+import threading
+from typing import Optional
+
+ASSET_DIR = "image_assets"
+MANIFEST_NAME = "manifest.json"
+MANIFEST_VERSION = 1
+
+
+def manifest_path(root_dir: str) -> str:
+    return os.path.join(root_dir, ASSET_DIR, MANIFEST_NAME)
+
+
+class ImageManifest:
+    """
+    The resized image variants written by `build-assets`, looked up by source image name.
+
+    Every image in the manifest has variants at a few sizes, where the size of a variant is its
+    longest side in pixels. Entries record the size and modification time of the source image,
+    so an image edited after the build falls back to the original until the assets are rebuilt.
+    The source is checked on every lookup, and the parsed variants are kept per source version.
+    """
+
+    def __init__(self, root_dir: str, data: dict) -> None:
+        self.root_dir = root_dir
+        self.format = data.get("format")
+        self.images = data.get("images", {})
+        self._variants = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, root_dir: str) -> Optional["ImageManifest"]:
+        """Read the manifest in `root_dir`, or return None if there is no usable one."""
+        try:
+            with open(manifest_path(root_dir), encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            print(f"Ignoring image manifest {manifest_path(root_dir)}: {e}")
+            return None
+        if data.get("version") != MANIFEST_VERSION:
+            print(f"Ignoring image manifest {manifest_path(root_dir)}: unsupported version {data.get('version')}")
+            return None
+        return cls(root_dir, data)
+
+    def _fresh_variants(self, image_name: str):
+        entry = self.images.get(image_name)
+        if entry is None:
+            return ()
+        try:
+            stat = os.stat(os.path.join(self.root_dir, "word_images", image_name))
+        except FileNotFoundError:
+            return ()
+        version = (stat.st_size, stat.st_mtime_ns)
+        with self._lock:
+            cached = self._variants.get(image_name)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+
+        variants = ()
+        if version == (entry["source_bytes"], entry["source_mtime_ns"]):
+            variants = tuple(sorted((v["size"], v["path"]) for v in entry["variants"]))
+        with self._lock:
+            self._variants[image_name] = (version, variants)
+        return variants
+
+    def variant_for(self, image_name: str, size: int) -> Optional[str]:
+        """
+        Return the smallest variant of `image_name` that is at least `size` pixels.
+
+        Returns:
+            Optional[str]: The variant path relative to the root directory, or None if there is no
+                variant that large or the source image changed since the build.
+        """
+        variants = self._fresh_variants(image_name)
+        i = bisect.bisect_left(variants, (size, ""))
+        if i == len(variants):
+            return None
+        return variants[i][1]
+
+
+_manifests = {}
+_manifests_lock = threading.Lock()
+
+
+def load_manifest(root_dir: str) -> Optional[ImageManifest]:
+    """Return the shared `ImageManifest` for `root_dir`, reloading it when the file changes."""
+    try:
+        mtime = os.stat(manifest_path(root_dir)).st_mtime_ns
+    except FileNotFoundError:
+        return None
+    with _manifests_lock:
+        cached = _manifests.get(root_dir)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+    manifest = ImageManifest.load(root_dir)
+    with _manifests_lock:
+        _manifests[root_dir] = (mtime, manifest)
+    return manifest
@@ -0,0 +1,195 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from typing import TYPE_CHECKING
+
+import instrumentation
+
+if TYPE_CHECKING:
+    from PIL import Image
+
+THUMBNAIL_FORMAT = "JPEG"
+THUMBNAIL_QUALITY = 90
+
+
+class LRUCache:
+    """
+    A small thread-safe least-recently-used cache.
+
+    Used to keep decoded images (PIL images or Tk PhotoImages) in memory so that showing
+    the same word twice does not touch the disk again.
+    """
+
+    def __init__(self, max_items: int = 128) -> None:
+        self.max_items = max_items
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key not in self._items:
+                return default
+            self._items.move_to_end(key)
+            return self._items[key]
+
+    def put(self, key, value) -> None:
+        with self._lock:
+            self._items[key] = value
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_items:
+                self._items.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+
+    def __contains__(self, key) -> bool:
+        with self._lock:
+            return key in self._items
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._items)
+
+
+class ThumbnailCache:
+    """
+    Caches resized copies of the word images, both on disk and in memory.
+
+    Thumbnails are stored in `cache_dir` under a name derived from the source path, its
+    modification time and the target size, so editing an image or changing the display size
+    produces a new thumbnail instead of serving a stale one. Decoded thumbnails are also
+    kept in an in-process LRU, keyed by the same path, time and size, so repeated lookups do no
+    decoding at all. `prune` removes thumbnails whose source changed or is gone.
+    """
+
+    def __init__(self, cache_dir: str, size: int, memory_items: int = 128) -> None:
+        self.cache_dir = cache_dir
+        self.size = size
+        self.memory = LRUCache(memory_items)
+
+    def _key(self, source_path: str):
+        """Return (absolute source path, its modification time, thumbnail size), the key of every cached copy."""
+        source_path = os.path.abspath(source_path)
+        return source_path, os.stat(source_path).st_mtime_ns, self.size
+
+    @staticmethod
+    def _thumbnail_name(path: str, mtime_ns: int, size: int) -> str:
+        digest = hashlib.sha1(f"{path}|{mtime_ns}|{size}".encode("utf-8")).hexdigest()
+        stem = os.path.splitext(os.path.basename(path))[0]
+        return f"{stem}-{size}-{digest[:16]}.jpg"
+
+    def cache_path(self, source_path: str) -> str:
+        """Return the on-disk thumbnail path for the given source image."""
+        return os.path.join(self.cache_dir, self._thumbnail_name(*self._key(source_path)))
+
+    def get(self, source_path: str) -> "Image.Image":
+        """
+        Return the thumbnail for `source_path`, generating it if needed.
+
+        Args:
+            source_path (str): Path of the full size image.
+
+        Returns:
+            Image.Image: The image resized to `size` x `size`.
+        """
+        with instrumentation.span("image_load"):
+            key = self._key(source_path)
+            img = self.memory.get(key)
+            if img is not None:
+                instrumentation.count("thumbnail_memory_hit")
+                return img
+
+            thumb_path = self.cache_path(source_path)
+            if os.path.exists(thumb_path):
+                instrumentation.count("thumbnail_disk_hit")
+                from PIL import Image
+
+                img = Image.open(thumb_path)
+                img.load()
+            else:
+                instrumentation.count("thumbnail_generated")
+                img = self.generate(source_path, thumb_path)
+            self.memory.put(key, img)
+            return img
+
+    def generate(self, source_path: str, thumb_path: str) -> "Image.Image":
+        """
+        Resize the image at `source_path` and write it to `thumb_path`, usually `cache_path(source_path)`.
+
+        Callers that already opened the image, like `validate_deck`, use this to skip the existence
+        check of `get`. The file is written atomically, so concurrent writers are harmless.
+        """
+        # PIL is imported on first use, so importing this module does not slow down app startup.
+        from PIL import Image
+
+        img = Image.open(source_path)
+        # Let the JPEG decoder scale down while decoding instead of decoding at full size.
+        img.draft("RGB", (self.size, self.size))
+        img = img.convert("RGB").resize((self.size, self.size))
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_path = f"{thumb_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        img.save(tmp_path, THUMBNAIL_FORMAT, quality=THUMBNAIL_QUALITY)
+        os.replace(tmp_path, thumb_path)
+        return img
+
+    def is_cached(self, source_path: str) -> bool:
+        """Return True if a thumbnail for `source_path` is already on disk."""
+        return os.path.exists(self.cache_path(source_path))
+
+    def warm(self, source_paths) -> tuple[int, int]:
+        """
+        Make sure every path in `source_paths` has a thumbnail on disk.
+
+        Returns:
+            tuple[int, int]: The number of thumbnails generated and the number already cached.
+        """
+        generated = 0
+        cached = 0
+        for source_path in source_paths:
+            thumb_path = self.cache_path(source_path)
+            if os.path.exists(thumb_path):
+                cached += 1
+            else:
+                self.generate(source_path, thumb_path)
+                generated += 1
+        return generated, cached
+
+    def prune(self, source_paths) -> int:
+        """
+        Remove the thumbnails on disk that were not made from the current version of a path in `source_paths`.
+
+        This drops thumbnails of images that were edited or removed. Thumbnails of every size are
+        kept as long as their source is current, and files not named like thumbnails are left alone.
+
+        Returns:
+            int: The number of thumbnails removed.
+        """
+        stamps = []
+        for source_path in source_paths:
+            try:
+                stamps.append(self._key(source_path)[:2])
+            except FileNotFoundError:
+                pass
+        try:
+            names = os.listdir(self.cache_dir)
+        except FileNotFoundError:
+            return 0
+        current = {}
+        removed = 0
+        for name in names:
+            parts = name[:-len(".jpg")].rsplit("-", 2) if name.endswith(".jpg") else []
+            if len(parts) != 3 or not parts[1].isdigit():
+                continue
+            size = int(parts[1])
+            if size not in current:
+                current[size] = {self._thumbnail_name(path, mtime_ns, size) for path, mtime_ns in stamps}
+            if name not in current[size]:
+                try:
+                    os.remove(os.path.join(self.cache_dir, name))
+                    removed += 1
+                except FileNotFoundError:
+                    pass
+        return removed
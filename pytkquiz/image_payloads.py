@@ -0,0 +1,141 @@
+import hashlib
+import io
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import NamedTuple
+
+import instrumentation
+from instrumentation import percentile
+from single_flight import KeyedLock
+
+DEFAULT_MAX_BYTES = 32 * 1024 * 1024
+PAYLOAD_FORMAT = "JPEG"
+PAYLOAD_QUALITY = 85
+LATENCY_WINDOW = 256
+
+
+class ImagePayload(NamedTuple):
+    # JPEG bytes, at most `size` pixels on the longest side.
+    data: bytes
+    # SHA-256 of `data`, so equal images share one copy and can be told apart cheaply.
+    digest: str
+    width: int
+    height: int
+
+
+class ImagePayloads:
+    """
+    Word images encoded once as JPEG bytes at display size, shared by every Streamlit session.
+
+    Passing a PIL image to `st.image` makes Streamlit encode it again on every rerun. JPEG bytes
+    that are no wider than the page are used as they are, so a rerun only looks the payload up.
+    Payloads are cached by source path and modification time and stored by content hash, holding at
+    most `max_bytes` with the least recently used evicted first. Sessions asking for the same
+    missing image at once wait for a single encode.
+    """
+
+    def __init__(self, size: int, max_bytes: int = DEFAULT_MAX_BYTES) -> None:
+        self.size = size
+        self.max_bytes = max_bytes
+        self.cached_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.encode_seconds = deque(maxlen=LATENCY_WINDOW)
+        self._keys = {}
+        self._payloads = OrderedDict()
+        self._lock = threading.Lock()
+        self._encoding = KeyedLock()
+
+    def _lookup(self, key):
+        with self._lock:
+            digest = self._keys.get(key)
+            payload = None if digest is None else self._payloads.get(digest)
+            if payload is not None:
+                self._payloads.move_to_end(digest)
+            return payload
+
+    def get(self, image_path: str) -> ImagePayload:
+        """Return the payload for `image_path`, encoding it if this process has not yet."""
+        key = (image_path, os.stat(image_path).st_mtime_ns)
+        payload = self._lookup(key)
+        if payload is not None:
+            with self._lock:
+                self.hits += 1
+            instrumentation.count("image_payload_hit")
+            return payload
+
+        with self._encoding.hold(image_path):
+            payload = self._lookup(key)
+            if payload is None:
+                start = time.perf_counter()
+                with instrumentation.span("image_encode"):
+                    payload = self.encode(image_path)
+                with self._lock:
+                    self.misses += 1
+                    self.encode_seconds.append(time.perf_counter() - start)
+                self._store(key, payload)
+                instrumentation.count("image_payload_miss")
+        return payload
+
+    def encode(self, image_path: str) -> ImagePayload:
+        """
+        Read `image_path` as a JPEG payload of at most `size` pixels.
+
+        A JPEG that is already small enough is used byte for byte, anything else is decoded, scaled
+        down keeping its aspect ratio and encoded once.
+        """
+        from PIL import Image
+
+        with open(image_path, "rb") as f:
+            data = f.read()
+        with Image.open(io.BytesIO(data)) as img:
+            if img.format != PAYLOAD_FORMAT or max(img.size) > self.size or img.mode not in ("RGB", "L"):
+                img.draft("RGB", (self.size, self.size))
+                img = img.convert("RGB")
+                img.thumbnail((self.size, self.size))
+                out = io.BytesIO()
+                img.save(out, PAYLOAD_FORMAT, quality=PAYLOAD_QUALITY, optimize=True)
+                data = out.getvalue()
+            width, height = img.size
+        return ImagePayload(data, hashlib.sha256(data).hexdigest(), width, height)
+
+    def _store(self, key, payload: ImagePayload) -> None:
+        if len(payload.data) > self.max_bytes:
+            return
+        with self._lock:
+            self._keys[key] = payload.digest
+            if payload.digest not in self._payloads:
+                self._payloads[payload.digest] = payload
+                self.cached_bytes += len(payload.data)
+            while self.cached_bytes > self.max_bytes:
+                _, evicted = self._payloads.popitem(last=False)
+                self.cached_bytes -= len(evicted.data)
+            if len(self._keys) > 2 * len(self._payloads) + 64:
+                # Forget keys of evicted payloads and of older versions of edited images.
+                self._keys = {k: d for k, d in self._keys.items() if d in self._payloads}
+
+    def stats(self) -> dict:
+        with self._lock:
+            latencies = sorted(self.encode_seconds)
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "cached_payloads": len(self._payloads),
+                "cached_bytes": self.cached_bytes,
+                "encode_p50_ms": percentile(latencies, 0.50) * 1000,
+            }
+
+
+_shared = {}
+_shared_lock = threading.Lock()
+
+
+def shared_payloads(size: int) -> ImagePayloads:
+    """Return the process-wide `ImagePayloads` for images shown at `size` pixels."""
+    with _shared_lock:
+        payloads = _shared.get(size)
+        if payloads is None:
+            payloads = _shared[size] = ImagePayloads(size)
+        return payloads
@@ -0,0 +1,239 @@
+import atexit
+import json
+import os
+import threading
+import time
+from collections import deque
+from typing import Optional
+
+# Set to "1" to collect timings in memory, or to a file path to also log them as JSON lines.
+METRICS_ENV = "PYTKQUIZ_METRICS"
+DEFAULT_WINDOW = 1024
+DEFAULT_MAX_LOG_BYTES = 4 * 1024 * 1024
+DEFAULT_LOG_BACKUPS = 3
+DEFAULT_FLUSH_EVERY = 64
+
+
+class _NullSpan:
+    """Returned by `span` while instrumentation is disabled, so timing a stage costs nothing."""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+NULL_SPAN = _NullSpan()
+
+
+class Span:
+    """Times one run of a stage and reports it to its `Metrics` on exit."""
+
+    __slots__ = ("metrics", "name", "start")
+
+    def __init__(self, metrics: "Metrics", name: str) -> None:
+        self.metrics = metrics
+        self.name = name
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.metrics.observe(self.name, time.perf_counter() - self.start)
+        return False
+
+
+def percentile(sorted_values, fraction: float) -> float:
+    """Return the value at `fraction` of the way through `sorted_values`, nearest rank."""
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))]
+
+
+class Metrics:
+    """
+    Collects stage timings and counters for the question lifecycle.
+
+    The last `window` timings of each stage are kept for p50/p95 summaries. When `log_path` is set,
+    every timing and counter update is also appended to a JSON-lines log in batches of
+    `flush_every` records. The log is rotated once it grows past `max_log_bytes`, keeping
+    `log_backups` old files as `log_path.1`, `log_path.2` and so on.
+    """
+
+    def __init__(
+            self,
+            log_path: Optional[str] = None,
+            window: int = DEFAULT_WINDOW,
+            max_log_bytes: int = DEFAULT_MAX_LOG_BYTES,
+            log_backups: int = DEFAULT_LOG_BACKUPS,
+            flush_every: int = DEFAULT_FLUSH_EVERY,
+    ) -> None:
+        self.log_path = log_path
+        self.window = window
+        self.max_log_bytes = max_log_bytes
+        self.log_backups = log_backups
+        self.flush_every = flush_every
+        self.timings = {}
+        self.totals = {}
+        self.counters = {}
+        self._pending = []
+        self._lock = threading.Lock()
+
+    def span(self, name: str) -> Span:
+        return Span(self, name)
+
+    def observe(self, name: str, seconds: float) -> None:
+        """Record that stage `name` took `seconds`."""
+        with self._lock:
+            timings = self.timings.get(name)
+            if timings is None:
+                timings = self.timings[name] = deque(maxlen=self.window)
+            timings.append(seconds)
+            self.totals[name] = self.totals.get(name, 0) + 1
+            self._log({"ts": time.time(), "span": name, "ms": round(seconds * 1000, 3)})
+
+    def count(self, name: str, n: int = 1) -> None:
+        """Add `n` to counter `name`."""
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+            self._log({"ts": time.time(), "counter": name, "n": n})
+
+    def _log(self, record: dict) -> None:
+        if self.log_path is None:
+            return
+        self._pending.append(record)
+        if len(self._pending) >= self.flush_every:
+            self._write_pending()
+
+    def _write_pending(self) -> None:
+        if not self._pending:
+            return
+        lines = "".join(json.dumps(record) + "\n" for record in self._pending)
+        self._pending = []
+        try:
+            if os.path.exists(self.log_path) and os.path.getsize(self.log_path) >= self.max_log_bytes:
+                self._rotate()
+            with open(self.log_path, "a", encoding="utf-8") as f:
+                f.write(lines)
+        except OSError as e:
+            print(f"Failed to write metrics to {self.log_path}: {e}")
+
+    def _rotate(self) -> None:
+        for i in range(self.log_backups - 1, 0, -1):
+            older = f"{self.log_path}.{i}"
+            if os.path.exists(older):
+                os.replace(older, f"{self.log_path}.{i + 1}")
+        if self.log_backups > 0:
+            os.replace(self.log_path, f"{self.log_path}.1")
+        else:
+            os.remove(self.log_path)
+
+    def flush(self) -> None:
+        """Write any buffered records to the log."""
+        with self._lock:
+            self._write_pending()
+
+    def summary(self) -> dict:
+        """
+        Return per-stage statistics over the recent window, plus the counters.
+
+        Returns:
+            dict: {"stages": {name: {"count", "p50_ms", "p95_ms"}}, "counters": {name: total}}
+        """
+        with self._lock:
+            timings = {name: sorted(values) for name, values in self.timings.items()}
+            totals = dict(self.totals)
+            counters = dict(self.counters)
+        stages = {
+            name: {
+                "count": totals[name],
+                "p50_ms": percentile(values, 0.50) * 1000,
+                "p95_ms": percentile(values, 0.95) * 1000,
+            }
+            for name, values in sorted(timings.items())
+        }
+        return {"stages": stages, "counters": dict(sorted(counters.items()))}
+
+
+def format_summary(summary: dict) -> str:
+    """Format a `Metrics.summary` result as a few lines of text for a debug overlay."""
+    lines = [
+        f"{name}: p50 {stage['p50_ms']:.2f} ms, p95 {stage['p95_ms']:.2f} ms (n={stage['count']})"
+        for name, stage in summary["stages"].items()
+    ]
+    lines += [f"{name}: {total}" for name, total in summary["counters"].items()]
+    return "\n".join(lines)
+
+
+_metrics: Optional[Metrics] = None
+
+
+def configure(enabled: bool = True, log_path: Optional[str] = None, **kwargs) -> Optional[Metrics]:
+    """
+    Turn instrumentation on or off for the whole process.
+
+    Args:
+        enabled (bool): Whether to collect timings and counters.
+        log_path (Optional[str]): JSON-lines file to append every record to, if any.
+        **kwargs: Passed on to `Metrics`.
+
+    Returns:
+        Optional[Metrics]: The active collector, or None if disabled.
+    """
+    global _metrics
+    if _metrics is not None:
+        _metrics.flush()
+    _metrics = Metrics(log_path, **kwargs) if enabled else None
+    return _metrics
+
+
+def configure_from_env() -> Optional[Metrics]:
+    """Configure instrumentation from the `PYTKQUIZ_METRICS` environment variable."""
+    setting = os.environ.get(METRICS_ENV, "")
+    if setting in ("", "0"):
+        return configure(enabled=False)
+    return configure(log_path=None if setting == "1" else setting)
+
+
+def enabled() -> bool:
+    return _metrics is not None
+
+
+def active() -> Optional[Metrics]:
+    """Return the active collector, or None if instrumentation is disabled."""
+    return _metrics
+
+
+def span(name: str):
+    """
+    Return a context manager timing stage `name`.
+
+    While instrumentation is disabled this returns a shared no-op object, so the only cost is a
+    function call.
+    """
+    metrics = _metrics
+    if metrics is None:
+        return NULL_SPAN
+    return metrics.span(name)
+
+
+def count(name: str, n: int = 1) -> None:
+    """Add `n` to counter `name` if instrumentation is enabled."""
+    metrics = _metrics
+    if metrics is not None:
+        metrics.count(name, n)
+
+
+def flush() -> None:
+    metrics = _metrics
+    if metrics is not None:
+        metrics.flush()
+
+
+configure_from_env()
+atexit.register(flush)
@@ -1,17 +1,39 @@
+import argparse
+import getpass
 import os
+import threading
+import time
 import tkinter as tk
 from tkinter import DISABLED, NORMAL
-from typing import Optional, Callable
-
-import gtts  # type: ignore
-from PIL import Image, ImageTk
-from PIL.ImageTk import PhotoImage
-from playsound import playsound
-
-from pytkquiz.sound_gen import generate_sound_if_not_found
-from quiz_logic import QuizLogic, WordData
+from typing import TYPE_CHECKING, Optional, Callable
+
+import deck_cache
+import instrumentation
+from audio_cache import shared_audio_cache
+from audio_player import AudioPlayer
+from audio_processing import shared_processor
+from compiled_deck import open_compiled_deck
+from deck_registry import DeckRegistry
+from image_cache import ThumbnailCache
+from prefetch import Prefetcher
+from progress_store import progress_db_path, shared_store
+from quiz_logic import (
+    HARD_MODE_UNAVAILABLE, QuizLogic, WordData, word_col_index_for_language, words_path_for_language,
+)
+from scheduler import SCHEDULERS, make_scheduler, scheduler_name
+from sound_gen import generate_sound_if_not_found
+
+if TYPE_CHECKING:
+    # PIL is only imported when the first image is shown, to keep startup fast.
+    from PIL import ImageTk
 
 N_CHOICES = 3
+# Language codes by the names shown in the language menu.
+LANGUAGES = {
+    'English': 'en',
+    'Greek': 'el',
+}
+DEFAULT_PREFETCH_DEPTH = 2
 
 
 class LanguageQuizApp:
@@ -39,7 +61,10 @@ class LanguageQuizApp:
             frame_factory: Callable[..., tk.Frame] = tk.Frame,
             label_factory: Callable[..., tk.Label] = tk.Label,
             button_factory: Callable[..., tk.Button] = tk.Button,
-            image_factory: Callable[..., ImageTk.PhotoImage] = ImageTk.PhotoImage,
+            image_factory: Optional[Callable[..., "ImageTk.PhotoImage"]] = None,
+            prefetch_depth: int = DEFAULT_PREFETCH_DEPTH,
+            difficulty: str = "easy",
+            scheduler: Optional[str] = None,
     ) -> None:
         """
         Initializes the LanguageQuizApp instance with the provided configuration.
@@ -50,15 +75,24 @@ class LanguageQuizApp:
             frame_factory (Callable[..., tk.Frame]): A factory function to create Tkinter frames.
             label_factory (Callable[..., tk.Label]): A factory function to create Tkinter labels.
             button_factory (Callable[..., tk.Button]): A factory function to create Tkinter buttons.
+            image_factory (Optional[Callable[..., ImageTk.PhotoImage]]): A factory function to create
+                PhotoImages, `ImageTk.PhotoImage` if None.
+            prefetch_depth (int): How many upcoming questions to prepare in the background, 0 to disable.
+            difficulty (str): "hard" to offer choices whose pictures look like the answer's, see
+                `quiz_logic.DIFFICULTIES`.
+            scheduler (Optional[str]): How questions are chosen, a name from `scheduler.SCHEDULERS`. If
+                None, `PYTKQUIZ_SCHEDULER` or random.
 
         The constructor sets up the initial state of the application, including the GUI elements, score tracking,
-        and loading the word data. It also binds the space key press event to the `next_question` method.
+        and starts loading the word data. It also binds the space key press event to the `next_question` method.
         :param language:
         """
 
         self.master = master
         self.next_enabled = False
         self.root_dir = os.path.abspath(os.path.join(__file__, "..", ".."))
+        self.difficulty = difficulty
+        self.scheduler_name = scheduler_name(scheduler)
 
         self.label_factory = label_factory
         self.frame_factory =frame_factory
@@ -101,36 +135,215 @@ class LanguageQuizApp:
             master, text="Messages go here.", wraplength=450, font=("Arial", 20), justify="left"
         )
         self.message_label.pack(pady=10)
+        # Debug overlay with per-stage timings, only shown when PYTKQUIZ_METRICS is set.
+        self.metrics_label = None
+        self.metrics_shown_at = 0.0
+        if instrumentation.enabled():
+            self.metrics_label = self.label_factory(
+                master, text="", font=("Courier", 10), justify="left", anchor="w"
+            )
+            self.metrics_label.pack(pady=5)
 
         self.image_size = image_size
+        self.thumbnail_cache = ThumbnailCache(os.path.join(self.root_dir, "thumbnail_cache"), image_size)
+        self.audio_cache = shared_audio_cache(self.root_dir)
+        # Trimmed and normalized copies of the word sounds, see `audio_processing`.
+        self.audio_processor = shared_processor(self.root_dir)
+        self.audio_player = AudioPlayer(schedule=master.after if master else None)
+        self.prefetch_depth = prefetch_depth
+        self.progress_store = shared_store(progress_db_path(self.root_dir))
+        self.user_id = getpass.getuser()
+        self.prefetcher = Prefetcher(self.prepare_option, max_prepared=self.thumbnail_cache.memory.max_items)
+        self.build_option_grid()
 
         if master:
             master.bind("<space>", self.space_pressed)
 
-        self.update_language()
+        self.registry = DeckRegistry(self.root_dir, LANGUAGES.values())
+        self.quiz_logics = {}
+        self.load_errors = {}
+        self.quiz_logic = None
+        # The thread loading the decks and warming their images, None once loaded without a master.
+        self.loader: Optional[threading.Thread] = None
+        self.language = LANGUAGES[chosen_lang.get()]
+        self.load_decks()
 
     def update_language(self, *args):
         """
-        Update the language based on the selected language name.
+        Switch to the language selected in the menu.
+
+        Every language's deck is loaded at startup, see `load_decks`, and keeps its own `QuizLogic`,
+        so switching only swaps which one is used and reads no files. The score and attempts carry
+        over, since the progress store counts them across languages.
         """
 
-        lang_name = self.chosen_lang.get()
-        lang_map = {
-            'English': 'en',
-            'Greek': 'el'
-        }
-        self.language = lang_map[lang_name]
+        self.language = LANGUAGES[self.chosen_lang.get()]
+
+        quiz_logic = self.quiz_logics.get(self.language)
+        if quiz_logic is None:
+            if self.language in self.load_errors:
+                self.show_load_error(self.load_errors[self.language])
+            # Otherwise the decks are still loading, and `decks_loaded` shows this language.
+            return
+
+        previous = self.quiz_logic
+        if previous is not None and previous is not quiz_logic:
+            quiz_logic.score, quiz_logic.attempts = previous.score, previous.attempts
+        self.quiz_logic = quiz_logic
+        self.prefetcher.clear()
+        self.set_options_state(NORMAL)
+        self.score_label.config(text=f"Score: {quiz_logic.score}")
+        self.next_question()
 
-        if self.language == "en":
-            words_path = os.path.join(self.root_dir, "words.csv")
-        else:
-            words_path = os.path.join(self.root_dir, "words_" + self.language + ".csv")
-        word_col_index = 0 if self.language == "en" else 4
+    def load_decks(self) -> None:
+        """
+        Load the decks of all languages and then show a question in the chosen one.
 
-        self.quiz_logic = QuizLogic(root_dir=self.root_dir, language=self.language)
-        self.quiz_logic.load_word_data(words_path, word_col_index)
+        With a Tk master the decks are loaded on a background thread, so the window appears at once
+        and shows a loading state until the first question is ready. The chosen language's CSV is
+        streamed, see `stream_first_deck`, so its first question is playable after a few rows. Without
+        a master there is no event loop to hand the decks back to, so they are loaded before returning.
+        """
+        if self.master is None:
+            self.decks_loaded(*self.prepare_decks())
+            return
+        self.show_loading()
+
+        def load():
+            streamed = self.stream_first_deck()
+            quiz_logics, errors = self.prepare_decks(streamed)
+            self.master.after(0, self.decks_loaded, quiz_logics, errors)
+            self.warm_images(quiz_logics)
+
+        self.loader = threading.Thread(target=load, name="load-decks", daemon=True)
+        self.loader.start()
+
+    def new_quiz_logic(self, language: str) -> QuizLogic:
+        return QuizLogic(
+            root_dir=self.root_dir,
+            language=language,
+            progress_store=self.progress_store,
+            user_id=self.user_id,
+            difficulty=self.difficulty,
+            scheduler=make_scheduler(self.scheduler_name),
+        )
 
-        self.next_question()
+    def stream_first_deck(self) -> Optional[QuizLogic]:
+        """
+        Parse the chosen language's CSV in the background and show a question once enough words are read.
+
+        Runs on the loading thread. A current compiled deck is mapped by the registry without
+        parsing, so the CSV is only streamed when there is none.
+
+        Returns:
+            Optional[QuizLogic]: The quiz whose deck is being filled, or None if nothing is streamed.
+        """
+        language = self.language
+        csv_path = words_path_for_language(self.root_dir, language)
+        try:
+            if open_compiled_deck(csv_path, os.path.join(self.root_dir, "word_images"), language) is not None:
+                return None
+        except (OSError, ValueError):
+            pass
+        quiz_logic = self.new_quiz_logic(language)
+        ready = quiz_logic.load_word_data_in_background(
+            csv_path, word_col_index_for_language(language), min_ready=N_CHOICES
+        )
+        ready.wait()
+        quiz_logic.restore_progress()
+        if quiz_logic.load_error is None and len(quiz_logic.deck) >= N_CHOICES:
+            self.master.after(0, self.first_deck_ready, quiz_logic)
+        return quiz_logic
+
+    def first_deck_ready(self, quiz_logic: QuizLogic) -> None:
+        """Show the first question of a deck that is still being read, unless a question is already shown."""
+        if self.quiz_logic is None and quiz_logic.language == self.language:
+            self.quiz_logics = {**self.quiz_logics, quiz_logic.language: quiz_logic}
+            self.update_language()
+
+    def prepare_decks(self, streamed: Optional[QuizLogic] = None) -> tuple[dict, dict]:
+        """
+        Load every deck with its saved progress, then prepare the first question of the chosen language.
+
+        Runs on the loading thread, so it only fills caches and does not touch any widgets.
+
+        Args:
+            streamed (Optional[QuizLogic]): The quiz filled by `stream_first_deck`, kept for its
+                language so the question it shows stays in place.
+
+        Returns:
+            tuple[dict, dict]: A `QuizLogic` per language that loaded, and the error per language that did not.
+        """
+        quiz_logics = {}
+        if streamed is not None:
+            streamed.loaded.wait()
+            if streamed.load_error is None:
+                # Handed to the registry through the deck cache, so the CSV is not parsed twice.
+                deck_cache.put(self.root_dir, streamed.language, streamed.deck)
+                quiz_logics[streamed.language] = streamed
+        with instrumentation.span("deck_load"):
+            self.registry.load()
+        for language, deck in self.registry.decks.items():
+            if language in quiz_logics:
+                continue
+            quiz_logic = self.new_quiz_logic(language)
+            quiz_logic.set_questions(deck)
+            quiz_logic.restore_progress()
+            quiz_logics[language] = quiz_logic
+
+        quiz_logic = quiz_logics.get(self.language)
+        if quiz_logic is streamed:
+            # Already asking questions on the UI thread.
+            quiz_logic = None
+        try:
+            for options in quiz_logic.peek_upcoming(1) if quiz_logic else []:
+                for option in options:
+                    self.thumbnail_cache.get(quiz_logic.image_path_for_word(option, size=self.image_size))
+                    sound_path = quiz_logic.sound_path_for_word(option)
+                    generate_sound_if_not_found(quiz_logic.language, option.word, sound_path)
+        except Exception as e:
+            # The first question retries whatever failed here.
+            print(f"Failed to prepare the first question: {e}")
+        return quiz_logics, dict(self.registry.errors)
+
+    def warm_images(self, quiz_logics: dict) -> None:
+        """
+        Decode the thumbnails of the deck images on the loading thread, as many as the memory cache holds.
+
+        The languages share their images, so each is decoded once and is ready in every language.
+        """
+        if not quiz_logics:
+            return
+        quiz_logic = next(iter(quiz_logics.values()))
+        try:
+            for image in self.registry.images[:self.thumbnail_cache.memory.max_items]:
+                self.thumbnail_cache.get(quiz_logic.image_variant_path(image, self.image_size))
+        except Exception as e:
+            print(f"Failed to prepare the deck images: {e}")
+
+    def show_loading(self) -> None:
+        self.word_label.config(text="Loading words...")
+        self.message_label.config(text="")
+        self.disable_next()
+        self.set_options_state(DISABLED)
+
+    def decks_loaded(self, quiz_logics: dict, errors: dict) -> None:
+        """Install the loaded decks and show a question in the chosen language, if none is shown yet."""
+        self.quiz_logics = quiz_logics
+        self.load_errors = errors
+        if self.quiz_logic is None or quiz_logics.get(self.language) is not self.quiz_logic:
+            self.update_language()
+
+    def show_load_error(self, error: Exception) -> None:
+        self.word_label.config(text="Could not load the words.")
+        self.set_message(str(error))
+        self.disable_next()
+        self.set_options_state(DISABLED)
+
+    def set_options_state(self, state: str) -> None:
+        """Enable or disable the option and speak buttons, e.g. while a deck is loading."""
+        for btn in self.option_buttons + self.speak_buttons:
+            btn.config(state=state)
 
     def enable_next(self):
         """
@@ -159,51 +372,111 @@ class LanguageQuizApp:
         if self.next_enabled:
             self.next_question()
 
-    def next_question(self):
-        options = self.quiz_logic.next_question()
-        current_question = self.quiz_logic.current_question
+    def build_option_grid(self) -> None:
+        """
+        Create the image and speak buttons for each option slot.
 
-        self.word_label.config(text=current_question.word)
-        self.message_label.config(text="")
-        self.disable_next()
-        for widget in self.image_frame.winfo_children():
-            widget.destroy()
-
-        for i, option in enumerate(options):
-            photo = self.get_word_image(option)
-            btn = self.button_factory(
-                self.image_frame,
-                image=photo,
-                command=lambda opt=option: self.check_answer(opt),
-            )
-            btn.image = photo
+        The grid is built once and `next_question` only updates it, so moving to the next question
+        creates no widgets or PhotoImages. Each button's command reads the option currently shown
+        in its slot.
+        """
+        self.current_options = []
+        self.option_buttons = []
+        self.speak_buttons = []
+        self.photo_pool = [None] * N_CHOICES
+        for i in range(N_CHOICES):
+            btn = self.button_factory(self.image_frame, command=lambda slot=i: self.option_clicked(slot))
             btn.grid(row=0, column=i, padx=10, pady=10)
+            self.option_buttons.append(btn)
 
             speak_btn = self.button_factory(
-                self.image_frame,
-                text="🔊Speak",
-                command=lambda x=option: self.speak_word(
-                    self.quiz_logic.sound_path_for_word(x)
-                ),
+                self.image_frame, text="🔊Speak", command=lambda slot=i: self.speak_clicked(slot)
             )
             speak_btn.grid(row=1, column=i, padx=10, pady=5)
+            self.speak_buttons.append(speak_btn)
+
+    def option_clicked(self, slot: int) -> None:
+        # Each question is answered once, further clicks wait for the next question.
+        if slot < len(self.current_options) and not self.quiz_logic.answered:
+            self.check_answer(self.current_options[slot])
 
-            sound_path = self.quiz_logic.sound_path_for_word(option)
-            generate_sound_if_not_found(self.language, option.word, sound_path)
+    def speak_clicked(self, slot: int) -> None:
+        if slot < len(self.current_options):
+            sound_path = self.quiz_logic.sound_path_for_word(self.current_options[slot])
+            self.speak_word(self.audio_processor.resolve(sound_path))
 
-    def get_word_image(self, option: WordData) -> PhotoImage or None:
+    def next_question(self):
+        with instrumentation.span("next_question"):
+            options = self.quiz_logic.next_question()
+            current_question = self.quiz_logic.current_question
+
+            self.word_label.config(text=current_question.word)
+            self.message_label.config(text="")
+            self.disable_next()
+            self.current_options = options
+
+            for i, option in enumerate(options):
+                prefetched = self.prefetcher.claim(option)
+                instrumentation.count("prefetch_hit" if prefetched else "prefetch_miss")
+                photo = self.get_word_image(option, slot=i)
+                with instrumentation.span("widget_update"):
+                    self.option_buttons[i].config(image=photo)
+                    self.option_buttons[i].image = photo
+
+                if not prefetched:
+                    sound_path = self.quiz_logic.sound_path_for_word(option)
+                    generate_sound_if_not_found(self.language, option.word, sound_path)
+
+            if self.prefetch_depth > 0 and not self.quiz_logic.scheduler.uses_answers:
+                self.prefetcher.submit(self.quiz_logic.peek_upcoming(self.prefetch_depth))
+            if self.difficulty == "hard" and not self.quiz_logic.hard_mode_available():
+                self.set_message(HARD_MODE_UNAVAILABLE)
+        self.update_metrics_overlay()
+
+    def update_metrics_overlay(self) -> None:
+        """Show the p50/p95 of each question stage in the debug overlay, if it is enabled."""
+        metrics = instrumentation.active()
+        now = time.monotonic()
+        if self.metrics_label is not None and metrics is not None and now - self.metrics_shown_at >= 0.5:
+            self.metrics_shown_at = now
+            self.metrics_label.config(text=instrumentation.format_summary(metrics.summary()))
+
+    def prepare_option(self, option: WordData) -> None:
+        """
+        Decode the image and make sure the sound exists for an upcoming option.
+
+        Runs on the prefetch thread, so it only fills caches and does not touch any widgets.
+        """
+        self.thumbnail_cache.get(self.quiz_logic.image_path_for_word(option, size=self.image_size))
+        sound_path = self.quiz_logic.sound_path_for_word(option)
+        generate_sound_if_not_found(self.language, option.word, sound_path)
+        self.audio_processor.get(sound_path)
+
+    def get_word_image(self, option: WordData, slot: int = 0) -> "ImageTk.PhotoImage":
         """
         Get the Tkinter PhotoImage object for the image associated with the given word option.
 
+        Resized images come from the thumbnail cache, so a word that was already displayed needs
+        no JPEG decoding. They are pasted into a pooled PhotoImage per option slot, which is
+        reused for every question instead of creating a new one.
+
         Args:
             option (WordData): The word option to get the image for.
+            slot (int): The option slot the image will be shown in.
 
         Returns:
             PhotoImage or None: The Tkinter PhotoImage object for the image, or None if the image file does not exist.
         """
-        img = Image.open(self.quiz_logic.image_path_for_word(option))
-        img = img.resize((self.image_size, self.image_size))
-        photo = self.image_factory(img)
+        img = self.thumbnail_cache.get(self.quiz_logic.image_path_for_word(option, size=self.image_size))
+        photo = self.photo_pool[slot]
+        if photo is None:
+            if self.image_factory is None:
+                from PIL import ImageTk
+
+                self.image_factory = ImageTk.PhotoImage
+            photo = self.photo_pool[slot] = self.image_factory(img)
+        else:
+            photo.paste(img)
         return photo
 
     def set_message(self, msg: str) -> None:
@@ -216,6 +489,9 @@ class LanguageQuizApp:
 
     def check_answer(self, selected_option: WordData) -> bool:
         correct = self.quiz_logic.check_answer(selected_option)
+        if self.prefetch_depth > 0 and self.quiz_logic.scheduler.uses_answers:
+            # The upcoming questions depend on this answer, so they are only picked now.
+            self.prefetcher.submit(self.quiz_logic.peek_upcoming(self.prefetch_depth))
         if correct:
             self.score_label.config(text=f"Score: {self.quiz_logic.score}")
             self.set_message(
@@ -232,13 +508,20 @@ class LanguageQuizApp:
         self.enable_next()
         return correct
 
-    @staticmethod
-    def speak_word(sound_path: str) -> None:
-        playsound(sound_path)
+    def speak_word(self, sound_path: str, prepare: Optional[Callable[[], None]] = None) -> None:
+        """
+        Play the given sound file in the background, interrupting any clip that is still playing.
+
+        Args:
+            sound_path (str): The sound file to play.
+            prepare (Optional[Callable[[], None]]): Run on the audio worker before playing.
+        """
+        self.audio_player.play(sound_path, prepare=prepare)
 
     def speak_text(self, text: str) -> None:
         """
-        Speaks the given text by generating an audio file for it and playing it.
+        Speaks the given text by looking up or synthesizing its clip in the audio cache and playing it.
+        Both steps happen on the audio worker thread, so this returns immediately.
 
         Args:
             text (str): The text to be spoken.
@@ -246,17 +529,15 @@ class LanguageQuizApp:
         Returns:
             None
         """
-        # TODO: not sure if we need this filtering.
-        text = text.lower()
-        safe_name_chars = [c if c.isalnum() else "_" for c in text]
-        safe_name = "".join(safe_name_chars)
-
-        sound_path = os.path.join(
-            self.root_dir, "word_sounds", safe_name.lower() + ".mp3"
+        language = self.language
+        self.speak_word(
+            self.audio_cache.clip_path(language, text), prepare=lambda: self.audio_cache.get(language, text)
         )
 
-        generate_sound_if_not_found(self.language, text, sound_path)
-        self.speak_word(sound_path)
+    @property
+    def prefetch_stats(self) -> dict:
+        """Hit and miss counts for questions whose assets were prepared in the background."""
+        return self.prefetcher.stats()
 
     @property
     def score(self):
@@ -268,6 +549,10 @@ class LanguageQuizApp:
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Language quiz desktop app.")
+    parser.add_argument("--scheduler", choices=sorted(SCHEDULERS),
+                        help="How questions are chosen, $PYTKQUIZ_SCHEDULER or random by default.")
+    args = parser.parse_args()
     root = tk.Tk()
-    app = LanguageQuizApp(root)
+    app = LanguageQuizApp(root, scheduler=args.scheduler)
     root.mainloop()
@@ -0,0 +1,96 @@
+import queue
+import threading
+from typing import Callable
+
+from image_cache import LRUCache
+
+
+class Prefetcher:
+    """
+    Prepares the assets of upcoming questions on a background thread.
+
+    `prepare` is called on the worker for every option submitted, e.g. to decode and resize its
+    image and make sure its sound file exists. When a question is shown, `claim` reports whether
+    each option was prepared ahead of time and counts the result as a hit or a miss.
+    """
+
+    def __init__(self, prepare: Callable[..., None], max_prepared: int = 64) -> None:
+        """
+        Args:
+            prepare (Callable[..., None]): Called with each option on the worker thread.
+            max_prepared (int): How many prepared options to remember. Should not exceed the
+                number of entries the caches filled by `prepare` can hold.
+        """
+        self.prepare = prepare
+        self.hits = 0
+        self.misses = 0
+        self._prepared = LRUCache(max_prepared)
+        self._pending = set()
+        self._lock = threading.Lock()
+        self._queue = queue.Queue()
+        self._generation = 0
+        self._worker = threading.Thread(target=self._run, name="prefetch", daemon=True)
+        self._worker.start()
+
+    def submit(self, questions) -> None:
+        """Queue the options of each question in `questions` for preparation."""
+        with self._lock:
+            generation = self._generation
+            for options in questions:
+                for option in options:
+                    if option not in self._pending and option not in self._prepared:
+                        self._pending.add(option)
+                        self._queue.put((generation, option))
+
+    def claim(self, option) -> bool:
+        """Return True if `option` was prepared in the background, and count the hit or miss."""
+        prepared = option in self._prepared
+        with self._lock:
+            if prepared:
+                self.hits += 1
+            else:
+                self.misses += 1
+        return prepared
+
+    def clear(self) -> None:
+        """Forget prepared options and skip queued ones, e.g. after switching decks."""
+        with self._lock:
+            self._generation += 1
+            self._pending.clear()
+        self._prepared.clear()
+
+    def close(self) -> None:
+        self.clear()
+        self._queue.put(None)
+        self._worker.join()
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "pending": len(self._pending),
+            }
+
+    def _run(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            generation, option = item
+            with self._lock:
+                if generation != self._generation:
+                    continue
+            try:
+                self.prepare(option)
+                prepared = True
+            except Exception as e:
+                print(f"Failed to prefetch {option}: {e}")
+                prepared = False
+            with self._lock:
+                if generation == self._generation:
+                    self._pending.discard(option)
+                    if prepared:
+                        self._prepared.put(option, True)
@@ -0,0 +1,195 @@
+import atexit
+import os
+import queue
+import sqlite3
+import threading
+import time
+from typing import NamedTuple
+
+DEFAULT_FLUSH_INTERVAL = 1.0
+DEFAULT_BATCH_SIZE = 500
+PROGRESS_DB = "progress.sqlite3"
+# Environment variable overriding where the apps keep the database, `PROGRESS_DB` in the repo by default.
+PROGRESS_DB_ENV = "PYTKQUIZ_PROGRESS_DB"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS answers (
+    id INTEGER PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    language TEXT NOT NULL,
+    word TEXT NOT NULL,
+    correct INTEGER NOT NULL,
+    answered_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS answers_user ON answers (user_id, answered_at);
+CREATE TABLE IF NOT EXISTS user_stats (
+    user_id TEXT PRIMARY KEY,
+    score INTEGER NOT NULL,
+    attempts INTEGER NOT NULL
+);
+"""
+
+
+class AnswerEvent(NamedTuple):
+    user_id: str
+    language: str
+    word: str
+    correct: bool
+    answered_at: float
+
+
+class ProgressStore:
+    """
+    Records every answer in a local SQLite database without making the caller wait for the disk.
+
+    `record_answer` only counts the answer as pending and queues the event. A background thread
+    writes queued events in batches, every `flush_interval` seconds or as soon as `batch_size` events
+    are waiting. Each user's score and attempts are kept as a precomputed row in `user_stats`, so
+    reading them is a single primary key lookup. It is read on every `get_stats`, so answers saved by
+    other processes sharing the database are included, plus this process's pending answers.
+    """
+
+    def __init__(
+            self,
+            path: str,
+            flush_interval: float = DEFAULT_FLUSH_INTERVAL,
+            batch_size: int = DEFAULT_BATCH_SIZE,
+    ) -> None:
+        self.path = path
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        # (score, attempts) per user of the answers queued but not committed yet.
+        self._pending = {}
+        self._lock = threading.Lock()
+        # Held while a batch is committed and its answers stop being pending, and while stats are
+        # read, so a read never counts a batch twice or misses it.
+        self._commit_lock = threading.Lock()
+        self._queue = queue.Queue()
+        self._closed = False
+
+        conn = self._connect()
+        try:
+            conn.executescript(SCHEMA)
+        finally:
+            conn.close()
+        self._reader = self._connect(check_same_thread=False)
+        self._writer = threading.Thread(target=self._run, name="progress-writer", daemon=True)
+        self._writer.start()
+
+    def _connect(self, **kwargs) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=30, **kwargs)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def get_stats(self, user_id: str) -> tuple[int, int]:
+        """Return the (score, attempts) totals for `user_id`, including answers not written yet."""
+        with self._commit_lock:
+            row = self._reader.execute(
+                "SELECT score, attempts FROM user_stats WHERE user_id = ?", (user_id,)
+            ).fetchone()
+            with self._lock:
+                pending = self._pending.get(user_id, (0, 0))
+        score, attempts = row or (0, 0)
+        return score + pending[0], attempts + pending[1]
+
+    def record_answer(self, user_id: str, language: str, word: str, correct: bool) -> None:
+        """Queue an answer for writing and count it in the user's totals."""
+        if self._closed:
+            raise RuntimeError("progress store is closed")
+        with self._lock:
+            score, attempts = self._pending.get(user_id, (0, 0))
+            self._pending[user_id] = (score + int(correct), attempts + 1)
+        self._queue.put(AnswerEvent(user_id, language, word, correct, time.time()))
+
+    def flush(self) -> None:
+        """Block until every answer recorded so far has been written."""
+        self._queue.join()
+
+    def close(self) -> None:
+        """Write any queued answers and stop the writer thread."""
+        if not self._closed:
+            self._closed = True
+            self._queue.put(None)
+            self._writer.join()
+            self._reader.close()
+
+    def _run(self) -> None:
+        conn = self._connect()
+        try:
+            stop = False
+            while not stop:
+                batch = []
+                deadline = time.monotonic() + self.flush_interval
+                while len(batch) < self.batch_size:
+                    try:
+                        event = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                    except queue.Empty:
+                        break
+                    if event is None:
+                        self._queue.task_done()
+                        stop = True
+                        break
+                    batch.append(event)
+                if batch:
+                    self._save(conn, batch)
+        finally:
+            conn.close()
+
+    def _save(self, conn: sqlite3.Connection, batch: list) -> None:
+        """Write a batch and stop counting it as pending, even if it could not be written."""
+        totals = {}
+        for event in batch:
+            score, attempts = totals.get(event.user_id, (0, 0))
+            totals[event.user_id] = (score + int(event.correct), attempts + 1)
+        try:
+            with self._commit_lock:
+                try:
+                    self._write(conn, batch, totals)
+                except Exception as e:
+                    # The writer thread must keep running, or `flush` and `close` would wait forever.
+                    print(f"Failed to save {len(batch)} answers: {e}")
+                with self._lock:
+                    for user_id, (score, attempts) in totals.items():
+                        pending_score, pending_attempts = self._pending[user_id]
+                        if pending_attempts == attempts:
+                            del self._pending[user_id]
+                        else:
+                            self._pending[user_id] = (pending_score - score, pending_attempts - attempts)
+        finally:
+            for _ in batch:
+                self._queue.task_done()
+
+    @staticmethod
+    def _write(conn: sqlite3.Connection, batch: list, totals: dict) -> None:
+        with conn:
+            conn.executemany(
+                "INSERT INTO answers (user_id, language, word, correct, answered_at) VALUES (?, ?, ?, ?, ?)",
+                [(e.user_id, e.language, e.word, int(e.correct), e.answered_at) for e in batch],
+            )
+            conn.executemany(
+                "INSERT INTO user_stats (user_id, score, attempts) VALUES (?, ?, ?) "
+                "ON CONFLICT (user_id) DO UPDATE SET score = score + excluded.score, "
+                "attempts = attempts + excluded.attempts",
+                [(user_id, score, attempts) for user_id, (score, attempts) in totals.items()],
+            )
+
+
+_shared = {}
+_shared_lock = threading.Lock()
+
+
+def progress_db_path(root_dir: str) -> str:
+    """Return the database the apps use, `PYTKQUIZ_PROGRESS_DB` if set, else `PROGRESS_DB` in `root_dir`."""
+    return os.environ.get(PROGRESS_DB_ENV) or os.path.join(root_dir, PROGRESS_DB)
+
+
+def shared_store(path: str) -> ProgressStore:
+    """Return the process-wide `ProgressStore` for `path`, creating it on first use."""
+    path = os.path.abspath(path)
+    with _shared_lock:
+        store = _shared.get(path)
+        if store is None:
+            store = _shared[path] = ProgressStore(path)
+            atexit.register(store.close)
+        return store
@@ -0,0 +1,116 @@
+import base64
+import binascii
+import hashlib
+import hmac
+import os
+import struct
+import threading
+from typing import NamedTuple, Optional
+
+TOKEN_SECRET_ENV = "PYTKQUIZ_TOKEN_SECRET"
+SECRET_NAME = ".question_token_secret"
+TOKEN_VERSION = 1
+# version, language, deck fingerprint, seed, answer position, option count, then one uint32 per option
+HEADER = struct.Struct(">B2s8sQBB")
+MAC_BYTES = 16
+
+
+class Question(NamedTuple):
+    language: str
+    target_id: int
+    option_ids: list
+    # Seed of the random number generators, so the next question is the same in any process.
+    seed: int
+
+
+def token_secret(root_dir: str) -> bytes:
+    """
+    Return the key question tokens are signed with.
+
+    Set `PYTKQUIZ_TOKEN_SECRET` to share it between hosts. Otherwise a random key is created in
+    `root_dir` by the first process that needs one and read by all the others.
+    """
+    secret = os.environ.get(TOKEN_SECRET_ENV)
+    if secret:
+        return secret.encode("utf-8")
+    path = os.path.join(root_dir, SECRET_NAME)
+    try:
+        with open(path, "rb") as f:
+            return f.read()
+    except FileNotFoundError:
+        pass
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    with os.fdopen(fd, "wb") as f:
+        f.write(os.urandom(32))
+    try:
+        # Fails if another process created the key first, in which case its key is used.
+        os.link(tmp_path, path)
+    except FileExistsError:
+        pass
+    finally:
+        os.remove(tmp_path)
+    with open(path, "rb") as f:
+        return f.read()
+
+
+class QuestionTokens:
+    """
+    Encodes questions as short signed strings that any process with the same deck can read back.
+
+    A token holds the language, the deck fingerprint, the option word IDs, the position of the
+    answer and a seed, followed by a truncated HMAC-SHA256, in URL-safe base64. A question of three
+    options takes 68 characters. Tokens that were tampered with, signed with another key or made
+    for a different deck are rejected, so a session can never be shown words it was not asked.
+    """
+
+    def __init__(self, secret: bytes) -> None:
+        self._secret = secret
+
+    def _mac(self, payload: bytes) -> bytes:
+        return hmac.new(self._secret, payload, hashlib.sha256).digest()[:MAC_BYTES]
+
+    def encode(self, deck, language: str, target_id: int, option_ids, seed: int) -> str:
+        option_ids = list(option_ids)
+        payload = HEADER.pack(
+            TOKEN_VERSION, language.encode("ascii"), deck.fingerprint(), seed, option_ids.index(target_id),
+            len(option_ids),
+        ) + struct.pack(f">{len(option_ids)}I", *option_ids)
+        return base64.urlsafe_b64encode(payload + self._mac(payload)).decode("ascii")
+
+    def decode(self, token: str, deck) -> Optional[Question]:
+        """
+        Read a token back, checking it against `deck`.
+
+        Returns:
+            Optional[Question]: The question, or None if the token is invalid or for another deck.
+        """
+        try:
+            data = base64.urlsafe_b64decode(token)
+        except (binascii.Error, ValueError, TypeError):
+            return None
+        payload, mac = data[:-MAC_BYTES], data[-MAC_BYTES:]
+        if len(payload) < HEADER.size or not hmac.compare_digest(mac, self._mac(payload)):
+            return None
+        version, language, fingerprint, seed, answer, count = HEADER.unpack_from(payload)
+        if version != TOKEN_VERSION or len(payload) != HEADER.size + 4 * count or answer >= count:
+            return None
+        if fingerprint != deck.fingerprint():
+            return None
+        option_ids = list(struct.unpack_from(f">{count}I", payload, HEADER.size))
+        if max(option_ids) >= len(deck) or len(set(option_ids)) != count:
+            return None
+        return Question(language.decode("ascii"), option_ids[answer], option_ids, seed)
+
+
+_shared = {}
+_shared_lock = threading.Lock()
+
+
+def shared_tokens(root_dir: str) -> QuestionTokens:
+    """Return the process-wide `QuestionTokens` for `root_dir`."""
+    with _shared_lock:
+        tokens = _shared.get(root_dir)
+        if tokens is None:
+            tokens = _shared[root_dir] = QuestionTokens(token_secret(root_dir))
+        return tokens
@@ -0,0 +1,84 @@
+import csv
+import json
+from typing import NamedTuple, TextIO
+
+import numpy as np
+
+# Questions formatted per write, which bounds memory use when exporting millions of questions.
+WRITE_CHUNK = 65536
+
+
+class QuizBatch(NamedTuple):
+    """Questions drawn by `QuizLogic.generate_batch`."""
+
+    # `(n, n_choices)` word IDs of the options of each question, in display order.
+    option_ids: np.ndarray
+    # Position of the correct option in each row of `option_ids`.
+    answers: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.answers)
+
+    @property
+    def target_ids(self) -> np.ndarray:
+        return self.option_ids[np.arange(len(self.answers)), self.answers]
+
+    def chunks(self, size: int = WRITE_CHUNK):
+        """Yield `(first_index, option_ids, answers)` as Python lists of at most `size` questions."""
+        for start in range(0, len(self.answers), size):
+            yield start, self.option_ids[start:start + size].tolist(), self.answers[start:start + size].tolist()
+
+
+def write_jsonl(deck, batch: QuizBatch, f: TextIO) -> int:
+    """
+    Write one JSON object per question to `f`.
+
+    Each line has the question number, the word asked for, the option words and images in display
+    order and the position of the correct option. Words are JSON-encoded once per deck entry rather
+    than once per question.
+
+    Returns:
+        int: The number of questions written.
+    """
+    encoded_words = [json.dumps(word, ensure_ascii=False) for word in deck.words]
+    encoded_images = [json.dumps(image, ensure_ascii=False) for image in deck.images]
+    for start, option_ids, answers in batch.chunks():
+        lines = []
+        for i, (options, answer) in enumerate(zip(option_ids, answers), start):
+            lines.append(
+                f'{{"question": {i}, "word": {encoded_words[options[answer]]}, '
+                f'"options": [{", ".join(encoded_words[o] for o in options)}], '
+                f'"images": [{", ".join(encoded_images[o] for o in options)}], "answer": {answer}}}\n'
+            )
+        f.write("".join(lines))
+    return len(batch)
+
+
+def write_csv(deck, batch: QuizBatch, f: TextIO) -> int:
+    """
+    Write one CSV row per question to `f`, with a column per option word and image.
+
+    Returns:
+        int: The number of questions written.
+    """
+    n_choices = batch.option_ids.shape[1]
+    writer = csv.writer(f)
+    writer.writerow(
+        ["question", "word"]
+        + [f"option_{j + 1}" for j in range(n_choices)]
+        + [f"image_{j + 1}" for j in range(n_choices)]
+        + ["answer"]
+    )
+    words, images = deck.words, deck.images
+    for start, option_ids, answers in batch.chunks():
+        writer.writerows(
+            [i, words[options[answer]], *[words[o] for o in options], *[images[o] for o in options], answer]
+            for i, (options, answer) in enumerate(zip(option_ids, answers), start)
+        )
+    return len(batch)
+
+
+WRITERS = {
+    "jsonl": write_jsonl,
+    "csv": write_csv,
+}
@@ -1,22 +1,87 @@
 import csv
 import os
 import random
-from collections import namedtuple
+import threading
+from collections import deque
+from numbers import Integral
 
-WordData = namedtuple("WordData", ["word", "image", "sound", "definition", "filename"])
+import instrumentation
+from compiled_deck import open_compiled_deck, write_compiled_deck
+from deck import Deck, WordData
+from image_assets import load_manifest
+from scheduler import RandomScheduler, sample_distinct_ids, sample_distinct_rows
+from sound_gen import default_extension
+
+N_CHOICES = 3
+# "hard" picks distractors whose images look like the target's, see `similarity_index`.
+DIFFICULTIES = ("easy", "hard")
+HARD_MODE_UNAVAILABLE = (
+    "Hard mode needs the image similarity index. Build it with \"cli.py build-similarity\", "
+    "until then the choices are random."
+)
+
+
+def words_path_for_language(root_dir, language):
+    if language == "en":
+        return os.path.join(root_dir, "words.csv")
+    return os.path.join(root_dir, "words_" + language + ".csv")
+
+
+def word_col_index_for_language(language):
+    return 0 if language == "en" else 4
 
 
 class QuizLogic:
-    def __init__(self, root_dir, language:str = "en"):
+    def __init__(self, root_dir, language:str = "en", scheduler=None, progress_store=None, user_id=None,
+                 difficulty="easy"):
+        if difficulty not in DIFFICULTIES:
+            raise ValueError(f"Unknown difficulty {difficulty!r}, expected one of {', '.join(DIFFICULTIES)}.")
         self.root_dir = root_dir
-        self.questions = []
-        self.current_question = None
+        # Optional `progress_store.ProgressStore` that every answer of `user_id` is recorded in.
+        self.progress_store = progress_store
+        self.user_id = user_id
+        # Chooses the target and options of each question, see `scheduler.SCHEDULERS`.
+        self.scheduler = scheduler if scheduler is not None else RandomScheduler()
+        self.difficulty = difficulty
+        self.rng = random.Random()
+        self.deck = Deck()
+        # IDs of the word being asked for and of the options shown with it.
+        self.current_id = None
+        self.option_ids = None
+        # Whether the current question's answer was recorded, so answering again only counts the score.
+        self.answered = False
         self.score = 0
         self.attempts = 0
         self.language = language
+        # Extension of the word sounds, which is the format the text-to-speech backend writes.
+        self.sound_extension = default_extension()
+        # Questions picked ahead of time so their assets can be prepared in the background.
+        self.upcoming = deque()
+        self._image_names = None
+        self.loaded = None
+        self.load_error = None
 
-    def load_word_data(self, path, word_col_index):
-        word_data = []
+    def image_names(self):
+        """
+        Return the set of file names in `word_images`.
+
+        The directory is listed once with `os.scandir` and the result reused, instead of checking
+        each word's image with its own stat call.
+        """
+        if self._image_names is None:
+            image_dir = os.path.join(self.root_dir, "word_images")
+            try:
+                with os.scandir(image_dir) as entries:
+                    self._image_names = frozenset(entry.name for entry in entries)
+            except FileNotFoundError:
+                self._image_names = frozenset()
+        return self._image_names
+
+    def iter_word_data(self, path, word_col_index):
+        """
+        Parse the word CSV at `path` and yield each word with an existing image as soon as it is read.
+        """
+        image_names = self.image_names()
         with open(path, newline="", encoding="utf-8") as csvfile:
             reader = csv.DictReader(csvfile)
             col_names = reader.fieldnames
@@ -35,48 +100,315 @@ class QuizLogic:
                     definition=row["Definition"],
                     filename=filename,
                 )
-                image_path = self.image_path_for_word(new_word)
-                if not os.path.exists(image_path):
+                if new_word.image not in image_names:
                     print(
-                        f"Skipping word {new_word.word}, missing image file {image_path}"
+                        f"Skipping word {new_word.word}, missing image file {self.image_path_for_word(new_word)}"
                     )
                 else:
-                    word_data.append(new_word)
-        self.set_questions(word_data)
+                    yield new_word
+
+    def load_word_data(self, path, word_col_index):
+        deck = Deck.from_word_data(self.iter_word_data(path, word_col_index))
+        self.set_questions(deck)
+
+        return deck
+
+    def load_deck(self, path, word_col_index):
+        """
+        Load the deck for the word CSV at `path`, preferring its compiled version.
+
+        The compiled deck (see `compile_deck`) is memory-mapped without parsing any rows. If it is
+        missing or older than the CSV or the image directory, the CSV is parsed instead.
+        """
+        deck = open_compiled_deck(path, os.path.join(self.root_dir, "word_images"), self.language)
+        if deck is None:
+            return self.load_word_data(path, word_col_index)
+        self.set_questions(deck)
+        return deck
+
+    def compile_deck(self, path, word_col_index, out_path):
+        """
+        Compile the word CSV at `path` into a binary deck file at `out_path`.
+
+        Returns:
+            int: The number of words written.
+        """
+        sound_dir = self.sound_dir()
+
+        def rows():
+            for word in self.iter_word_data(path, word_col_index):
+                yield (
+                    word.word, word.image, word.sound, word.definition, word.filename,
+                    os.path.join("word_images", word.image),
+                    os.path.join(sound_dir, word.filename + self.sound_extension),
+                )
+
+        return write_compiled_deck(
+            out_path, rows(), path, os.path.join(self.root_dir, "word_images"), self.language
+        )
+
+    def load_word_data_in_background(self, path, word_col_index, min_ready=3):
+        """
+        Start loading the word CSV at `path` on a background thread.
+
+        The deck is installed right away and filled as rows are parsed. The returned event is set
+        once `min_ready` words are loaded (enough for a question) or loading has finished, so the
+        first question can be shown long before a large deck is fully read.
+
+        Returns:
+            threading.Event: Set when a question can be asked. `self.loaded` is set when loading is done.
+        """
+        deck = Deck()
+        self.set_questions(deck)
+        ready = threading.Event()
+        self.loaded = threading.Event()
+        self.load_error = None
+
+        def load():
+            try:
+                for word in self.iter_word_data(path, word_col_index):
+                    deck.append(word)
+                    if len(deck) == min_ready:
+                        ready.set()
+            except Exception as e:
+                self.load_error = e
+            finally:
+                ready.set()
+                self.loaded.set()
+
+        threading.Thread(target=load, name="load-word-data", daemon=True).start()
+        return ready
+
+    @property
+    def questions(self):
+        return self.deck
+
+    @property
+    def current_question(self):
+        if self.current_id is None:
+            return None
+        return self.deck[self.current_id]
 
-        return word_data
+    @current_question.setter
+    def current_question(self, word_data):
+        self.current_id = None if word_data is None else self.deck.id_of(word_data)
+        self.answered = False
+
+    def _pick_question(self):
+        target_id, option_ids = self.scheduler.pick(len(self.deck), N_CHOICES)
+        if self.difficulty == "hard":
+            option_ids = self.similar_options(target_id, N_CHOICES)
+        return target_id, option_ids
+
+    def similarity_index(self):
+        """
+        Return the prebuilt `SimilarityIndex` of the word images, or None if it was not built or is out of date.
+
+        The shared index is reloaded when its file changes, so building it while the app runs
+        enables hard mode from the next question.
+        """
+        # Imported here, the index needs NumPy and is only used in hard mode.
+        from similarity_index import load_index
+
+        return load_index(self.root_dir)
+
+    def hard_mode_available(self):
+        """Return True if hard mode can offer similar-looking choices, see `similarity_index`."""
+        return self.similarity_index() is not None
+
+    def similar_options(self, target_id, n_choices):
+        """
+        Return shuffled options for `target_id` whose distractors have images similar to its image.
+
+        Distractors are drawn from the words of the target image's nearest neighbours in the
+        similarity index. Words sharing the target's image are never used, since they could not be
+        told apart. Random words fill in when the index was not built or has too few neighbours.
+        """
+        deck = self.deck
+        target_image = deck.images[target_id]
+        distractors = []
+        index = self.similarity_index()
+        if index is not None:
+            similar = list(index.similar(target_image))
+            self.rng.shuffle(similar)
+            for image in similar:
+                if image == target_image:
+                    continue
+                for word_id in deck.ids_for_image(image):
+                    if word_id not in distractors:
+                        distractors.append(word_id)
+                        break
+                if len(distractors) == n_choices - 1:
+                    break
+        if len(distractors) < n_choices - 1:
+            distractors += sample_distinct_ids(
+                len(deck), n_choices - 1 - len(distractors), {target_id, *distractors}, self.rng
+            )
+        option_ids = [target_id] + distractors
+        self.rng.shuffle(option_ids)
+        return option_ids
+
+    def seed(self, seed):
+        """Seed the random choices of this quiz and of its scheduler, making the next questions reproducible."""
+        self.rng.seed(seed)
+        scheduler_rng = getattr(self.scheduler, "rng", None)
+        if scheduler_rng is not None:
+            scheduler_rng.seed(seed)
+        self.upcoming.clear()
+
+    def peek_upcoming(self, count):
+        """
+        Return the options of the next `count` questions without advancing.
+
+        The questions are picked now and `next_question` will return them in this order.
+        """
+        if not self.deck:
+            return []
+        while len(self.upcoming) < count:
+            self.upcoming.append(self._pick_question())
+        return [[self.deck[i] for i in option_ids] for _, option_ids in list(self.upcoming)[:count]]
+
+    def release_upcoming(self):
+        """Drop the questions picked by `peek_upcoming` and hand their words back to the scheduler."""
+        while self.upcoming:
+            target_id, _ = self.upcoming.pop()
+            self.scheduler.release(target_id)
 
     def next_question(self):
-        if self.questions:
-            options = random.sample(self.questions, 3)
-            self.current_question = options[0]
-            random.shuffle(options)
-            return options
+        if self.deck:
+            if self.current_id is not None:
+                self.scheduler.done(self.current_id)
+            with instrumentation.span("pick_options"):
+                if self.upcoming:
+                    target_id, option_ids = self.upcoming.popleft()
+                else:
+                    target_id, option_ids = self._pick_question()
+            self.current_id = target_id
+            self.option_ids = option_ids
+            self.answered = False
+            return [self.deck[i] for i in option_ids]
         return None
 
+    def generate_batch(self, n, seed=None, n_choices=N_CHOICES):
+        """
+        Draw `n` independent questions at once, e.g. for worksheets or exported quiz sets.
+
+        Targets and distractors are drawn uniformly with NumPy over word IDs, so every question has
+        `n_choices` different options and the target is equally likely at each position. The
+        scheduler and the current question are not touched.
+
+        Args:
+            n (int): Number of questions.
+            seed (Optional[int]): Seed for a reproducible batch.
+            n_choices (int): Options per question.
+
+        Returns:
+            QuizBatch: The option IDs and answer position of each question.
+        """
+        import numpy as np
+
+        from quiz_batch import QuizBatch
+
+        rng = np.random.default_rng(seed)
+        option_ids = sample_distinct_rows(len(self.deck), n, n_choices, rng)
+        # Rows of distinct IDs are uniformly ordered, so any column is a uniformly placed target.
+        answers = rng.integers(0, n_choices, size=n, dtype=np.int8)
+        return QuizBatch(option_ids, answers)
+
+    def word_id(self, option):
+        """Return the deck ID for `option`, which may already be an ID or a `WordData`."""
+        if option is None:
+            return None
+        if isinstance(option, Integral):
+            return int(option)
+        return self.deck.id_of(option)
+
     def check_answer(self, selected_option):
+        """
+        Check an answer given either as a word ID or as a `WordData`.
+
+        Only the first answer to a question is reported to the scheduler and the progress store.
+        """
         self.attempts += 1
-        if selected_option == self.current_question:
+        selected_id = self.word_id(selected_option)
+        correct = self.current_id is not None and selected_id == self.current_id
+        if self.current_id is not None and not self.answered:
+            self.answered = True
+            if self.scheduler.uses_answers:
+                # Picked before this answer was known, see `peek_upcoming`.
+                self.release_upcoming()
+            self.scheduler.record(self.current_id, selected_id, correct)
+            if self.progress_store is not None:
+                self.progress_store.record_answer(
+                    self.user_id, self.language, self.deck.words[self.current_id], correct
+                )
+        if correct:
             self.score += 1
             return True
         return False
 
+    def restore_progress(self):
+        """Continue from the score and attempts saved in the progress store, if there is one."""
+        if self.progress_store is not None:
+            self.score, self.attempts = self.progress_store.get_stats(self.user_id)
+
     def get_score(self):
         return self.score
 
     def get_attempts(self):
         return self.attempts
 
-    def image_path_for_word(self, option):
-        image_path = os.path.join(self.root_dir, "word_images", option.image)
+    def image_variant_path(self, image, size):
+        """
+        Return the path of the smallest prebuilt variant of `image` that is at least `size` pixels.
+
+        Variants are written by the `build-assets` command. If there is none that large, or the
+        assets were not built, the path of the original image is returned.
+        """
+        # Shared and reloaded when the manifest file changes, so assets built after startup are used.
+        manifest = load_manifest(self.root_dir)
+        if manifest is not None:
+            variant = manifest.variant_for(image, size)
+            if variant is not None:
+                return os.path.join(self.root_dir, variant)
+        return os.path.join(self.root_dir, "word_images", image)
+
+    def image_path_for_word(self, option, size=None):
+        """
+        Return the image path for a word given as an ID or a `WordData`.
+
+        Args:
+            option: The word.
+            size (Optional[int]): The size the image will be displayed at in pixels. If given, the
+                smallest prebuilt variant that fits is returned instead of the original image.
+        """
+        if size is not None:
+            image = self.deck.images[option] if isinstance(option, Integral) else option.image
+            return self.image_variant_path(image, size)
+        if isinstance(option, Integral) and self.deck.image_paths is not None:
+            return os.path.join(self.root_dir, self.deck.image_paths[option])
+        image = self.deck.images[option] if isinstance(option, Integral) else option.image
+        image_path = os.path.join(self.root_dir, "word_images", image)
         return image_path
 
     def sound_path_for_word(self, option):
-        sound_dir = "word_sounds" if self.language == "en" else f"word_sounds_{self.language}"
-        filename = option.filename
+        if isinstance(option, Integral) and self.deck.sound_paths is not None:
+            sound_path = self.deck.sound_paths[option]
+            # Compiled for another backend's format otherwise.
+            if sound_path.endswith(self.sound_extension):
+                return os.path.join(self.root_dir, sound_path)
+        filename = self.deck.filenames[option] if isinstance(option, Integral) else option.filename
         return os.path.join(
-            self.root_dir, sound_dir, filename + ".mp3"
+            self.root_dir, self.sound_dir(), filename + self.sound_extension
         )
 
+    def sound_dir(self):
+        """Return the name of the directory holding this language's word sounds."""
+        return "word_sounds" if self.language == "en" else f"word_sounds_{self.language}"
+
     def set_questions(self, word_data):
-        self.questions = word_data
+        self.deck = word_data if isinstance(word_data, Deck) else Deck.from_word_data(word_data)
+        self.current_id = None
+        self.option_ids = None
+        self.answered = False
+        self.upcoming.clear()
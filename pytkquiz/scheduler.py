@@ -0,0 +1,210 @@
+import heapq
+import os
+import random
+from collections import deque
+
+# Number of questions until a word is due again, by Leitner box. Even a missed word waits for one
+# other question so it is not asked twice in a row.
+LEITNER_INTERVALS = (2, 4, 8, 20, 50, 120, 300)
+CONFUSION_MEMORY = 8
+# Environment variable naming the scheduler the apps use, see `SCHEDULERS`.
+SCHEDULER_ENV = "PYTKQUIZ_SCHEDULER"
+DEFAULT_SCHEDULER = "random"
+
+
+def sample_distinct_ids(deck_size: int, count: int, exclude: set, rng: random.Random) -> list:
+    """
+    Draw `count` random IDs below `deck_size` that are not in `exclude` and are all different.
+
+    Uses rejection sampling, which takes expected constant time when the deck is much larger than
+    `count`, unlike `random.sample(range(deck_size), ...)` over the whole range.
+    """
+    if deck_size - len(exclude) < count:
+        raise ValueError(f"Need at least {count + len(exclude)} words, the deck has {deck_size}.")
+    picked = []
+    seen = set(exclude)
+    while len(picked) < count:
+        word_id = rng.randrange(deck_size)
+        if word_id not in seen:
+            seen.add(word_id)
+            picked.append(word_id)
+    return picked
+
+
+def sample_distinct_rows(deck_size: int, n_rows: int, count: int, rng: "numpy.random.Generator") -> "numpy.ndarray":
+    """
+    Draw `n_rows` rows of `count` different random IDs below `deck_size`, all rows at once.
+
+    Column j is drawn from the `deck_size - j` IDs not used by the earlier columns of its row, by
+    drawing below `deck_size - j` and stepping over each earlier ID in ascending order. Every
+    ordered row of distinct IDs is equally likely, and no row is ever redrawn.
+
+    Returns:
+        np.ndarray: An `(n_rows, count)` array of IDs.
+    """
+    # Imported here, NumPy takes longer to import than the rest of the quiz logic together.
+    import numpy as np
+
+    if deck_size < count:
+        raise ValueError(f"Need at least {count} words, the deck has {deck_size}.")
+    dtype = np.int32 if deck_size < 2 ** 31 else np.int64
+    rows = np.empty((n_rows, count), dtype=dtype)
+    for j in range(count):
+        column = rng.integers(0, deck_size - j, size=n_rows, dtype=dtype)
+        for earlier in np.sort(rows[:, :j], axis=1).T:
+            column += column >= earlier
+        rows[:, j] = column
+    return rows
+
+
+class RandomScheduler:
+    """Picks every question uniformly at random and keeps no history."""
+
+    # Whether answers change which questions come next, so questions picked ahead of an answer go stale.
+    uses_answers = False
+
+    def __init__(self, rng: random.Random = None) -> None:
+        self.rng = rng or random.Random()
+
+    def pick(self, deck_size: int, n_choices: int):
+        """Return the target ID and the shuffled option IDs for the next question."""
+        option_ids = sample_distinct_ids(deck_size, n_choices, set(), self.rng)
+        target_id = option_ids[0]
+        self.rng.shuffle(option_ids)
+        return target_id, option_ids
+
+    def record(self, target_id: int, selected_id, correct: bool) -> None:
+        pass
+
+    def done(self, target_id: int) -> None:
+        pass
+
+    def release(self, target_id: int) -> None:
+        pass
+
+
+class LeitnerScheduler(RandomScheduler):
+    """
+    A Leitner-style spaced-repetition scheduler.
+
+    Every word seen so far sits in a box. A correct answer moves it up one box and a wrong answer
+    sends it back to the first, and each box has a longer wait before the word is due again.
+    Time is counted in questions asked. Due words come from a heap ordered by due time, so picking
+    and rescheduling a word costs O(log n). New words are introduced in deck order whenever
+    nothing is due.
+
+    Distractors are preferably words the learner recently confused with the target, taken from a
+    small per-word index, and otherwise random words.
+    """
+
+    uses_answers = True
+
+    def __init__(self, rng: random.Random = None, intervals=LEITNER_INTERVALS) -> None:
+        super().__init__(rng)
+        self.intervals = intervals
+        self.step = 0
+        self.boxes = {}
+        self.due = {}
+        self.confused = {}
+        self._heap = []
+        self._next_new = 0
+        self._in_flight = set()
+
+    def _schedule(self, word_id: int, due: int) -> None:
+        self.due[word_id] = due
+        heapq.heappush(self._heap, (due, word_id))
+
+    def _pop_due(self, only_if_due: bool):
+        while self._heap:
+            due, word_id = self._heap[0]
+            if self.due.get(word_id) != due or word_id in self._in_flight:
+                # Superseded by a later reschedule.
+                heapq.heappop(self._heap)
+                continue
+            if only_if_due and due > self.step:
+                return None
+            heapq.heappop(self._heap)
+            return word_id
+        return None
+
+    def pick(self, deck_size: int, n_choices: int):
+        self.step += 1
+        target_id = self._pop_due(only_if_due=True)
+        if target_id is None and self._next_new < deck_size:
+            target_id = self._next_new
+            self._next_new += 1
+            self.boxes[target_id] = 0
+        if target_id is None:
+            target_id = self._pop_due(only_if_due=False)
+        if target_id is None:
+            # Everything is in flight, e.g. a tiny deck with many prefetched questions.
+            return super().pick(deck_size, n_choices)
+        self._in_flight.add(target_id)
+
+        distractors = [
+            word_id for word_id in self.confused.get(target_id, ()) if word_id < deck_size and word_id != target_id
+        ]
+        distractors = list(dict.fromkeys(distractors))
+        self.rng.shuffle(distractors)
+        distractors = distractors[:n_choices - 1]
+        distractors += sample_distinct_ids(
+            deck_size, n_choices - 1 - len(distractors), {target_id, *distractors}, self.rng
+        )
+
+        option_ids = [target_id] + distractors
+        self.rng.shuffle(option_ids)
+        return target_id, option_ids
+
+    def record(self, target_id: int, selected_id, correct: bool) -> None:
+        """Move the word to its next box and reschedule it."""
+        self._in_flight.discard(target_id)
+        if correct:
+            box = min(self.boxes.get(target_id, 0) + 1, len(self.intervals) - 1)
+        else:
+            box = 0
+            if selected_id is not None and selected_id != target_id:
+                self.confused.setdefault(target_id, deque(maxlen=CONFUSION_MEMORY)).append(selected_id)
+                self.confused.setdefault(selected_id, deque(maxlen=CONFUSION_MEMORY)).append(target_id)
+        self.boxes[target_id] = box
+        self._schedule(target_id, self.step + self.intervals[box])
+
+    def done(self, target_id: int) -> None:
+        """Put back a word whose question was skipped without an answer."""
+        if target_id in self._in_flight:
+            self._in_flight.discard(target_id)
+            self._schedule(target_id, self.step + self.intervals[0])
+
+    def release(self, target_id: int) -> None:
+        """
+        Undo the pick of a question that was never asked, e.g. one picked ahead of an answer.
+
+        Release the most recent pick first. The word is due again as before, and a new word is
+        due at once, so the next pick takes the answer into account.
+        """
+        self.step -= 1
+        if target_id in self._in_flight:
+            self._in_flight.discard(target_id)
+            due = self.due.get(target_id)
+            if due is None:
+                self._schedule(target_id, self.step)
+            else:
+                heapq.heappush(self._heap, (due, target_id))
+
+
+SCHEDULERS = {
+    "random": RandomScheduler,
+    "leitner": LeitnerScheduler,
+}
+
+
+def scheduler_name(name: str = None) -> str:
+    """Return `name`, or the scheduler set in `PYTKQUIZ_SCHEDULER`, checked against `SCHEDULERS`."""
+    name = name or os.environ.get(SCHEDULER_ENV) or DEFAULT_SCHEDULER
+    if name not in SCHEDULERS:
+        raise ValueError(f"Unknown scheduler {name!r}, expected one of {', '.join(SCHEDULERS)}.")
+    return name
+
+
+def make_scheduler(name: str = None, rng: random.Random = None) -> RandomScheduler:
+    """Create the scheduler called `name`, or the one set in `PYTKQUIZ_SCHEDULER`."""
+    return SCHEDULERS[scheduler_name(name)](rng)
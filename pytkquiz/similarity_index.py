@@ -0,0 +1,340 @@
+import argparse
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+import numpy as np
+
+INDEX_NAME = "image_similarity.npz"
+INDEX_VERSION = 1
+# dHash of a 9x8 grayscale thumbnail, 64 bits per image.
+HASH_WIDTH = 9
+HASH_HEIGHT = 8
+# Colour histograms over 4 levels per RGB channel of a 16x16 thumbnail.
+HIST_LEVELS = 4
+HIST_SHIFT = 6
+HIST_BINS = HIST_LEVELS ** 3
+HIST_SIDE = 16
+# Neighbours kept per image, distractors are drawn from these.
+DEFAULT_NEIGHBOURS = 8
+# Clusters searched around each image's own cluster when building the neighbour table.
+DEFAULT_NPROBE = 4
+KMEANS_ITERATIONS = 8
+KMEANS_SAMPLE_PER_CLUSTER = 64
+DEFAULT_WORKERS = 4
+DECODE_CHUNK = 256
+
+
+def index_path(root_dir: str) -> str:
+    return os.path.join(root_dir, INDEX_NAME)
+
+
+def decode_image(path: str):
+    """
+    Decode `path` into the small thumbnails the features are computed from.
+
+    JPEGs are decoded at a reduced scale with `draft`, so the full image is never decompressed.
+
+    Returns:
+        tuple: An `(HASH_HEIGHT, HASH_WIDTH)` grayscale array and a `(HIST_SIDE * HIST_SIDE, 3)` RGB array.
+    """
+    from PIL import Image
+
+    with Image.open(path) as img:
+        img.draft("RGB", (HIST_SIDE * 2, HIST_SIDE * 2))
+        rgb = img.convert("RGB").resize((HIST_SIDE, HIST_SIDE), Image.BILINEAR)
+    gray = rgb.convert("L").resize((HASH_WIDTH, HASH_HEIGHT), Image.BILINEAR)
+    return np.asarray(gray, dtype=np.uint8), np.asarray(rgb, dtype=np.uint8).reshape(-1, 3)
+
+
+def _decode_chunk(paths):
+    grays, rgbs, errors = [], [], {}
+    for i, path in enumerate(paths):
+        try:
+            gray, rgb = decode_image(path)
+        except Exception as e:
+            errors[i] = str(e)
+            continue
+        grays.append(gray)
+        rgbs.append(rgb)
+    return grays, rgbs, errors
+
+
+def difference_hashes(grays: np.ndarray) -> np.ndarray:
+    """
+    Return the 64-bit dHash of each `(HASH_HEIGHT, HASH_WIDTH)` grayscale thumbnail, all at once.
+
+    Bit `8 * row + col` is set when a pixel is brighter than its right-hand neighbour.
+    """
+    bits = grays[:, :, 1:] > grays[:, :, :-1]
+    return np.packbits(bits.reshape(len(grays), -1), axis=1).view(">u8").ravel().astype(np.uint64)
+
+
+def colour_histograms(rgbs: np.ndarray) -> np.ndarray:
+    """Return the L2-normalized `HIST_BINS` colour histogram of each `(pixels, 3)` RGB thumbnail."""
+    n = len(rgbs)
+    levels = rgbs >> HIST_SHIFT
+    bins = (levels[:, :, 0].astype(np.int64) * HIST_LEVELS + levels[:, :, 1]) * HIST_LEVELS + levels[:, :, 2]
+    bins += np.arange(n, dtype=np.int64)[:, None] * HIST_BINS
+    hist = np.bincount(bins.ravel(), minlength=n * HIST_BINS).reshape(n, HIST_BINS).astype(np.float32)
+    hist /= np.maximum(np.linalg.norm(hist, axis=1, keepdims=True), 1e-12)
+    return hist
+
+
+def hamming_distances(hash_: int, hashes: np.ndarray) -> np.ndarray:
+    """Return the number of differing bits between `hash_` and each of `hashes`."""
+    return np.bitwise_count(hashes ^ np.uint64(hash_))
+
+
+def feature_vectors(hashes: np.ndarray, histograms: np.ndarray) -> np.ndarray:
+    """
+    Return one vector per image whose squared Euclidean distances combine both features.
+
+    The histogram part contributes `2 * (1 - cosine similarity)` and the hash bits, scaled by 1/8,
+    contribute the Hamming distance over 64, so both lie between 0 and 2 and count about equally.
+    """
+    bits = np.unpackbits(hashes.astype(">u8").view(np.uint8).reshape(len(hashes), 8), axis=1)
+    return np.hstack([histograms, bits.astype(np.float32) / 8])
+
+
+def _squared_distances(a: np.ndarray, b: np.ndarray, b_norms: np.ndarray) -> np.ndarray:
+    return np.einsum("ij,ij->i", a, a)[:, None] - 2 * (a @ b.T) + b_norms[None, :]
+
+
+def _assign(features: np.ndarray, centroids: np.ndarray, block: int = 8192) -> np.ndarray:
+    norms = np.einsum("ij,ij->i", centroids, centroids)
+    labels = np.empty(len(features), dtype=np.int32)
+    for start in range(0, len(features), block):
+        labels[start:start + block] = _squared_distances(features[start:start + block], centroids, norms).argmin(axis=1)
+    return labels
+
+
+def _kmeans(features: np.ndarray, n_clusters: int, rng: np.random.Generator) -> np.ndarray:
+    sample_size = min(len(features), n_clusters * KMEANS_SAMPLE_PER_CLUSTER)
+    sample = features[rng.choice(len(features), sample_size, replace=False)]
+    centroids = sample[rng.choice(sample_size, n_clusters, replace=False)].copy()
+    for _ in range(KMEANS_ITERATIONS):
+        labels = _assign(sample, centroids)
+        counts = np.bincount(labels, minlength=n_clusters)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, labels, sample)
+        filled = counts > 0
+        # An empty cluster keeps its centroid.
+        centroids[filled] = sums[filled] / counts[filled, None]
+    return centroids
+
+
+def nearest_neighbours(features: np.ndarray, k: int = DEFAULT_NEIGHBOURS, n_clusters: Optional[int] = None,
+                       nprobe: int = DEFAULT_NPROBE, seed: int = 0) -> np.ndarray:
+    """
+    Return the `k` nearest other images of every image, nearest first.
+
+    Small sets are searched exhaustively. Larger ones are split into about `sqrt(n)` k-means
+    clusters, and the images of each cluster are compared only with those of the `nprobe`
+    clusters closest to it, so building the table takes about `n * sqrt(n)` distance computations
+    rather than `n * n`. The result is approximate, a true neighbour in a cluster that was not
+    searched can be missed.
+
+    Returns:
+        np.ndarray: An `(n, k)` array of row numbers, with `k` reduced to `n - 1` for tiny sets.
+    """
+    n = len(features)
+    k = min(k, n - 1)
+    neighbours = np.empty((n, max(k, 0)), dtype=np.int32)
+    if k <= 0:
+        return neighbours
+    if n_clusters is None:
+        n_clusters = int(np.sqrt(n)) if n > 4096 else 1
+    n_clusters = max(1, min(n_clusters, n))
+    norms = np.einsum("ij,ij->i", features, features)
+
+    if n_clusters == 1:
+        labels = np.zeros(n, dtype=np.int32)
+        probes = np.zeros((1, 1), dtype=np.int32)
+    else:
+        centroids = _kmeans(features, n_clusters, np.random.default_rng(seed))
+        labels = _assign(features, centroids)
+        centroid_norms = np.einsum("ij,ij->i", centroids, centroids)
+        probes = np.argsort(_squared_distances(centroids, centroids, centroid_norms), axis=1)[:, :nprobe]
+
+    order = np.argsort(labels, kind="stable")
+    bounds = np.searchsorted(labels[order], np.arange(n_clusters + 1))
+    for cluster in range(n_clusters):
+        members = order[bounds[cluster]:bounds[cluster + 1]]
+        if not len(members):
+            continue
+        candidates = np.concatenate([order[bounds[p]:bounds[p + 1]] for p in probes[cluster]])
+        if len(candidates) <= k:
+            candidates = np.arange(n)
+        distances = _squared_distances(features[members], features[candidates], norms[candidates])
+        distances[members[:, None] == candidates[None, :]] = np.inf
+        nearest = np.argpartition(distances, k - 1, axis=1)[:, :k]
+        nearest_distances = np.take_along_axis(distances, nearest, axis=1)
+        nearest = np.take_along_axis(nearest, np.argsort(nearest_distances, axis=1, kind="stable"), axis=1)
+        neighbours[members] = candidates[nearest]
+    return neighbours
+
+
+def _image_dir_stamp(root_dir: str) -> int:
+    return os.stat(os.path.join(root_dir, "word_images")).st_mtime_ns
+
+
+class SimilarityIndex:
+    """
+    Perceptual hashes, colour histograms and nearest neighbours of the word images.
+
+    Built ahead of time by the `build-similarity` command and stored as `image_similarity.npz`
+    next to the decks. The neighbours of every image are computed at build time, so looking up
+    the images similar to one is a dictionary lookup and an array row, whatever the size of the
+    deck. The index records the modification time of `word_images` and is ignored once images are
+    added or removed, like the compiled decks.
+    """
+
+    def __init__(self, names, hashes: np.ndarray, histograms: np.ndarray, neighbours: np.ndarray,
+                 image_dir_stamp: int = 0) -> None:
+        self.names = list(names)
+        self.hashes = hashes
+        self.histograms = histograms
+        self.neighbours = neighbours
+        self.image_dir_stamp = image_dir_stamp
+        self._rows = {name: row for row, name in enumerate(self.names)}
+        self._similar = {}
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    @classmethod
+    def from_features(cls, names, hashes: np.ndarray, histograms: np.ndarray, k: int = DEFAULT_NEIGHBOURS,
+                      image_dir_stamp: int = 0, **kwargs) -> "SimilarityIndex":
+        """Build the index of already computed features, see `nearest_neighbours` for `kwargs`."""
+        neighbours = nearest_neighbours(feature_vectors(hashes, histograms), k, **kwargs)
+        return cls(names, hashes, histograms, neighbours, image_dir_stamp)
+
+    def similar(self, image: str) -> tuple:
+        """Return the names of the images most similar to `image`, nearest first, or () if unknown."""
+        similar = self._similar.get(image)
+        if similar is None:
+            row = self._rows.get(image)
+            names = self.names
+            similar = () if row is None else tuple(names[i] for i in self.neighbours[row].tolist())
+            self._similar[image] = similar
+        return similar
+
+    def hamming(self, image: str, other: str) -> int:
+        """Return the number of differing dHash bits of two indexed images."""
+        return int(hamming_distances(self.hashes[self._rows[image]], self.hashes[[self._rows[other]]])[0])
+
+    def save(self, path: str) -> None:
+        tmp_path = f"{path}.{os.getpid()}.tmp.npz"
+        np.savez(
+            tmp_path, version=np.int64(INDEX_VERSION), names=np.array(self.names, dtype=str),
+            hashes=self.hashes, histograms=self.histograms, neighbours=self.neighbours,
+            image_dir_stamp=np.int64(self.image_dir_stamp),
+        )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> Optional["SimilarityIndex"]:
+        """Read the index at `path`, or return None if there is no usable one."""
+        try:
+            with np.load(path) as data:
+                if int(data["version"]) != INDEX_VERSION:
+                    print(f"Ignoring similarity index {path}: unsupported version {int(data['version'])}")
+                    return None
+                return cls(data["names"].tolist(), data["hashes"], data["histograms"], data["neighbours"],
+                           int(data["image_dir_stamp"]))
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Ignoring similarity index {path}: {e}")
+            return None
+
+
+def build_index(root_dir: str, image_names, k: int = DEFAULT_NEIGHBOURS, workers: int = DEFAULT_WORKERS):
+    """
+    Decode `image_names` from `word_images` and build their `SimilarityIndex`.
+
+    Images are decoded in chunks across `workers` processes, then the features of all of them are
+    computed with NumPy at once.
+
+    Returns:
+        tuple: The index and a list of `(image_name, error)` for images that could not be decoded.
+    """
+    image_dir = os.path.join(root_dir, "word_images")
+    stamp = _image_dir_stamp(root_dir)
+    image_names = list(image_names)
+    chunks = [image_names[start:start + DECODE_CHUNK] for start in range(0, len(image_names), DECODE_CHUNK)]
+    paths = [[os.path.join(image_dir, name) for name in chunk] for chunk in chunks]
+    names, failed, grays, rgbs = [], [], [], []
+
+    def collect(results):
+        for chunk, (chunk_grays, chunk_rgbs, errors) in zip(chunks, results):
+            names.extend(name for i, name in enumerate(chunk) if i not in errors)
+            failed.extend((chunk[i], error) for i, error in errors.items())
+            grays.extend(chunk_grays)
+            rgbs.extend(chunk_rgbs)
+
+    if workers == 1 or len(chunks) <= 1:
+        collect(map(_decode_chunk, paths))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            collect(executor.map(_decode_chunk, paths))
+
+    if not names:
+        empty = np.empty((0,), dtype=np.uint64)
+        return SimilarityIndex([], empty, np.empty((0, HIST_BINS), np.float32), np.empty((0, 0), np.int32), stamp), failed
+    hashes = difference_hashes(np.stack(grays))
+    histograms = colour_histograms(np.stack(rgbs))
+    return SimilarityIndex.from_features(names, hashes, histograms, k, image_dir_stamp=stamp), failed
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def load_index(root_dir: str) -> Optional[SimilarityIndex]:
+    """
+    Return the shared `SimilarityIndex` for `root_dir`.
+
+    Returns None if the index was not built or images were added or removed since.
+    """
+    path = index_path(root_dir)
+    try:
+        mtime = os.stat(path).st_mtime_ns
+        stamp = _image_dir_stamp(root_dir)
+    except FileNotFoundError:
+        return None
+    with _indexes_lock:
+        cached = _indexes.get(root_dir)
+        if cached is not None and cached[0] == mtime:
+            index = cached[1]
+            return index if index is not None and index.image_dir_stamp == stamp else None
+    index = SimilarityIndex.load(path)
+    with _indexes_lock:
+        _indexes[root_dir] = (mtime, index)
+    return index if index is not None and index.image_dir_stamp == stamp else None
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--languages", nargs="+", default=["en", "el"], help="Decks whose images to index.")
+    parser.add_argument("--neighbours", type=int, default=DEFAULT_NEIGHBOURS,
+                        help="Similar images kept per image.")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="Number of decoding processes.")
+
+
+def run(args) -> int:
+    from build_assets import image_names_for_decks
+
+    image_names = image_names_for_decks(args.root_dir, args.languages)
+    start = time.perf_counter()
+    index, failed = build_index(args.root_dir, image_names, args.neighbours, args.workers)
+    index.save(index_path(args.root_dir))
+    for name, error in failed:
+        print(f"Failed to index {name}: {error}")
+    print(
+        f"Indexed {len(index)} images with {index.neighbours.shape[1]} neighbours each "
+        f"in {time.perf_counter() - start:.2f}s to {index_path(args.root_dir)}"
+    )
+    return 1 if failed else 0
@@ -0,0 +1,142 @@
+import contextlib
+import hashlib
+import os
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable
+
+import instrumentation
+
+try:
+    import fcntl
+except ImportError:  # Windows, where only threads of one process are coordinated.
+    fcntl = None
+
+LOCK_DIR = os.path.join(tempfile.gettempdir(), "pytkquiz-locks")
+# Threads producing the results of `run_once(..., wait=False)` calls.
+BACKGROUND_WORKERS = 4
+
+
+class KeyedLock:
+    """A lock per key, created on first use and dropped again when nobody holds or waits for it."""
+
+    def __init__(self) -> None:
+        self._locks = {}
+        self._guard = threading.Lock()
+
+    @contextlib.contextmanager
+    def hold(self, key: str, blocking: bool = True):
+        """Hold the lock for `key`. Yields False if `blocking` is False and it is taken."""
+        with self._guard:
+            entry = self._locks.get(key)
+            if entry is None:
+                entry = self._locks[key] = [threading.Lock(), 0]
+            entry[1] += 1
+        acquired = entry[0].acquire(blocking)
+        try:
+            yield acquired
+        finally:
+            if acquired:
+                entry[0].release()
+            with self._guard:
+                entry[1] -= 1
+                if entry[1] == 0:
+                    del self._locks[key]
+
+    def __len__(self) -> int:
+        with self._guard:
+            return len(self._locks)
+
+
+def lock_path(key: str) -> str:
+    return os.path.join(LOCK_DIR, hashlib.sha1(key.encode("utf-8")).hexdigest() + ".lock")
+
+
+@contextlib.contextmanager
+def file_lock(key: str, blocking: bool = True):
+    """
+    Hold an exclusive `flock` for `key`, shared by every process on this machine.
+
+    Lock files live in the temporary directory and are never removed, since removing one while
+    another process waits on it would let a third process lock a new file with the same name.
+    Yields False if `blocking` is False and another process holds the lock.
+    """
+    if fcntl is None:
+        yield True
+        return
+    os.makedirs(LOCK_DIR, exist_ok=True)
+    fd = os.open(lock_path(key), os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+            acquired = True
+        except BlockingIOError:
+            acquired = False
+        try:
+            yield acquired
+        finally:
+            if acquired:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+    finally:
+        os.close(fd)
+
+
+_keyed_lock = KeyedLock()
+_background = None
+_background_keys = set()
+_background_lock = threading.Lock()
+
+
+def _run_in_background(key: str, is_done: Callable[[], bool], produce: Callable[[], None]) -> None:
+    """Queue `run_once(key, ...)` on the shared background threads, unless it is already queued."""
+    global _background
+    with _background_lock:
+        if key in _background_keys:
+            return
+        _background_keys.add(key)
+        if _background is None:
+            _background = ThreadPoolExecutor(BACKGROUND_WORKERS, thread_name_prefix="single-flight")
+
+    def task():
+        try:
+            run_once(key, is_done, produce)
+        except Exception as e:
+            print(f"Failed to produce {key}: {e}")
+        finally:
+            with _background_lock:
+                _background_keys.discard(key)
+
+    _background.submit(task)
+
+
+def run_once(key: str, is_done: Callable[[], bool], produce: Callable[[], None], wait: bool = True) -> bool:
+    """
+    Call `produce` unless `is_done()`, with at most one caller per key producing at a time.
+
+    Threads of this process first queue on an in-process lock, then one of them takes a file lock
+    shared with other processes. Whoever gets both checks `is_done` again, so requesters that
+    waited for someone else's result do not produce it a second time.
+
+    Args:
+        key (str): Identifies the result, e.g. the absolute path of a sound file.
+        is_done (Callable[[], bool]): Returns True once the result exists.
+        produce (Callable[[], None]): Creates the result. It should write it atomically.
+        wait (bool): If False, return at once. A missing result is then produced on a background
+            thread, which like any other caller first waits for a producer that is already at work.
+
+    Returns:
+        bool: True if the result is available, False if `wait` is False and it is not ready yet.
+    """
+    if not wait:
+        if is_done():
+            return True
+        _run_in_background(key, is_done, produce)
+        instrumentation.count("single_flight_busy")
+        return False
+    with _keyed_lock.hold(key), file_lock(key):
+        if is_done():
+            instrumentation.count("single_flight_shared")
+            return True
+        produce()
+    return True
@@ -1,23 +1,164 @@
 import os
+import threading
 
-import gtts
+import instrumentation
+import single_flight
 
+FEEDBACK_PHRASES = ["Yes, that's correct!", "Sorry, that's incorrect!"]
+# Name of the text-to-speech backend to use, one of `SYNTHESIZERS`. gTTS if not set.
+TTS_BACKEND_ENV = "PYTKQUIZ_TTS"
 
-def generate_sound_if_not_found(language, text, sound_path: str):
+
+class GTTSSynthesizer:
+    """Text-to-speech backend using gTTS. Needs network access."""
+
+    extension = ".mp3"
+
+    def voice_id(self, language: str) -> str:
+        """Identify the voice used for `language`, so clips from different voices are cached apart."""
+        return f"gtts:{language}"
+
+    def save(self, language: str, text: str, sound_path: str) -> None:
+        # Imported on first use, it pulls in `requests` and adds noticeably to startup.
+        import gtts
+
+        if language == "en":
+            tts = gtts.gTTS(text)
+        else:
+            tts = gtts.gTTS(text, lang=language, slow=False)
+        tts.save(sound_path)
+
+
+class Pyttsx3Synthesizer:
+    """
+    Offline text-to-speech backend using the speech engine of the operating system through pyttsx3.
+
+    pyttsx3 is an optional dependency, only needed when this backend is selected. The voice is the
+    first installed one that lists the requested language, or the engine's default voice.
+    """
+
+    extension = ".wav"
+    # The engines behind pyttsx3 are not thread safe.
+    _lock = threading.Lock()
+
+    def __init__(self, rate: int = 150) -> None:
+        self.rate = rate
+        self._engine = None
+        self._voices = {}
+
+    def _get_engine(self):
+        if self._engine is None:
+            try:
+                import pyttsx3
+            except ImportError as e:
+                raise RuntimeError("The pyttsx3 text-to-speech backend needs `pip install pyttsx3`.") from e
+            self._engine = pyttsx3.init()
+            self._engine.setProperty("rate", self.rate)
+        return self._engine
+
+    def _voice_for(self, language: str):
+        if language not in self._voices:
+            voice_id = None
+            for voice in self._get_engine().getProperty("voices"):
+                languages = [
+                    lang.decode("utf-8", "ignore") if isinstance(lang, bytes) else str(lang)
+                    for lang in (voice.languages or [])
+                ]
+                if any(language in lang.lower() for lang in languages) or language in voice.id.lower():
+                    voice_id = voice.id
+                    break
+            self._voices[language] = voice_id
+        return self._voices[language]
+
+    def voice_id(self, language: str) -> str:
+        with self._lock:
+            return f"pyttsx3:{self._voice_for(language) or 'default'}:{self.rate}"
+
+    def save(self, language: str, text: str, sound_path: str) -> None:
+        with self._lock:
+            engine = self._get_engine()
+            voice = self._voice_for(language)
+            if voice is not None:
+                engine.setProperty("voice", voice)
+            engine.save_to_file(text, sound_path)
+            engine.runAndWait()
+
+
+SYNTHESIZERS = {
+    "gtts": GTTSSynthesizer,
+    "pyttsx3": Pyttsx3Synthesizer,
+}
+
+
+def default_backend() -> str:
+    """Return the name of the backend set in the `PYTKQUIZ_TTS` environment variable, gTTS by default."""
+    name = os.environ.get(TTS_BACKEND_ENV, "gtts")
+    if name not in SYNTHESIZERS:
+        raise ValueError(f"Unknown {TTS_BACKEND_ENV} backend {name!r}, expected one of {sorted(SYNTHESIZERS)}")
+    return name
+
+
+def default_synthesizer():
+    """Return the backend named by the `PYTKQUIZ_TTS` environment variable, gTTS by default."""
+    return SYNTHESIZERS[default_backend()]()
+
+
+def default_extension() -> str:
+    """Return the file extension of the clips the default backend writes, without creating it."""
+    return SYNTHESIZERS[default_backend()].extension
+
+
+def save_atomically(synthesizer, language: str, text: str, sound_path: str) -> None:
+    """
+    Synthesize `text` into a temporary file next to `sound_path` and rename it into place.
+
+    Readers never see a partly written clip, and a failed attempt leaves nothing behind.
+
+    Raises:
+        ValueError: If `sound_path` does not have the extension of the format the backend writes.
+    """
+    if not sound_path.endswith(synthesizer.extension):
+        raise ValueError(f"{type(synthesizer).__name__} writes {synthesizer.extension} files, not {sound_path}")
+    directory = os.path.dirname(sound_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    root, ext = os.path.splitext(sound_path)
+    tmp_path = f"{root}.{os.getpid()}.{threading.get_ident()}.tmp{ext}"
+    try:
+        with instrumentation.span("tts_generate"):
+            synthesizer.save(language, text, tmp_path)
+        os.replace(tmp_path, sound_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def generate_sound_if_not_found(language, text, sound_path: str, synthesizer=None, wait=True):
     """
     Generates a sound file for the given text if it doesn't already exist.
 
+    Concurrent requests for the same file, from threads or other processes, are coordinated so
+    the text is synthesized once, see `single_flight.run_once`.
+
     Args:
         text (str): The text to generate the sound file for.
         sound_path (str): The path to save the generated sound file.
+        synthesizer: The text-to-speech backend to use, `default_synthesizer()` if not given.
+        wait (bool): If False, return at once and generate a missing file in the background.
 
     Returns:
-        None
+        bool: True if the file exists, False if `wait` is False and it is not ready yet.
     """
-    if not os.path.exists(sound_path):
-        if language == "en":
-            tts = gtts.gTTS(text)
-        else:
-            tts = gtts.gTTS(text, lang=language, slow=False)
-        tts.save(sound_path)
-        print(f"Generated sound for {sound_path}")
\ No newline at end of file
+    with instrumentation.span("sound_check"):
+        exists = os.path.exists(sound_path)
+    if exists:
+        return True
+
+    def produce():
+        save_atomically(synthesizer or default_synthesizer(), language, text, sound_path)
+        instrumentation.count("sound_generated")
+        print(f"Generated sound for {sound_path}")
+
+    return single_flight.run_once(
+        os.path.abspath(sound_path), lambda: os.path.exists(sound_path), produce, wait=wait
+    )
@@ -1,14 +1,28 @@
 import os
+import uuid
+
 import streamlit as st
-from PIL import Image
 import gtts
 import base64
 
 from streamlit.components.v1 import html
 from streamlit_card import card
 
+from audio_cache import shared_audio_cache
+import instrumentation
+from audio_assets import HIDDEN_AUDIO_CSS, shared_assets
+from audio_processing import shared_processor
+from deck_registry import shared_registry
+from image_payloads import shared_payloads
+from progress_store import progress_db_path, shared_store
+from question_token import shared_tokens
 from sound_gen import generate_sound_if_not_found
-from quiz_logic import QuizLogic, WordData
+from quiz_logic import HARD_MODE_UNAVAILABLE, QuizLogic, WordData
+from scheduler import SCHEDULERS, make_scheduler, scheduler_name
+
+# Width in pixels of the image variant to show. A column is a third of the page, about 230 px
+# wide, and this leaves room for high DPI screens.
+IMAGE_DISPLAY_SIZE = 360
 
 
 class StreamlitLanguageQuizApp:
@@ -16,36 +30,110 @@ class StreamlitLanguageQuizApp:
         self.audio_button = None
         self.question_fragment = None
         self.root_dir = os.path.abspath(os.path.join(__file__, "..", ".."))
+        self.progress_store = shared_store(progress_db_path(self.root_dir))
+        self.audio_assets = shared_assets(self.root_dir)
+        self.audio_cache = shared_audio_cache(self.root_dir)
+        self.audio_processor = shared_processor(self.root_dir)
+        self.image_payloads = shared_payloads(IMAGE_DISPLAY_SIZE)
+        self.question_tokens = shared_tokens(self.root_dir)
+        # Audio and image bytes sent by this run of the script.
+        self.audio_bytes_sent = 0
+        self.image_bytes_sent = 0
+        self.user_id = self.get_user_id()
+        # The decks of all languages are loaded once and shared by all sessions, only per-user state
+        # lives in the session.
+        self.registry = shared_registry(self.root_dir)
         self.quiz_logic = QuizLogic(root_dir=self.root_dir)
-        self.language = 'en'
-        #words_path = os.path.join(self.root_dir, "words.csv")
+        self.language = st.session_state.get('language', 'en')
+        self.difficulty = st.session_state.get('difficulty', 'easy')
+        # Set from the sidebar, see `show_settings`.
+        self.scheduler_name = st.session_state.get('scheduler') or scheduler_name()
 
         self.update_language(load_next=False)
 
-        if 'current_question' not in st.session_state:
+        if 'question' not in st.session_state:
+            self.quiz_logic.restore_progress()
+            self.quiz_logic.seed(uuid.uuid4().int)
             self.next_question()
         else:
-            self.quiz_logic.current_question = st.session_state.current_question
-            self.quiz_logic.options = st.session_state.options
             self.quiz_logic.score = st.session_state.score
             self.quiz_logic.attempts = st.session_state.attempts
+            if not self.restore_question(st.session_state.question):
+                # The deck changed since this question was asked.
+                self.next_question()
+
+    @staticmethod
+    def get_user_id():
+        """
+        Return the learner's ID, kept in the page URL so progress survives new sessions.
+        """
+        if 'user' not in st.query_params:
+            st.query_params['user'] = uuid.uuid4().hex
+        return st.query_params['user']
 
     def update_language(self, load_next=True):
-        if self.language == "en":
-            words_path = os.path.join(self.root_dir, "words.csv")
-        else:
-            words_path = os.path.join(self.root_dir, "words_" + self.language + ".csv")
-        word_col_index = 0 if self.language == "en" else 4
-        self.quiz_logic = QuizLogic(root_dir=self.root_dir, language=self.language)
-        self.quiz_logic.load_word_data(words_path, word_col_index)
+        """
+        Switch to the deck of `self.language`, keeping the session's score and attempts.
+
+        The deck comes from the shared registry, which loaded every language up front, so this
+        reads no files.
+        """
+        previous = self.quiz_logic
+        self.quiz_logic = QuizLogic(
+            root_dir=self.root_dir,
+            language=self.language,
+            progress_store=self.progress_store,
+            user_id=self.user_id,
+            difficulty=self.difficulty,
+            scheduler=self.session_scheduler(),
+        )
+        self.quiz_logic.set_questions(self.registry.deck(self.language))
+        self.quiz_logic.score, self.quiz_logic.attempts = previous.score, previous.attempts
+        st.session_state.language = self.language
 
         if load_next:
             self.next_question()
 
+    def session_scheduler(self):
+        """
+        Return this session's scheduler for the current language.
+
+        A Leitner scheduler remembers every answer, so one per language is kept in the session and
+        survives reruns, unlike the `QuizLogic` around it.
+        """
+        schedulers = st.session_state.setdefault('schedulers', {})
+        scheduler = schedulers.get(self.language)
+        if type(scheduler) is not SCHEDULERS[self.scheduler_name]:
+            scheduler = schedulers[self.language] = make_scheduler(self.scheduler_name)
+        return scheduler
+
+    def restore_question(self, token: str) -> bool:
+        """
+        Show the question of a token saved by this or any other server process.
+
+        The session only keeps the token, so no `WordData` or other live objects are tied to the
+        process that asked the question.
+
+        Returns:
+            bool: False if the token is not valid for the current deck.
+        """
+        question = self.question_tokens.decode(token, self.quiz_logic.deck)
+        if question is None or question.language != self.language:
+            return False
+        self.quiz_logic.current_id = question.target_id
+        self.quiz_logic.option_ids = question.option_ids
+        self.quiz_logic.answered = st.session_state.get('answered', False)
+        self.quiz_logic.seed(question.seed)
+        return True
+
     def next_question(self):
-        options = self.quiz_logic.next_question()
-        st.session_state.current_question = self.quiz_logic.current_question
-        st.session_state.options = options
+        self.quiz_logic.next_question()
+        # Drawn from the seeded generator, so every process continues the session the same way.
+        seed = self.quiz_logic.rng.getrandbits(64)
+        self.quiz_logic.seed(seed)
+        st.session_state.question = self.question_tokens.encode(
+            self.quiz_logic.deck, self.language, self.quiz_logic.current_id, self.quiz_logic.option_ids, seed
+        )
         st.session_state.answered = False
         st.session_state.message = ''
         st.session_state.score = self.quiz_logic.score
@@ -70,6 +158,14 @@ class StreamlitLanguageQuizApp:
             self.language = language
             self.update_language()
 
+        # Hard mode takes effect from the next question.
+        difficulty = "hard" if st.toggle("Similar-looking pictures", key="hard_mode") else "easy"
+        if self.difficulty != difficulty:
+            self.difficulty = self.quiz_logic.difficulty = difficulty
+            st.session_state.difficulty = difficulty
+        if difficulty == "hard" and not self.quiz_logic.hard_mode_available():
+            st.warning(HARD_MODE_UNAVAILABLE)
+
         c1, c2 = st.columns(2)
 
         with c1:
@@ -78,7 +174,7 @@ class StreamlitLanguageQuizApp:
             st.metric("Attempts", st.session_state.attempts)
 
         res = card(
-            title=st.session_state.current_question.word,
+            title=self.quiz_logic.current_question.word,
             text="",
             styles={
                 "card": {
@@ -103,16 +199,20 @@ class StreamlitLanguageQuizApp:
 
         # Display images
         cols = st.columns(3)
-        for i, option in enumerate(st.session_state.options):
+        for i, option_id in enumerate(self.quiz_logic.option_ids):
+            option = self.quiz_logic.deck[option_id]
             with cols[i]:
-                image_path = self.quiz_logic.image_path_for_word(option)
-                image = Image.open(image_path)
-                st.image(image, use_column_width=True)
+                image_path = self.quiz_logic.image_path_for_word(option_id, size=IMAGE_DISPLAY_SIZE)
+                with instrumentation.span("image_load"):
+                    payload = self.image_payloads.get(image_path)
+                    st.image(payload.data, output_format="JPEG", use_column_width=True)
+                self.image_bytes_sent += len(payload.data)
+                instrumentation.count("image_bytes", len(payload.data))
                 self.audio_element_for_word(option)
 
                 if st.button(f"Select", key=f"select_{i}"):
                     if not st.session_state.answered:
-                        self.check_answer(option)
+                        self.check_answer(option_id)
                     # TODO: get this to not let them change their answer.
 
         # Display message
@@ -127,17 +227,49 @@ class StreamlitLanguageQuizApp:
 
     def run(self):
         st.title("Sight Words Quiz")
-        self.show_word()
+        # Injected once per page, it hides the containers of the autoplaying feedback clips.
+        st.write(HIDDEN_AUDIO_CSS, unsafe_allow_html=True)
+        with instrumentation.span("render_question"):
+            self.show_word()
+        self.show_settings()
+        self.show_metrics()
+
+    def show_settings(self):
+        """Let the learner choose how questions are picked, from the next question on."""
+        names = list(SCHEDULERS)
+        with st.sidebar:
+            st.selectbox(
+                "Question order:", names, index=names.index(self.scheduler_name), key="scheduler",
+                format_func={"random": "Random", "leitner": "Spaced repetition"}.get,
+            )
 
-    def check_answer(self, selected_option: WordData):
-        correct = self.quiz_logic.check_answer(selected_option)
+    @staticmethod
+    def show_metrics():
+        """Show the p50/p95 of each question stage in the sidebar when PYTKQUIZ_METRICS is set."""
+        metrics = instrumentation.active()
+        if metrics is None:
+            return
+        summary = metrics.summary()
+        with st.sidebar:
+            st.subheader("Timings")
+            st.table([
+                {"stage": name, "count": stage["count"], "p50 ms": round(stage["p50_ms"], 2),
+                 "p95 ms": round(stage["p95_ms"], 2)}
+                for name, stage in summary["stages"].items()
+            ])
+            if summary["counters"]:
+                st.table([{"counter": name, "total": total} for name, total in summary["counters"].items()])
+
+    def check_answer(self, selected_id: int):
+        correct = self.quiz_logic.check_answer(selected_id)
+        current_question = self.quiz_logic.current_question
         if correct:
-            st.session_state.message = f"That's correct! \n\nDefinition: {st.session_state.current_question.definition}"
+            st.session_state.message = f"That's correct! \n\nDefinition: {current_question.definition}"
             self.speak_text("Yes, that's correct!")
             st.balloons()
         else:
-            st.session_state.message = f"""Sorry, that's incorrect. The correct answer was {st.session_state.current_question.word}.
-            Definition: {st.session_state.current_question.definition}"""
+            st.session_state.message = f"""Sorry, that's incorrect. The correct answer was {current_question.word}.
+            Definition: {current_question.definition}"""
             self.speak_text("Sorry, that's incorrect!")
             st.subheader("Sorry :sob:")
 
@@ -147,30 +279,30 @@ class StreamlitLanguageQuizApp:
 
     def audio_element_for_word(self, word: WordData):
         sound_path = self.quiz_logic.sound_path_for_word(word)
-        return self.show_audio(sound_path, word.word)
+        # Another session may be generating this clip, show a placeholder rather than wait for it.
+        if not generate_sound_if_not_found(self.language, word.word, sound_path, wait=False):
+            return st.caption("Preparing audio...")
+        return self.show_audio(sound_path)
 
     def speak_text(self, text: str):
-        safe_name = ''.join(c if c.isalnum() else "_" for c in text)
-        sound_path = os.path.join(self.root_dir, "word_sounds", safe_name.lower() + ".mp3")
-        return self.show_audio(sound_path, safe_name, hidden=True, autoplay=True)
-
-    def show_audio(self, sound_path, word, hidden=False, autoplay=False):
-        generate_sound_if_not_found(self.language, word, sound_path)
-        audio_file = open(sound_path, 'rb')
-        audio_bytes = audio_file.read()
-        st.write("""
-                  <style>
-                    div[data-testid="stVerticalBlockBorderWrapper"]:has(
-                      >div>div>div[data-testid="element-container"] 
-                      .hide-the-container
-                    ) {
-                      display: none; 
-                    }
-                  </style>
-                  """, unsafe_allow_html=True)
+        sound_path = self.audio_cache.get(self.language, text, wait=False)
+        if sound_path is None:
+            return None
+        return self.show_audio(sound_path, hidden=True, autoplay=True)
+
+    def show_audio(self, sound_path, hidden=False, autoplay=False):
+        with instrumentation.span("audio_source"):
+            # Clips are trimmed and normalized once, in the background on first use, and shared by
+            # every session. Until then the original clip is sent.
+            sound_path = self.audio_processor.get(sound_path, wait=False)
+            source = self.audio_assets.source_for(sound_path)
+        if isinstance(source, bytes):
+            self.audio_bytes_sent += len(source)
+            instrumentation.count("audio_bytes_inline", len(source))
+        audio_format = "audio/wav" if sound_path.endswith(".wav") else "audio/mpeg"
 
         with st.container():
-            audio_elem = st.audio(audio_bytes, format='audio/mpeg', autoplay=autoplay)
+            audio_elem = st.audio(source, format=audio_format, autoplay=autoplay)
             if hidden:
                 st.write('<span class="hide-the-container"/>', unsafe_allow_html=True)
 
@@ -0,0 +1,75 @@
+import os
+import tempfile
+import unittest
+import warnings
+
+from audio_assets import AudioAssets
+
+
+class TestAudioAssets(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.root_dir = self.tmp_dir.name
+        os.makedirs(os.path.join(self.root_dir, "word_sounds"))
+        self.paths = []
+        for word in ["cat", "dog", "goat"]:
+            path = os.path.join(self.root_dir, "word_sounds", word + ".mp3")
+            with open(path, "wb") as f:
+                f.write(word.encode() * 100)
+            self.paths.append(path)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_reads_are_cached_and_files_closed(self):
+        assets = AudioAssets(self.root_dir)
+        with warnings.catch_warnings():
+            warnings.simplefilter("error", ResourceWarning)
+            first = assets.read(self.paths[0])
+            second = assets.read(self.paths[0])
+
+        self.assertIs(first, second)
+        self.assertEqual((assets.hits, assets.misses), (1, 1))
+
+    def test_changed_file_is_read_again(self):
+        assets = AudioAssets(self.root_dir)
+        assets.read(self.paths[0])
+        with open(self.paths[0], "wb") as f:
+            f.write(b"new clip")
+        stat = os.stat(self.paths[0])
+        os.utime(self.paths[0], ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+        self.assertEqual(assets.read(self.paths[0]), b"new clip")
+
+    def test_cache_is_bounded(self):
+        assets = AudioAssets(self.root_dir, max_bytes=700)
+        for path in self.paths:
+            assets.read(path)
+
+        self.assertLessEqual(assets.cached_bytes, 700)
+        self.assertEqual(assets.stats()["cached_clips"], 2)
+
+    def test_memory_is_shared_by_sessions(self):
+        assets = AudioAssets(self.root_dir)
+        for _session in range(1000):
+            for path in self.paths:
+                assets.source_for(path)
+
+        stats = assets.stats()
+        self.assertEqual(stats["misses"], 3)
+        self.assertEqual(stats["cached_bytes"], sum(os.path.getsize(p) for p in self.paths))
+        self.assertEqual(stats["bytes_inline"], 1000 * stats["cached_bytes"])
+
+    def test_static_urls_send_no_bytes(self):
+        assets = AudioAssets(self.root_dir, base_url="app/static/")
+
+        self.assertEqual(assets.source_for(self.paths[1]), "app/static/word_sounds/dog.mp3")
+        self.assertEqual(assets.stats()["bytes_inline"], 0)
+        with tempfile.NamedTemporaryFile(suffix=".mp3") as outside:
+            outside.write(b"clip")
+            outside.flush()
+            self.assertEqual(assets.source_for(outside.name), b"clip")
+
+
+if __name__ == "__main__":
+    unittest.main()
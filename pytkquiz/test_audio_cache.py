@@ -0,0 +1,149 @@
+import os
+import tempfile
+import threading
+import unittest
+from unittest.mock import patch
+
+from audio_cache import AudioCache, add_shipped_feedback_clips
+from sound_gen import TTS_BACKEND_ENV, GTTSSynthesizer, Pyttsx3Synthesizer, default_extension, save_atomically
+
+
+class FakeSynthesizer:
+    extension = ".mp3"
+
+    def __init__(self, voice="fake", fail=False):
+        self.voice = voice
+        self.fail = fail
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def voice_id(self, language):
+        return f"{self.voice}:{language}"
+
+    def save(self, language, text, sound_path):
+        with self.lock:
+            self.calls.append((language, text))
+        if self.fail:
+            raise IOError("no network")
+        with open(sound_path, "w", encoding="utf-8") as f:
+            # Written in pieces, so a reader of a non-atomic write could see a partial clip.
+            for c in f"{language}:{text}":
+                f.write(c)
+                f.flush()
+
+
+class TestAudioCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.cache_dir = os.path.join(self.tmp_dir.name, "audio_cache")
+        self.synthesizer = FakeSynthesizer()
+        self.cache = AudioCache(self.cache_dir, self.synthesizer)
+
+    def read(self, path):
+        with open(path, encoding="utf-8") as f:
+            return f.read()
+
+    def test_synthesizes_once_then_hits_without_reading_files(self):
+        path = self.cache.get("el", "Ναι, σωστά!")
+        with patch("audio_cache.os.path.exists", return_value=True) as mock_exists, \
+                patch("builtins.open") as mock_open:
+            self.assertEqual(self.cache.get("el", "Ναι, σωστά!"), path)
+            mock_exists.assert_called_once_with(path)
+            mock_open.assert_not_called()
+
+        self.assertEqual(self.synthesizer.calls, [("el", "Ναι, σωστά!")])
+        self.assertEqual(self.read(path), "el:Ναι, σωστά!")
+        stats = self.cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"], stats["hit_rate"], stats["clips"]), (1, 1, 0.5, 1))
+        self.assertGreater(stats["synth_p50_ms"], 0)
+
+    def test_deleted_clip_is_synthesized_again(self):
+        path = self.cache.get("en", "hello")
+        os.remove(path)
+
+        self.assertIsNone(self.cache.lookup("en", "hello"))
+        self.assertEqual(self.cache.get("en", "hello"), path)
+        self.assertEqual(self.read(path), "en:hello")
+        self.assertEqual(len(self.synthesizer.calls), 2)
+
+    def test_key_covers_language_normalized_text_and_voice(self):
+        self.assertEqual(self.cache.key("en", "Yes,  that's correct! "), self.cache.key("en", "yes, that's correct!"))
+        self.assertNotEqual(self.cache.key("en", "yes"), self.cache.key("el", "yes"))
+        other_voice = AudioCache(self.cache_dir, FakeSynthesizer(voice="other"))
+        self.assertNotEqual(self.cache.key("en", "yes"), other_voice.key("en", "yes"))
+
+    def test_index_is_shared_with_other_instances(self):
+        path = self.cache.get("en", "hello")
+        other = AudioCache(self.cache_dir, FakeSynthesizer())
+
+        self.assertEqual(other.get("en", "hello"), path)
+        self.assertEqual(other.synthesizer.calls, [])
+        # Entries appended after an instance was created are picked up on a miss.
+        self.cache.get("en", "goodbye")
+        self.assertIsNotNone(other.lookup("en", "goodbye"))
+
+    def test_failed_synthesis_leaves_nothing_behind(self):
+        cache = AudioCache(self.cache_dir, FakeSynthesizer(fail=True))
+        with self.assertRaises(IOError):
+            cache.get("en", "hello")
+
+        self.assertIsNone(cache.lookup("en", "hello"))
+        clip_dir = os.path.dirname(cache.clip_path("en", "hello"))
+        self.assertEqual(os.listdir(clip_dir) if os.path.exists(clip_dir) else [], [])
+
+    def test_concurrent_writers_produce_complete_clip(self):
+        paths = []
+        threads = [threading.Thread(target=lambda: paths.append(self.cache.get("en", "hello"))) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(set(paths)), 1)
+        self.assertEqual(self.read(paths[0]), "en:hello")
+        self.assertEqual(os.listdir(os.path.dirname(paths[0])), [os.path.basename(paths[0])])
+        self.assertEqual(AudioCache(self.cache_dir, FakeSynthesizer()).stats()["clips"], 1)
+
+    def test_shipped_feedback_clips_are_added_for_gtts(self):
+        root_dir = self.tmp_dir.name
+        os.makedirs(os.path.join(root_dir, "word_sounds"))
+        with open(os.path.join(root_dir, "word_sounds", "yes__that_s_correct_.mp3"), "w") as f:
+            f.write("shipped")
+        cache = AudioCache(self.cache_dir, GTTSSynthesizer())
+
+        add_shipped_feedback_clips(cache, root_dir)
+
+        self.assertEqual(self.read(cache.lookup("en", "Yes, that's correct!")), "shipped")
+        self.assertIsNone(cache.lookup("en", "Sorry, that's incorrect!"))
+
+    def test_shipped_feedback_clips_are_only_added_for_their_voice(self):
+        class OtherVoice(GTTSSynthesizer):
+            def voice_id(self, language):
+                return f"gtts-slow:{language}"
+
+        root_dir = self.tmp_dir.name
+        os.makedirs(os.path.join(root_dir, "word_sounds"))
+        with open(os.path.join(root_dir, "word_sounds", "yes__that_s_correct_.mp3"), "w") as f:
+            f.write("shipped")
+        cache = AudioCache(self.cache_dir, OtherVoice())
+
+        add_shipped_feedback_clips(cache, root_dir)
+
+        self.assertIsNone(cache.lookup("en", "Yes, that's correct!"))
+        self.assertIsNone(cache.lookup("en", "Yes, that's correct!", voice="gtts:en"))
+
+    def test_clips_are_only_written_in_the_backend_format(self):
+        with self.assertRaises(ValueError):
+            save_atomically(Pyttsx3Synthesizer(), "en", "hello", os.path.join(self.tmp_dir.name, "hello.mp3"))
+        with patch.dict(os.environ, {TTS_BACKEND_ENV: "pyttsx3"}):
+            self.assertEqual(default_extension(), ".wav")
+
+    def test_pyttsx3_backend_reports_missing_dependency(self):
+        with patch.dict("sys.modules", {"pyttsx3": None}):
+            with self.assertRaises(RuntimeError):
+                Pyttsx3Synthesizer().save("en", "hello", os.path.join(self.tmp_dir.name, "hello.wav"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,115 @@
+import queue
+import threading
+import time
+import unittest
+
+from audio_player import AudioPlayer
+
+
+class FakeClip:
+    """Pretends to play a clip for a fixed duration."""
+
+    duration = 0.3
+    started = []
+
+    def __init__(self, sound_path):
+        self.sound_path = sound_path
+        self.stopped = False
+        self.end = time.perf_counter() + self.duration
+        FakeClip.started.append(sound_path)
+
+    def is_alive(self):
+        return not self.stopped and time.perf_counter() < self.end
+
+    def stop(self):
+        self.stopped = True
+
+
+class FakeEventLoop:
+    """A minimal stand-in for the Tk event loop with a thread-safe `after`."""
+
+    def __init__(self):
+        self.callbacks = queue.Queue()
+        self.thread_ids = []
+
+    def after(self, _delay_ms, func, *args):
+        self.callbacks.put((func, args))
+
+    def run(self, duration, tick=None):
+        """Run for `duration` seconds and return the longest gap between two iterations."""
+        max_gap = 0.0
+        last = start = time.perf_counter()
+        while last - start < duration:
+            if tick is not None:
+                tick()
+                tick = None
+            try:
+                func, args = self.callbacks.get(timeout=0.005)
+                self.thread_ids.append(threading.get_ident())
+                func(*args)
+            except queue.Empty:
+                pass
+            now = time.perf_counter()
+            max_gap = max(max_gap, now - last)
+            last = now
+        return max_gap
+
+
+class TestAudioPlayer(unittest.TestCase):
+    def setUp(self):
+        FakeClip.started = []
+        self.loop = FakeEventLoop()
+        self.player = AudioPlayer(schedule=self.loop.after, clip_factory=FakeClip)
+
+    def tearDown(self):
+        self.player.close()
+
+    def test_event_loop_does_not_stall_during_playback(self):
+        results = []
+
+        max_gap = self.loop.run(
+            FakeClip.duration + 0.2,
+            tick=lambda: self.player.play("slow.mp3", on_done=results.append, prepare=lambda: time.sleep(0.1)),
+        )
+
+        self.assertLess(max_gap, 0.05)
+        self.assertEqual(results, [True])
+        self.assertEqual(self.loop.thread_ids, [threading.get_ident()])
+
+    def test_new_request_replaces_current_clip(self):
+        results = []
+        self.player.play("first.mp3", on_done=lambda done: results.append(("first", done)))
+        time.sleep(0.05)
+        self.player.play("second.mp3", on_done=lambda done: results.append(("second", done)))
+
+        self.loop.run(FakeClip.duration + 0.2)
+
+        self.assertEqual(results, [("first", False), ("second", True)])
+        self.assertEqual(FakeClip.started, ["first.mp3", "second.mp3"])
+
+    def test_queued_requests_are_skipped(self):
+        results = []
+        for name in ["a", "b", "c"]:
+            self.player.play(name + ".mp3", on_done=lambda done, n=name: results.append((n, done)))
+
+        self.loop.run(FakeClip.duration + 0.2)
+
+        self.assertEqual(results[-1], ("c", True))
+        self.assertEqual(FakeClip.started[-1], "c.mp3")
+        self.assertNotIn("b.mp3", FakeClip.started)
+
+    def test_failed_prepare_reports_not_completed(self):
+        results = []
+
+        def fail():
+            raise IOError("no network")
+
+        self.player.play("missing.mp3", on_done=results.append, prepare=fail)
+        self.loop.run(0.1)
+
+        self.assertEqual(results, [False])
+        self.assertEqual(FakeClip.started, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
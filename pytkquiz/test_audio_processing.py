@@ -0,0 +1,194 @@
+import os
+import subprocess
+import tempfile
+import threading
+import time
+import unittest
+import wave
+from unittest.mock import patch
+
+import numpy as np
+
+import audio_processing
+from audio_processing import AudioProcessor, parse_mp3_frames, process_clip, process_mp3_frames, process_wav
+
+# MPEG-2 Layer III, 64 kbit/s, 24 kHz, mono, no CRC: 192-byte frames of 24 ms, as gTTS writes them.
+HEADER = bytes.fromhex("fff384c4")
+FRAME_SIZE = 192
+SIDE_SIZE = 9
+
+
+def make_frame(length=0, gain=0, main_data_begin=0, fill=b"\x55"):
+    # main_data_begin (8), private (1), part2_3_length (12), big_values (9), global_gain (8), rest 0.
+    side = (main_data_begin << 64) | (length << 51) | (gain << 34)
+    return HEADER + side.to_bytes(SIDE_SIZE, "big") + fill * (FRAME_SIZE - 4 - SIDE_SIZE)
+
+
+def make_clip(levels, main_data_begins=None):
+    main_data_begins = main_data_begins or [0] * len(levels)
+    return b"".join(
+        make_frame(0, 0, mdb) if level is None else make_frame(500, level, mdb)
+        for level, mdb in zip(levels, main_data_begins)
+    )
+
+
+class TestMp3Frames(unittest.TestCase):
+    def test_parse(self):
+        frames = parse_mp3_frames(make_clip([None, 150, 90]) + b"TAG" + bytes(125))
+
+        self.assertEqual(len(frames), 3)
+        self.assertEqual([frame.level for frame in frames], [None, 150, 90])
+        self.assertEqual((frames[1].offset, frames[1].size, frames[1].sample_rate), (FRAME_SIZE, FRAME_SIZE, 24000))
+
+    def test_silent_frames_are_trimmed(self):
+        result = process_mp3_frames(make_clip([None, None, None, 110, 158, 160, 155, 112, None, None]))
+
+        frames = parse_mp3_frames(result.data)
+        # The audible frames with one silent frame kept on each side, 2 steps louder.
+        self.assertEqual([frame.level for frame in frames], [None, 160, 162, 157, 114])
+        self.assertEqual((result.lead_ms_before, result.lead_ms_after), (96.0, 24.0))
+        self.assertEqual((result.duration_ms_before, result.duration_ms_after), (240.0, 120.0))
+        self.assertEqual(result.gain_db, 3.0)
+
+    def test_frames_holding_the_bit_reservoir_are_kept_silent(self):
+        data = make_clip([120, 120, None, None, 160, 160], main_data_begins=[0, 0, 0, 0, 250, 0])
+
+        frames = parse_mp3_frames(process_mp3_frames(data).data)
+
+        # 250 bytes of reservoir need two frames of 179 bytes of main data before the first audible one.
+        self.assertEqual([frame.level for frame in frames], [None, None, 160, 160])
+        self.assertEqual([frame.main_data_begin for frame in frames], [0, 0, 250, 0])
+
+    def test_level_moves_towards_target_within_limit(self):
+        quiet = process_mp3_frames(make_clip([150, 152, 154]))
+        loud = process_mp3_frames(make_clip([190, 190, 200]))
+
+        self.assertEqual([frame.level for frame in parse_mp3_frames(quiet.data)], [154, 156, 158])
+        self.assertEqual(quiet.gain_db, 6.0)
+        self.assertEqual([frame.level for frame in parse_mp3_frames(loud.data)], [186, 186, 196])
+        self.assertEqual(loud.gain_db, -6.0)
+
+    def test_unsupported_clips_are_rejected(self):
+        with self.assertRaises(ValueError):
+            process_mp3_frames(b"not an mp3")
+        with self.assertRaises(ValueError):
+            process_mp3_frames(make_clip([None, None]))
+        crc_frame = bytes.fromhex("fff284c4") + bytes(FRAME_SIZE - 4)
+        with self.assertRaises(ValueError):
+            process_mp3_frames(crc_frame)
+
+
+class TestWav(unittest.TestCase):
+    def test_silence_is_trimmed_and_peak_normalized(self):
+        rate = 16000
+        tone = (np.sin(np.arange(rate // 2) * 0.3) * 3000).astype("<i2")
+        samples = np.concatenate([np.zeros(rate // 4, "<i2"), tone, np.zeros(rate // 4, "<i2")])
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "clip.wav")
+            with wave.open(path, "wb") as f:
+                f.setnchannels(2)
+                f.setsampwidth(2)
+                f.setframerate(rate)
+                f.writeframes(np.repeat(samples, 2).tobytes())
+
+            result = process_wav(path)
+            out_path = os.path.join(tmp_dir, "out.wav")
+            with open(out_path, "wb") as f:
+                f.write(result.data)
+            with wave.open(out_path, "rb") as f:
+                self.assertEqual((f.getnchannels(), f.getsampwidth(), f.getframerate()), (1, 2, rate))
+                out = np.frombuffer(f.readframes(f.getnframes()), dtype="<i2")
+
+        self.assertAlmostEqual(result.lead_ms_before, 250.0, delta=0.1)
+        self.assertAlmostEqual(result.lead_ms_after, 20.0, places=0)
+        self.assertAlmostEqual(result.duration_ms_after, 540.0, delta=1)
+        self.assertAlmostEqual(int(np.abs(out).max()), 29204, delta=2)
+
+
+class TestAudioProcessor(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.root_dir = self.tmp_dir.name
+        os.makedirs(os.path.join(self.root_dir, "word_sounds"))
+        self.sound_path = os.path.join(self.root_dir, "word_sounds", "cat.mp3")
+        with open(self.sound_path, "wb") as f:
+            f.write(make_clip([None, None, 160, 160, None]))
+
+    def test_clip_is_processed_once(self):
+        processor = AudioProcessor(self.root_dir, method="frames")
+
+        with patch("audio_processing.process_clip", wraps=process_clip) as mock_process:
+            path = processor.get(self.sound_path)
+            self.assertEqual(processor.get(self.sound_path), path)
+            # Another process reads the manifest instead of processing the clip again.
+            self.assertEqual(AudioProcessor(self.root_dir).get(self.sound_path), path)
+        mock_process.assert_called_once()
+
+        self.assertEqual(path, os.path.join(self.root_dir, "processed_audio", "word_sounds", "cat.mp3"))
+        self.assertLess(os.path.getsize(path), os.path.getsize(self.sound_path))
+        entry = processor.entry_for(self.sound_path)
+        self.assertEqual((entry["lead_ms_before"], entry["lead_ms_after"], entry["method"]), (48.0, 24.0, "frames"))
+
+    def test_clip_is_processed_in_the_background_when_not_waiting(self):
+        processor = AudioProcessor(self.root_dir, method="frames")
+        release = threading.Event()
+
+        def slow_process_clip(*args):
+            release.wait(10)
+            return process_clip(*args)
+
+        with patch("audio_processing.process_clip", side_effect=slow_process_clip):
+            self.assertEqual(processor.get(self.sound_path, wait=False), self.sound_path)
+            release.set()
+            deadline = time.monotonic() + 10
+            while processor.resolve(self.sound_path) == self.sound_path and time.monotonic() < deadline:
+                time.sleep(0.01)
+
+        self.assertEqual(processor.get(self.sound_path, wait=False),
+                         os.path.join(self.root_dir, "processed_audio", "word_sounds", "cat.mp3"))
+
+    def test_changed_clip_is_processed_again(self):
+        processor = AudioProcessor(self.root_dir, method="frames")
+        processor.get(self.sound_path)
+        with open(self.sound_path, "wb") as f:
+            f.write(make_clip([150, 150]))
+        stat = os.stat(self.sound_path)
+        os.utime(self.sound_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+        self.assertEqual(processor.resolve(self.sound_path), self.sound_path)
+        processed = processor.get(self.sound_path)
+        self.assertEqual(len(parse_mp3_frames(open(processed, "rb").read())), 2)
+
+    def test_unprocessable_clip_is_used_as_is(self):
+        with open(self.sound_path, "wb") as f:
+            f.write(b"not an mp3")
+        processor = AudioProcessor(self.root_dir, method="frames")
+
+        self.assertEqual(processor.get(self.sound_path), self.sound_path)
+        self.assertEqual(processor.get(os.path.join(self.root_dir, "missing.mp3")),
+                         os.path.join(self.root_dir, "missing.mp3"))
+        self.assertEqual(processor.resolve(self.sound_path), self.sound_path)
+
+    def test_ffmpeg_is_used_when_installed(self):
+        encoded = make_clip([None, 160, 160])
+        completed = subprocess.CompletedProcess([], 0, stdout=encoded, stderr=b"")
+        with patch("shutil.which", return_value="/usr/bin/ffmpeg"), \
+                patch("subprocess.run", return_value=completed) as mock_run:
+            path = AudioProcessor(self.root_dir).get(self.sound_path)
+
+        self.assertIn("libmp3lame", mock_run.call_args[0][0])
+        with open(path, "rb") as f:
+            self.assertEqual(f.read(), encoded)
+        entry = AudioProcessor(self.root_dir).entry_for(self.sound_path)
+        self.assertEqual((entry["method"], entry["lead_ms_before"], entry["lead_ms_after"]), ("ffmpeg", 48.0, 24.0))
+
+    def test_summary(self):
+        summary = audio_processing.process_clips(AudioProcessor(self.root_dir, method="frames"), [self.sound_path])
+
+        self.assertEqual((len(summary.entries), summary.failed), (1, []))
+        self.assertIn("time to first audible sound: 24 ms vs 48 ms", summary.format())
+
+
+if __name__ == "__main__":
+    unittest.main()
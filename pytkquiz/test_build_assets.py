@@ -0,0 +1,157 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from PIL import Image
+
+import cli
+import image_assets
+from build_assets import build_assets
+from image_assets import ImageManifest, manifest_path
+from image_cache import ThumbnailCache
+from quiz_logic import QuizLogic, WordData
+
+
+class TestBuildAssets(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.root_dir = self.tmp_dir.name
+        os.makedirs(os.path.join(self.root_dir, "word_images"))
+        for name, color in [("cat", "red"), ("dog", "green")]:
+            Image.new("RGB", (400, 300), color).save(os.path.join(self.root_dir, "word_images", name + ".jpg"))
+
+    def build(self, **kwargs):
+        return build_assets(self.root_dir, ["cat.jpg", "dog.jpg"], sizes=(90, 180, 800), fmt="jpeg", **kwargs)
+
+    def test_builds_variants_and_manifest(self):
+        summary = self.build()
+
+        self.assertEqual((summary.built, summary.reused, summary.failed), (2, 0, []))
+        with open(manifest_path(self.root_dir), encoding="utf-8") as f:
+            data = json.load(f)
+        entry = data["images"]["cat.jpg"]
+        # 800 px would be an upscale of the 400 px original, so it is not built.
+        self.assertEqual([v["size"] for v in entry["variants"]], [90, 180])
+        variant = entry["variants"][1]
+        with Image.open(os.path.join(self.root_dir, variant["path"])) as img:
+            self.assertEqual(img.size, (180, 135))
+        self.assertIn(variant["sha256"][:12], variant["path"])
+        self.assertLess(summary.variant_bytes[90], summary.source_bytes)
+        self.assertEqual(summary.variant_bytes[800], summary.source_bytes)
+
+    def test_rebuild_reuses_unchanged_images(self):
+        self.build()
+        Image.new("RGB", (400, 300), "blue").save(os.path.join(self.root_dir, "word_images", "dog.jpg"))
+
+        summary = self.build()
+
+        self.assertEqual((summary.built, summary.reused), (1, 1))
+        # Variants of the old dog image are removed.
+        self.assertEqual(len(os.listdir(os.path.join(self.root_dir, "image_assets"))), 5)
+
+    def test_variant_for_picks_smallest_that_fits(self):
+        self.build()
+        manifest = ImageManifest.load(self.root_dir)
+
+        self.assertIn("cat-90-", manifest.variant_for("cat.jpg", 50))
+        self.assertIn("cat-180-", manifest.variant_for("cat.jpg", 91))
+        self.assertIsNone(manifest.variant_for("cat.jpg", 181))
+        self.assertIsNone(manifest.variant_for("goat.jpg", 90))
+
+    def test_image_path_for_word_uses_variants_only_with_size(self):
+        self.build()
+        quiz_logic = QuizLogic(self.root_dir)
+        quiz_logic.set_questions([WordData("cat", "cat.jpg", "cat.mp3", "A cat", "cat")])
+
+        self.assertEqual(quiz_logic.image_path_for_word(0), os.path.join(self.root_dir, "word_images", "cat.jpg"))
+        self.assertEqual(os.path.dirname(quiz_logic.image_path_for_word(0, size=180)),
+                         os.path.join(self.root_dir, "image_assets"))
+        self.assertTrue(quiz_logic.image_path_for_word(quiz_logic.deck[0], size=180).endswith(".jpg"))
+        self.assertEqual(quiz_logic.image_path_for_word(0, size=1000),
+                         os.path.join(self.root_dir, "word_images", "cat.jpg"))
+
+    def test_edited_source_falls_back_to_original(self):
+        self.build()
+        source = os.path.join(self.root_dir, "word_images", "cat.jpg")
+        Image.new("RGB", (400, 300), "white").save(source)
+        stat = os.stat(source)
+        os.utime(source, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+        self.assertIsNone(image_assets.load_manifest(self.root_dir).variant_for("cat.jpg", 90))
+
+    def test_source_is_checked_after_first_lookup(self):
+        self.build()
+        manifest = ImageManifest.load(self.root_dir)
+        self.assertIsNotNone(manifest.variant_for("cat.jpg", 90))
+
+        source = os.path.join(self.root_dir, "word_images", "cat.jpg")
+        stat = os.stat(source)
+        os.utime(source, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+        self.assertIsNone(manifest.variant_for("cat.jpg", 90))
+
+    def test_assets_built_after_first_lookup_are_used(self):
+        quiz_logic = QuizLogic(self.root_dir)
+        quiz_logic.set_questions([WordData("cat", "cat.jpg", "cat.mp3", "A cat", "cat")])
+        original = os.path.join(self.root_dir, "word_images", "cat.jpg")
+        self.assertEqual(quiz_logic.image_path_for_word(0, size=90), original)
+
+        self.build()
+
+        self.assertNotEqual(quiz_logic.image_path_for_word(0, size=90), original)
+
+    def warm_thumbnails(self, workers):
+        with open(os.path.join(self.root_dir, "words.csv"), "w", encoding="utf-8") as f:
+            f.write("Word,Image,Sound,Definition\n")
+            for word in ["cat", "dog"]:
+                f.write(f"{word},{word}.jpg,{word}.mp3,A {word}\n")
+        status = cli.main(["--root-dir", self.root_dir, "warm-thumbnails", "--languages", "en",
+                           "--size", "180", "--workers", workers])
+        self.assertEqual(status, 0)
+
+    def test_warm_thumbnails_uses_the_paths_the_app_reads(self):
+        self.build()
+        thumbnail_dir = os.path.join(self.root_dir, "thumbnail_cache")
+        quiz_logic = QuizLogic(self.root_dir)
+        quiz_logic.set_questions([WordData(w, w + ".jpg", w + ".mp3", "", w) for w in ["cat", "dog"]])
+        app_paths = [quiz_logic.image_path_for_word(i, size=180) for i in range(2)]
+
+        for workers in ("1", "2"):
+            shutil.rmtree(thumbnail_dir, ignore_errors=True)
+            self.warm_thumbnails(workers)
+            warmed = sorted(os.listdir(thumbnail_dir))
+
+            cache = ThumbnailCache(thumbnail_dir, 180)
+            self.assertTrue(all(cache.is_cached(path) for path in app_paths))
+            for path in app_paths:
+                cache.get(path)
+            self.assertEqual(sorted(os.listdir(thumbnail_dir)), warmed)
+
+    def test_warm_thumbnails_keeps_the_thumbnails_the_app_made(self):
+        self.build()
+        cache = ThumbnailCache(os.path.join(self.root_dir, "thumbnail_cache"), 180)
+        quiz_logic = QuizLogic(self.root_dir)
+        quiz_logic.set_questions([WordData(w, w + ".jpg", w + ".mp3", "", w) for w in ["cat", "dog"]])
+        app_paths = [quiz_logic.image_path_for_word(i, size=180) for i in range(2)]
+        for path in app_paths:
+            cache.get(path)
+        made = sorted(os.listdir(cache.cache_dir))
+
+        for workers in ("1", "2"):
+            self.warm_thumbnails(workers)
+            self.assertEqual(sorted(os.listdir(cache.cache_dir)), made)
+        self.assertEqual(cache.prune(app_paths), 0)
+
+        # A rebuilt variant replaces the old one, whose thumbnail is then stale.
+        Image.new("RGB", (400, 300), "blue").save(os.path.join(self.root_dir, "word_images", "dog.jpg"))
+        self.build()
+        self.warm_thumbnails("1")
+        self.assertEqual(len(os.listdir(cache.cache_dir)), 2)
+        self.assertTrue(cache.is_cached(quiz_logic.image_path_for_word(1, size=180)))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,134 @@
+import os
+import tempfile
+import threading
+import unittest
+from unittest.mock import patch
+
+import build_audio as build_audio_module
+from audio_cache import AUDIO_CACHE_DIR_ENV, AudioCache
+from build_audio import SoundJob, build_audio, sound_jobs_for_csv, warm_feedback_phrases
+from sound_gen import FEEDBACK_PHRASES, TTS_BACKEND_ENV, GTTSSynthesizer
+
+
+class FakeSynthesizer:
+    """Writes the text as the clip contents instead of calling a real TTS service."""
+
+    extension = ".mp3"
+
+    def __init__(self, failures_before_success=0):
+        self.failures_before_success = failures_before_success
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def save(self, language, text, sound_path):
+        with self.lock:
+            self.calls.append((language, text))
+            attempt = sum(1 for call in self.calls if call == (language, text))
+        if attempt <= self.failures_before_success:
+            raise IOError("temporary failure")
+        with open(sound_path, "w", encoding="utf-8") as f:
+            f.write(f"{language}:{text}")
+
+
+class TestBuildAudio(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.root_dir = self.tmp_dir.name
+        self.jobs = [
+            SoundJob("en", word, os.path.join(self.root_dir, "word_sounds", word + ".mp3"))
+            for word in ["cat", "dog", "goat"]
+        ]
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_generates_missing_files_only(self):
+        os.makedirs(os.path.join(self.root_dir, "word_sounds"))
+        with open(self.jobs[0].sound_path, "w") as f:
+            f.write("existing")
+        synthesizer = FakeSynthesizer()
+
+        summary = build_audio(self.jobs, synthesizer, workers=2)
+
+        self.assertEqual(summary.generated, 2)
+        self.assertEqual(summary.skipped, 1)
+        self.assertEqual(summary.failed, [])
+        self.assertEqual(sorted(text for _, text in synthesizer.calls), ["dog", "goat"])
+        with open(self.jobs[0].sound_path) as f:
+            self.assertEqual(f.read(), "existing")
+
+    def test_retries_and_leaves_no_temp_files(self):
+        synthesizer = FakeSynthesizer(failures_before_success=2)
+
+        summary = build_audio(self.jobs, synthesizer, workers=3, retries=2, backoff=0)
+
+        self.assertEqual(summary.generated, 3)
+        self.assertEqual(
+            sorted(os.listdir(os.path.join(self.root_dir, "word_sounds"))), ["cat.mp3", "dog.mp3", "goat.mp3"]
+        )
+
+    def test_reports_failures_after_retries(self):
+        synthesizer = FakeSynthesizer(failures_before_success=5)
+
+        summary = build_audio(self.jobs[:1], synthesizer, retries=1, backoff=0)
+
+        self.assertEqual(summary.generated, 0)
+        self.assertEqual(summary.failed, self.jobs[:1])
+        self.assertFalse(os.path.exists(self.jobs[0].sound_path))
+
+    def test_sound_jobs_for_csv_lists_word_clips(self):
+        os.makedirs(os.path.join(self.root_dir, "word_images"))
+        open(os.path.join(self.root_dir, "word_images", "cat.jpg"), "wb").close()
+        csv_path = os.path.join(self.root_dir, "words.csv")
+        with open(csv_path, "w", encoding="utf-8") as f:
+            f.write("Word,Image,Sound,Definition\ncat,cat.jpg,cat.mp3,A cat\n")
+
+        jobs = sound_jobs_for_csv(self.root_dir, csv_path, "en")
+        offline_jobs = sound_jobs_for_csv(self.root_dir, csv_path, "en", ".wav")
+
+        paths = [os.path.basename(job.sound_path) for job in jobs]
+        self.assertEqual(paths, ["cat.mp3"])
+        self.assertEqual([os.path.basename(job.sound_path) for job in offline_jobs], ["cat.wav"])
+
+    def test_warm_feedback_phrases_fills_audio_cache(self):
+        synthesizer = FakeSynthesizer()
+        synthesizer.voice_id = lambda language: "fake"
+        audio_cache = AudioCache(os.path.join(self.root_dir, "audio_cache"), synthesizer)
+
+        self.assertEqual(warm_feedback_phrases(audio_cache, ["en", "el"]), [])
+        self.assertEqual(warm_feedback_phrases(audio_cache, ["en", "el"]), [])
+
+        self.assertEqual(len(synthesizer.calls), 2 * len(FEEDBACK_PHRASES))
+        self.assertEqual(audio_cache.stats()["hits"], 2 * len(FEEDBACK_PHRASES))
+
+    def write_deck_with_shipped_clips(self):
+        os.makedirs(os.path.join(self.root_dir, "word_images"))
+        os.makedirs(os.path.join(self.root_dir, "word_sounds"))
+        open(os.path.join(self.root_dir, "word_images", "cat.jpg"), "wb").close()
+        with open(os.path.join(self.root_dir, "words.csv"), "w", encoding="utf-8") as f:
+            f.write("Word,Image,Sound,Definition\ncat,cat.jpg,cat.mp3,A cat\n")
+        for name in ["cat.mp3", "yes__that_s_correct_.mp3", "sorry__that_s_incorrect_.mp3"]:
+            with open(os.path.join(self.root_dir, "word_sounds", name), "w") as f:
+                f.write("shipped")
+
+    def test_run_uses_shipped_feedback_clips(self):
+        self.write_deck_with_shipped_clips()
+        env = {AUDIO_CACHE_DIR_ENV: "", TTS_BACKEND_ENV: "gtts"}
+        with patch.dict(os.environ, env), patch.object(GTTSSynthesizer, "save") as mock_save:
+            status = build_audio_module.main(["--root-dir", self.root_dir, "--languages", "en"])
+
+        self.assertEqual(status, 0)
+        mock_save.assert_not_called()
+
+    def test_run_refuses_a_backend_the_apps_do_not_use(self):
+        self.write_deck_with_shipped_clips()
+        with patch.dict(os.environ, {TTS_BACKEND_ENV: "gtts"}), patch.object(GTTSSynthesizer, "save") as mock_save:
+            status = build_audio_module.main(["--root-dir", self.root_dir, "--languages", "en", "--backend", "pyttsx3"])
+
+        self.assertEqual(status, 2)
+        mock_save.assert_not_called()
+        self.assertFalse(os.path.exists(os.path.join(self.root_dir, "word_sounds", "cat.wav")))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,63 @@
+import os
+import tempfile
+import unittest
+
+from compiled_deck import CompiledDeck, compiled_deck_path
+from quiz_logic import QuizLogic
+
+
+class TestCompiledDeck(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.root_dir = self.tmp_dir.name
+        os.makedirs(os.path.join(self.root_dir, "word_images"))
+        for name in ["milo", "gata", "skylos"]:
+            open(os.path.join(self.root_dir, "word_images", name + ".jpg"), "wb").close()
+        self.csv_path = os.path.join(self.root_dir, "words_el.csv")
+        with open(self.csv_path, "w", encoding="utf-8") as f:
+            f.write("Word,Image,Sound,Definition,Greek,Transliteration\n")
+            f.write("Apple,milo.jpg,apple.mp3,A fruit,Μήλο,Milo\n")
+            f.write("Cat,gata.jpg,cat.mp3,A pet,Γάτα,Gata\n")
+            f.write("Dog,skylos.jpg,dog.mp3,Another pet,Σκύλος,Skylos\n")
+        self.deck_path = compiled_deck_path(self.csv_path)
+        QuizLogic(self.root_dir, "el").compile_deck(self.csv_path, 4, self.deck_path)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_compiled_deck_matches_csv(self):
+        expected = QuizLogic(self.root_dir, "el").load_word_data(self.csv_path, 4)
+        quiz_logic = QuizLogic(self.root_dir, "el")
+        deck = quiz_logic.load_deck(self.csv_path, 4)
+
+        self.assertIsInstance(deck, CompiledDeck)
+        self.assertEqual(list(deck), list(expected))
+        self.assertEqual(deck.id_for_word("Γάτα"), 1)
+        self.assertEqual(quiz_logic.image_path_for_word(2), os.path.join(self.root_dir, "word_images", "skylos.jpg"))
+        self.assertEqual(quiz_logic.sound_path_for_word(2), os.path.join(self.root_dir, "word_sounds_el", "skylos.mp3"))
+        with self.assertRaises(TypeError):
+            deck.append(expected[0])
+        deck.close()
+
+    def test_falls_back_to_csv_when_stale(self):
+        with open(self.csv_path, "a", encoding="utf-8") as f:
+            f.write("Apple again,milo.jpg,apple.mp3,A fruit,Μήλο,Milo2\n")
+
+        deck = QuizLogic(self.root_dir, "el").load_deck(self.csv_path, 4)
+
+        self.assertNotIsInstance(deck, CompiledDeck)
+        self.assertEqual(len(deck), 4)
+
+    def test_falls_back_to_csv_for_other_language_or_bad_file(self):
+        deck = QuizLogic(self.root_dir, "en").load_deck(self.csv_path, 0)
+        self.assertNotIsInstance(deck, CompiledDeck)
+
+        with open(self.deck_path, "wb") as f:
+            f.write(b"not a deck")
+        deck = QuizLogic(self.root_dir, "el").load_deck(self.csv_path, 4)
+        self.assertNotIsInstance(deck, CompiledDeck)
+        self.assertEqual(len(deck), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
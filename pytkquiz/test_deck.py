@@ -0,0 +1,67 @@
+import unittest
+
+from deck import Deck, WordData
+from quiz_logic import QuizLogic
+
+
+def make_words(names):
+    return [WordData(name.title(), name + ".jpg", name + ".mp3", "A " + name, name) for name in names]
+
+
+class TestDeck(unittest.TestCase):
+    def setUp(self):
+        self.words = make_words(["cat", "dog", "goat"])
+        self.deck = Deck.from_word_data(self.words)
+
+    def test_round_trips_word_data(self):
+        self.assertEqual(len(self.deck), 3)
+        self.assertEqual(list(self.deck), self.words)
+        self.assertEqual(self.deck[1:], self.words[1:])
+
+    def test_indexes(self):
+        self.assertEqual(self.deck.id_for_word("Dog"), 1)
+        self.assertEqual(self.deck.id_for_filename("goat"), 2)
+        self.assertEqual(self.deck.ids_for_image("cat.jpg"), [0])
+        self.assertIsNone(self.deck.id_for_word("Cow"))
+
+    def test_indexes_follow_appends(self):
+        self.deck.id_for_word("Cat")
+        self.deck.ids_for_image("cat.jpg")
+        word_id = self.deck.append(WordData("Kitten", "cat.jpg", "kitten.mp3", "A young cat", "kitten"))
+
+        self.assertEqual(self.deck.id_for_word("Kitten"), word_id)
+        self.assertEqual(self.deck.ids_for_image("cat.jpg"), [0, word_id])
+
+    def test_id_of_requires_equal_entry(self):
+        self.assertEqual(self.deck.id_of(self.words[2]), 2)
+        self.assertIsNone(self.deck.id_of(self.words[2]._replace(definition="Something else")))
+
+
+class TestQuizLogicWordIds(unittest.TestCase):
+    def setUp(self):
+        self.quiz_logic = QuizLogic("/test/root/dir")
+        self.quiz_logic.set_questions(make_words(["cat", "dog", "goat", "cow"]))
+
+    def test_next_question_uses_ids(self):
+        options = self.quiz_logic.next_question()
+
+        self.assertEqual(options, [self.quiz_logic.deck[i] for i in self.quiz_logic.option_ids])
+        self.assertEqual(self.quiz_logic.current_question, self.quiz_logic.deck[self.quiz_logic.current_id])
+
+    def test_check_answer_accepts_ids_and_word_data(self):
+        self.quiz_logic.next_question()
+        current_id = self.quiz_logic.current_id
+
+        self.assertTrue(self.quiz_logic.check_answer(current_id))
+        self.assertTrue(self.quiz_logic.check_answer(self.quiz_logic.current_question))
+        self.assertFalse(self.quiz_logic.check_answer((current_id + 1) % 4))
+        self.assertFalse(self.quiz_logic.check_answer(make_words(["pig"])[0]))
+        self.assertEqual((self.quiz_logic.score, self.quiz_logic.attempts), (2, 4))
+
+    def test_path_helpers_accept_ids(self):
+        self.assertEqual(self.quiz_logic.image_path_for_word(1), "/test/root/dir/word_images/dog.jpg")
+        self.assertEqual(self.quiz_logic.sound_path_for_word(1), "/test/root/dir/word_sounds/dog.mp3")
+
+
+if __name__ == "__main__":
+    unittest.main()
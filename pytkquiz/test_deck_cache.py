@@ -0,0 +1,73 @@
+import os
+import tempfile
+import threading
+import unittest
+from unittest.mock import patch
+
+import deck_cache
+from deck import Deck
+from quiz_logic import QuizLogic
+
+CSV_HEADER = "Word,Image,Sound,Definition\n"
+
+
+class TestDeckCache(unittest.TestCase):
+    def setUp(self):
+        deck_cache.clear()
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.root_dir = self.tmp_dir.name
+        os.makedirs(os.path.join(self.root_dir, "word_images"))
+        for name in ["cat", "dog", "goat"]:
+            open(os.path.join(self.root_dir, "word_images", name + ".jpg"), "wb").close()
+        self.csv_path = os.path.join(self.root_dir, "words.csv")
+        self.write_csv(["cat", "dog", "goat"])
+
+    def tearDown(self):
+        deck_cache.clear()
+        self.tmp_dir.cleanup()
+
+    def write_csv(self, words):
+        with open(self.csv_path, "w", encoding="utf-8") as f:
+            f.write(CSV_HEADER)
+            for word in words:
+                f.write(f"{word},{word}.jpg,{word}.mp3,A {word}\n")
+
+    def test_get_deck_is_shared(self):
+        first = deck_cache.get_deck(self.root_dir, "en")
+        with patch.object(QuizLogic, "load_word_data") as mock_load:
+            second = deck_cache.get_deck(self.root_dir, "en")
+            mock_load.assert_not_called()
+
+        self.assertIs(first, second)
+        self.assertIsInstance(first, Deck)
+        self.assertEqual([w.word for w in first], ["cat", "dog", "goat"])
+
+    def test_get_deck_reloads_when_csv_changes(self):
+        first = deck_cache.get_deck(self.root_dir, "en")
+        self.write_csv(["cat", "dog"])
+        stat = os.stat(self.csv_path)
+        os.utime(self.csv_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+        second = deck_cache.get_deck(self.root_dir, "en")
+
+        self.assertEqual(len(first), 3)
+        self.assertEqual(len(second), 2)
+
+    def test_concurrent_callers_load_once(self):
+        results = []
+        with patch.object(QuizLogic, "load_word_data", autospec=True, return_value=[]) as mock_load:
+            threads = [
+                threading.Thread(target=lambda: results.append(deck_cache.get_deck(self.root_dir, "en")))
+                for _ in range(8)
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        self.assertEqual(mock_load.call_count, 1)
+        self.assertEqual(len(results), 8)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,58 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import deck_cache
+import deck_registry
+from deck_registry import DeckRegistry
+
+EN_CSV = "Word,Image,Sound,Definition\n" + "".join(f"{w},{w}.jpg,{w}.mp3,A {w}\n" for w in ["cat", "dog", "goat"])
+EL_CSV = "Word,Image,Sound,Definition,Greek,Transliteration\n" + "".join(
+    f"{w},{w}.jpg,{w}.mp3,A {w},{g},{t}\n" for w, g, t in [("cat", "Γάτα", "gata"), ("dog", "Σκύλος", "skylos")]
+)
+
+
+class TestDeckRegistry(unittest.TestCase):
+    def setUp(self):
+        deck_cache.clear()
+        self.addCleanup(deck_cache.clear)
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.root_dir = self.tmp_dir.name
+        os.makedirs(os.path.join(self.root_dir, "word_images"))
+        for name in ["cat", "dog", "goat"]:
+            open(os.path.join(self.root_dir, "word_images", name + ".jpg"), "wb").close()
+        for name, content in [("words.csv", EN_CSV), ("words_el.csv", EL_CSV)]:
+            with open(os.path.join(self.root_dir, name), "w", encoding="utf-8") as f:
+                f.write(content)
+
+    def test_loads_all_languages_and_shares_images(self):
+        registry = DeckRegistry(self.root_dir).load()
+
+        self.assertEqual(list(registry.deck("en").words), ["cat", "dog", "goat"])
+        self.assertEqual(list(registry.deck("el").words), ["Γάτα", "Σκύλος"])
+        self.assertEqual(registry.images, ["cat.jpg", "dog.jpg", "goat.jpg"])
+        self.assertEqual(registry.errors, {})
+
+    def test_failed_language_is_reported(self):
+        registry = DeckRegistry(self.root_dir, ["en", "fr"]).load()
+
+        self.assertEqual(list(registry.decks), ["en"])
+        self.assertIsInstance(registry.errors["fr"], FileNotFoundError)
+        with self.assertRaises(KeyError):
+            registry.deck("fr")
+
+    def test_shared_registry_loads_once(self):
+        with patch.dict(deck_registry._registries, clear=True):
+            first = deck_registry.shared_registry(self.root_dir)
+            with patch("deck_cache.QuizLogic.load_deck") as mock_load:
+                second = deck_registry.shared_registry(self.root_dir)
+                mock_load.assert_not_called()
+
+        self.assertIs(first, second)
+        self.assertIs(first.deck("en"), second.deck("en"))
+
+
+if __name__ == "__main__":
+    unittest.main()
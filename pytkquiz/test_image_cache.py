@@ -0,0 +1,96 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from PIL import Image
+
+from image_cache import LRUCache, ThumbnailCache
+
+
+class TestLRUCache(unittest.TestCase):
+    def test_evicts_least_recently_used(self):
+        cache = LRUCache(max_items=2)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        cache.get("a")
+        cache.put("c", 3)
+
+        self.assertIn("a", cache)
+        self.assertNotIn("b", cache)
+        self.assertEqual(len(cache), 2)
+
+
+class TestThumbnailCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.source_path = os.path.join(self.tmp_dir.name, "cat.jpg")
+        Image.new("RGB", (400, 400), "red").save(self.source_path)
+        self.cache_dir = os.path.join(self.tmp_dir.name, "thumbs")
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_get_resizes_and_writes_thumbnail(self):
+        cache = ThumbnailCache(self.cache_dir, 50)
+        img = cache.get(self.source_path)
+
+        self.assertEqual(img.size, (50, 50))
+        self.assertTrue(cache.is_cached(self.source_path))
+
+    def test_get_does_not_decode_source_again(self):
+        ThumbnailCache(self.cache_dir, 50).warm([self.source_path])
+
+        cache = ThumbnailCache(self.cache_dir, 50)
+        with patch("PIL.Image.open", wraps=Image.open) as mock_open:
+            cache.get(self.source_path)
+            cache.get(self.source_path)
+        opened = [call.args[0] for call in mock_open.call_args_list]
+        self.assertEqual(opened, [cache.cache_path(self.source_path)])
+
+    def test_cache_path_depends_on_size_and_mtime(self):
+        small = ThumbnailCache(self.cache_dir, 50)
+        large = ThumbnailCache(self.cache_dir, 100)
+        self.assertNotEqual(small.cache_path(self.source_path), large.cache_path(self.source_path))
+
+        before = small.cache_path(self.source_path)
+        stat = os.stat(self.source_path)
+        os.utime(self.source_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+        self.assertNotEqual(before, small.cache_path(self.source_path))
+
+    def test_warm_counts_generated_and_cached(self):
+        cache = ThumbnailCache(self.cache_dir, 50)
+        self.assertEqual(cache.warm([self.source_path]), (1, 0))
+        self.assertEqual(cache.warm([self.source_path]), (0, 1))
+
+    def test_memory_key_includes_size(self):
+        cache = ThumbnailCache(self.cache_dir, 50)
+        self.assertEqual(cache.get(self.source_path).size, (50, 50))
+
+        cache.size = 100
+        self.assertEqual(cache.get(self.source_path).size, (100, 100))
+
+    def test_prune_removes_thumbnails_of_changed_and_removed_images(self):
+        other_path = os.path.join(self.tmp_dir.name, "dog.jpg")
+        Image.new("RGB", (400, 400), "green").save(other_path)
+        small, large = ThumbnailCache(self.cache_dir, 50), ThumbnailCache(self.cache_dir, 100)
+        small.warm([self.source_path, other_path])
+        large.warm([self.source_path])
+        stale = small.cache_path(self.source_path)
+        stat = os.stat(self.source_path)
+        os.utime(self.source_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+        small.warm([self.source_path])
+        with open(os.path.join(self.cache_dir, "notes.txt"), "w") as f:
+            f.write("not a thumbnail")
+
+        self.assertEqual(small.prune([self.source_path]), 3)
+
+        self.assertEqual(
+            sorted(os.listdir(self.cache_dir)),
+            sorted(["notes.txt", os.path.basename(small.cache_path(self.source_path))]),
+        )
+        self.assertFalse(os.path.exists(stale))
+
+
+if __name__ == "__main__":
+    unittest.main()
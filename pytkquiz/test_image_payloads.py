@@ -0,0 +1,87 @@
+import io
+import os
+import tempfile
+import threading
+import unittest
+from unittest.mock import patch
+
+from PIL import Image
+
+from image_payloads import ImagePayloads
+
+
+class TestImagePayloads(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.large_path = os.path.join(self.tmp_dir.name, "large.jpg")
+        Image.new("RGB", (800, 400), "red").save(self.large_path, quality=95)
+        self.small_path = os.path.join(self.tmp_dir.name, "small.jpg")
+        Image.new("RGB", (100, 80), "blue").save(self.small_path, quality=80)
+        self.payloads = ImagePayloads(200)
+
+    def test_large_image_is_scaled_to_display_size(self):
+        payload = self.payloads.get(self.large_path)
+
+        self.assertEqual((payload.width, payload.height), (200, 100))
+        with Image.open(io.BytesIO(payload.data)) as img:
+            self.assertEqual((img.format, img.size), ("JPEG", (200, 100)))
+        self.assertLess(len(payload.data), os.path.getsize(self.large_path))
+
+    def test_small_jpeg_is_used_as_is(self):
+        payload = self.payloads.get(self.small_path)
+
+        with open(self.small_path, "rb") as f:
+            self.assertEqual(payload.data, f.read())
+        self.assertEqual((payload.width, payload.height), (100, 80))
+
+    def test_png_is_converted_to_jpeg(self):
+        path = os.path.join(self.tmp_dir.name, "alpha.png")
+        Image.new("RGBA", (50, 50), (0, 255, 0, 128)).save(path)
+
+        with Image.open(io.BytesIO(self.payloads.get(path).data)) as img:
+            self.assertEqual(img.format, "JPEG")
+
+    def test_reruns_do_no_decoding(self):
+        first = self.payloads.get(self.large_path)
+        with patch("PIL.Image.open") as mock_open:
+            second = self.payloads.get(self.large_path)
+            mock_open.assert_not_called()
+
+        self.assertIs(first, second)
+        self.assertEqual((self.payloads.hits, self.payloads.misses), (1, 1))
+
+    def test_edited_image_is_encoded_again(self):
+        first = self.payloads.get(self.large_path)
+        Image.new("RGB", (400, 400), "green").save(self.large_path)
+        stat = os.stat(self.large_path)
+        os.utime(self.large_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+        second = self.payloads.get(self.large_path)
+        self.assertNotEqual(first.digest, second.digest)
+        self.assertEqual((second.width, second.height), (200, 200))
+
+    def test_concurrent_sessions_encode_once(self):
+        results = []
+        with patch.object(ImagePayloads, "encode", autospec=True, wraps=ImagePayloads.encode) as mock_encode:
+            threads = [threading.Thread(target=lambda: results.append(self.payloads.get(self.large_path)))
+                       for _ in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        self.assertEqual(mock_encode.call_count, 1)
+        self.assertEqual(len({id(payload) for payload in results}), 1)
+
+    def test_cache_is_bounded(self):
+        small_size = len(self.payloads.get(self.small_path).data)
+        payloads = ImagePayloads(200, max_bytes=small_size)
+        payloads.get(self.small_path)
+        payloads.get(self.large_path)
+
+        self.assertLessEqual(payloads.stats()["cached_bytes"], small_size)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,77 @@
+import json
+import os
+import tempfile
+import unittest
+
+import instrumentation
+from instrumentation import Metrics, NULL_SPAN
+from quiz_logic import QuizLogic, WordData
+
+
+class TestInstrumentation(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.addCleanup(instrumentation.configure, enabled=False)
+
+    def test_disabled_span_is_shared_no_op(self):
+        instrumentation.configure(enabled=False)
+        self.assertIs(instrumentation.span("next_question"), NULL_SPAN)
+        with instrumentation.span("next_question"):
+            instrumentation.count("prefetch_hit")
+        self.assertIsNone(instrumentation.active())
+
+    def test_summary_reports_percentiles_and_counters(self):
+        metrics = instrumentation.configure()
+        for ms in range(1, 101):
+            metrics.observe("image_load", ms / 1000)
+        with instrumentation.span("next_question"):
+            instrumentation.count("prefetch_hit")
+            instrumentation.count("prefetch_hit")
+
+        summary = metrics.summary()
+        self.assertEqual(summary["stages"]["image_load"]["count"], 100)
+        self.assertAlmostEqual(summary["stages"]["image_load"]["p50_ms"], 51)
+        self.assertAlmostEqual(summary["stages"]["image_load"]["p95_ms"], 96)
+        self.assertEqual(summary["stages"]["next_question"]["count"], 1)
+        self.assertEqual(summary["counters"], {"prefetch_hit": 2})
+        self.assertIn("image_load: p50 51.00 ms", instrumentation.format_summary(summary))
+
+    def test_window_keeps_recent_timings(self):
+        metrics = Metrics(window=10)
+        for _ in range(50):
+            metrics.observe("image_load", 1.0)
+        for _ in range(10):
+            metrics.observe("image_load", 0.001)
+        stage = metrics.summary()["stages"]["image_load"]
+        self.assertEqual(stage["count"], 60)
+        self.assertAlmostEqual(stage["p95_ms"], 1.0)
+
+    def test_log_is_json_lines_and_rotates(self):
+        log_path = os.path.join(self.tmp_dir.name, "metrics.jsonl")
+        metrics = Metrics(log_path, max_log_bytes=500, log_backups=2, flush_every=5)
+        for _ in range(100):
+            metrics.observe("sound_check", 0.0001)
+        metrics.count("sound_generated")
+        metrics.flush()
+
+        self.assertTrue(os.path.exists(log_path + ".1"))
+        self.assertTrue(os.path.exists(log_path + ".2"))
+        self.assertFalse(os.path.exists(log_path + ".3"))
+        with open(log_path, encoding="utf-8") as f:
+            records = [json.loads(line) for line in f]
+        self.assertEqual(records[-1]["counter"], "sound_generated")
+        with open(log_path + ".1", encoding="utf-8") as f:
+            self.assertEqual(json.loads(f.readline())["span"], "sound_check")
+
+    def test_quiz_logic_times_option_sampling(self):
+        metrics = instrumentation.configure()
+        quiz_logic = QuizLogic(self.tmp_dir.name)
+        quiz_logic.set_questions([WordData(w, f"{w}.jpg", f"{w}.mp3", w, f"{w}.jpg") for w in "abcde"])
+        for _ in range(5):
+            quiz_logic.next_question()
+        self.assertEqual(metrics.summary()["stages"]["pick_options"]["count"], 5)
+
+
+if __name__ == "__main__":
+    unittest.main()
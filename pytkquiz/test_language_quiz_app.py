@@ -1,9 +1,32 @@
+import os
+import queue
+import subprocess
+import sys
+import tempfile
+import threading
 import unittest
+from tkinter import DISABLED, NORMAL
 from unittest.mock import patch, MagicMock
 
+from PIL import Image
+
+from audio_cache import AUDIO_CACHE_DIR_ENV
 from language_quiz_app import LanguageQuizApp
-from pytkquiz.sound_gen import generate_sound_if_not_found
-from quiz_logic import WordData
+from progress_store import PROGRESS_DB_ENV
+from quiz_logic import HARD_MODE_UNAVAILABLE, QuizLogic, WordData
+from sound_gen import generate_sound_if_not_found
+
+
+def setUpModule():
+    # Keep the apps' progress database and spoken feedback out of the repo.
+    tmp_dir = tempfile.TemporaryDirectory()
+    unittest.addModuleCleanup(tmp_dir.cleanup)
+    env = patch.dict(os.environ, {
+        PROGRESS_DB_ENV: os.path.join(tmp_dir.name, "progress.sqlite3"),
+        AUDIO_CACHE_DIR_ENV: os.path.join(tmp_dir.name, "audio_cache"),
+    })
+    env.start()
+    unittest.addModuleCleanup(env.stop)
 
 
 class FakeLabel(dict):
@@ -25,16 +48,17 @@ class TestLanguageQuizApp(unittest.TestCase):
         self.app = LanguageQuizApp(frame_factory=MagicMock(), label_factory=FakeLabel, button_factory=MagicMock(),
                                    image_factory=MagicMock())
 
-    @patch("language_quiz_app.gtts.gTTS.save")
+    @patch("language_quiz_app.os.replace")
+    @patch("gtts.gTTS.save")
     @patch("language_quiz_app.os.path.exists")
-    def test_generate_sound_if_not_found(self, mock_os_path_exists, mock_gtts_save):
+    def test_generate_sound_if_not_found(self, mock_os_path_exists, mock_gtts_save, mock_replace):
         mock_os_path_exists.return_value = False
 
         generate_sound_if_not_found(self.app.language, "test text", "dummy_path.mp3")
 
         mock_gtts_save.assert_called_once()
 
-    @patch("language_quiz_app.Image.open")
+    @patch("language_quiz_app.ThumbnailCache.get")
     def test_next_question(self, mock_image_open):
         word_data = [
             WordData("cat", "cat.jpg", "cat.mp3", "A small domesticated carnivorous feline mammal"),
@@ -97,35 +121,261 @@ class TestGenerateSoundIfNotFound(unittest.TestCase):
         self.app = LanguageQuizApp(label_factory=FakeLabel)
 
     @patch("language_quiz_app.os.path.exists")
-    @patch("language_quiz_app.gtts.gTTS")
+    @patch("gtts.gTTS")
     def test_generate_sound_if_not_found_existing_file(self, mock_gtts, mock_exists):
         mock_exists.return_value = True
         generate_sound_if_not_found(self.app.language, "hello", "hello.mp3")
         mock_gtts.assert_not_called()
 
+    @patch("language_quiz_app.os.replace")
     @patch("language_quiz_app.os.path.exists")
-    @patch("language_quiz_app.gtts.gTTS")
-    def test_generate_sound_if_not_found_new_file(self, mock_gtts, mock_exists):
+    @patch("gtts.gTTS")
+    def test_generate_sound_if_not_found_new_file(self, mock_gtts, mock_exists, mock_replace):
         mock_exists.return_value = False
         mock_tts_instance = mock_gtts.return_value
         generate_sound_if_not_found(self.app.language, "world", "world.mp3")
         mock_gtts.assert_called_once_with("world")
-        mock_tts_instance.save.assert_called_once_with("world.mp3")
+        # The clip is written to a temporary file and renamed into place.
+        tmp_path = mock_tts_instance.save.call_args[0][0]
+        mock_replace.assert_called_once_with(tmp_path, "world.mp3")
 
+    @patch("language_quiz_app.os.replace")
     @patch("language_quiz_app.os.path.exists")
-    @patch("language_quiz_app.gtts.gTTS")
-    def test_generate_sound_if_not_found_empty_text(self, mock_gtts, mock_exists):
+    @patch("gtts.gTTS")
+    def test_generate_sound_if_not_found_empty_text(self, mock_gtts, mock_exists, mock_replace):
         mock_exists.return_value = False
         generate_sound_if_not_found(self.app.language, "", "empty.mp3")
         mock_gtts.assert_called_once_with("")
 
+    @patch("language_quiz_app.os.replace")
     @patch("language_quiz_app.os.path.exists")
-    @patch("language_quiz_app.gtts.gTTS")
-    def test_generate_sound_if_not_found_special_characters(self, mock_gtts, mock_exists):
+    @patch("gtts.gTTS")
+    def test_generate_sound_if_not_found_special_characters(self, mock_gtts, mock_exists, mock_replace):
         mock_exists.return_value = False
         generate_sound_if_not_found(self.app.language, "Hello, World!", "special.mp3")
         mock_gtts.assert_called_once_with("Hello, World!")
 
 
+class FakeWidget(FakeLabel):
+    """A frame or button stand-in that accepts any layout call without keeping history."""
+
+    def grid(self, **kwargs):
+        pass
+
+    def pack(self, **kwargs):
+        pass
+
+
+class FakePhoto:
+    created = 0
+
+    def __init__(self, img):
+        FakePhoto.created += 1
+        self.img = img
+
+    def paste(self, img):
+        self.img = img
+
+
+class TestQuestionGridSoak(unittest.TestCase):
+    """Runs thousands of questions headless and checks that the grid's widgets are reused."""
+
+    def setUp(self):
+        FakePhoto.created = 0
+        thumbnail = Image.new("RGB", (180, 180), "blue")
+        patches = [
+            patch("language_quiz_app.tk.StringVar", MagicMock(return_value=MagicMock(get=lambda: "English"))),
+            patch("language_quiz_app.tk.OptionMenu", MagicMock()),
+            patch("language_quiz_app.shared_store", MagicMock(return_value=MagicMock(get_stats=lambda _: (0, 0)))),
+            patch("language_quiz_app.generate_sound_if_not_found", lambda *args: None),
+            patch("language_quiz_app.ThumbnailCache.get", lambda self, path: thumbnail),
+        ]
+        for p in patches:
+            p.start()
+            self.addCleanup(p.stop)
+        self.widgets = 0
+
+        def widget_factory(master, **kwargs):
+            self.widgets += 1
+            return FakeWidget(master, **kwargs)
+
+        self.app = LanguageQuizApp(
+            frame_factory=widget_factory, label_factory=widget_factory, button_factory=widget_factory,
+            image_factory=FakePhoto, prefetch_depth=0,
+        )
+
+    def test_widgets_are_reused(self):
+        for _ in range(200):
+            self.app.next_question()
+        widgets_before = self.widgets
+
+        for _ in range(3000):
+            self.app.next_question()
+
+        # Timings and memory growth are measured by benchmarks/bench_question_grid.py.
+        self.assertEqual(self.widgets, widgets_before)
+        self.assertEqual(FakePhoto.created, 3)
+
+    def test_buttons_follow_current_options(self):
+        self.app.next_question()
+        with patch.object(self.app, "check_answer") as mock_check:
+            self.app.option_clicked(2)
+        mock_check.assert_called_once_with(self.app.current_options[2])
+
+
+class FakeMaster:
+    """A Tk root stand-in whose `after` callbacks are run by the test."""
+
+    def __init__(self):
+        self.callbacks = queue.Queue()
+
+    def title(self, _title):
+        pass
+
+    def geometry(self, _geometry):
+        pass
+
+    def bind(self, _event, _func):
+        pass
+
+    def after(self, _delay_ms, func, *args):
+        self.callbacks.put((func, args))
+
+    def run_next(self):
+        func, args = self.callbacks.get(timeout=10)
+        func(*args)
+
+
+class TestStartup(unittest.TestCase):
+    def setUp(self):
+        thumbnail = Image.new("RGB", (180, 180), "blue")
+        self.language = MagicMock(get=lambda: "English")
+        patches = [
+            patch("language_quiz_app.tk.StringVar", MagicMock(return_value=self.language)),
+            patch("language_quiz_app.tk.OptionMenu", MagicMock()),
+            patch("language_quiz_app.shared_store", MagicMock(return_value=MagicMock(get_stats=lambda _: (0, 0)))),
+            patch("language_quiz_app.generate_sound_if_not_found", lambda *args: None),
+            patch("language_quiz_app.ThumbnailCache.get", lambda self, path: thumbnail),
+            patch("language_quiz_app.LanguageQuizApp.speak_text"),
+        ]
+        for p in patches:
+            p.start()
+            self.addCleanup(p.stop)
+        self.master = FakeMaster()
+        self.app = self.make_app(self.master, prefetch_depth=0)
+
+    def make_app(self, master, **kwargs):
+        app = LanguageQuizApp(
+            master, frame_factory=FakeWidget, label_factory=FakeWidget, button_factory=FakeWidget,
+            image_factory=FakePhoto, **kwargs,
+        )
+        # Cleanups run last in first out, so the loader stops reading images before the patches are undone.
+        self.addCleanup(app.loader.join)
+        return app
+
+    def test_deck_loads_in_background(self):
+        self.assertEqual(self.app.word_label["text"], "Loading words...")
+        self.assertEqual(self.app.option_buttons[0]["state"], DISABLED)
+
+        self.master.run_next()
+
+        self.assertEqual(self.app.word_label["text"], self.app.current_question.word)
+        self.assertEqual(self.app.option_buttons[0]["state"], NORMAL)
+
+    def test_first_question_is_shown_before_the_deck_is_read(self):
+        release = threading.Event()
+        iter_word_data = QuizLogic.iter_word_data
+
+        def slow_iter_word_data(quiz_logic, path, word_col_index):
+            for i, word in enumerate(iter_word_data(quiz_logic, path, word_col_index)):
+                if i == 3 and threading.current_thread().name == "load-word-data":
+                    release.wait(10)
+                yield word
+
+        with patch("language_quiz_app.open_compiled_deck", return_value=None), \
+                patch.object(QuizLogic, "iter_word_data", slow_iter_word_data):
+            master = FakeMaster()
+            app = self.make_app(master, prefetch_depth=0)
+            master.run_next()
+
+            streamed = app.quiz_logic
+            self.assertFalse(streamed.loaded.is_set())
+            self.assertEqual(len(streamed.deck), 3)
+            self.assertEqual(app.word_label["text"], streamed.current_question.word)
+            current_id = streamed.current_id
+
+            release.set()
+            master.run_next()
+
+        self.assertTrue(streamed.loaded.is_set())
+        self.assertIs(app.quiz_logic, streamed)
+        self.assertEqual(streamed.current_id, current_id)
+        self.assertGreater(len(streamed.deck), 3)
+        self.assertEqual(set(app.quiz_logics), {"en", "el"})
+
+    @staticmethod
+    def run_until_decks_loaded(app):
+        while set(app.quiz_logics) | set(app.load_errors) != {"en", "el"}:
+            app.master.run_next()
+
+    def test_switching_language_keeps_progress(self):
+        self.run_until_decks_loaded(self.app)
+        english = self.app.quiz_logic
+        self.app.check_answer(english.current_id)
+        self.assertEqual(english.score, 1)
+
+        self.language.get = lambda: "Greek"
+        with patch("deck_cache.QuizLogic.load_deck") as mock_load:
+            self.app.update_language()
+            mock_load.assert_not_called()
+
+        greek = self.app.quiz_logic
+        self.assertEqual(greek.language, "el")
+        self.assertEqual((greek.score, greek.attempts), (1, 1))
+        self.assertIn(self.app.word_label["text"], greek.deck.words)
+        self.language.get = lambda: "English"
+        self.app.update_language()
+        self.assertIs(self.app.quiz_logic, english)
+        # Both decks use the same images.
+        self.assertEqual(set(greek.deck.images), set(english.deck.images))
+        self.assertEqual(len(self.app.registry.images), len(set(english.deck.images)))
+
+    def test_each_question_is_answered_once_and_picked_after_the_answer(self):
+        with patch("language_quiz_app.Prefetcher.submit") as mock_submit:
+            app = self.make_app(FakeMaster(), prefetch_depth=2, scheduler="leitner")
+            self.run_until_decks_loaded(app)
+            quiz_logic = app.quiz_logic
+            mock_submit.assert_not_called()
+
+            wrong = next(i for i, option in enumerate(app.current_options) if option != quiz_logic.current_question)
+            right = app.current_options.index(quiz_logic.current_question)
+            app.option_clicked(wrong)
+            app.option_clicked(right)
+
+        self.assertEqual((quiz_logic.score, quiz_logic.attempts), (0, 1))
+        self.assertEqual(quiz_logic.scheduler.boxes[quiz_logic.current_id], 0)
+        # Picked once the answer was known, for the prefetcher to prepare.
+        self.assertEqual(len(quiz_logic.upcoming), 2)
+        mock_submit.assert_called_once()
+
+    def test_hard_mode_without_similarity_index_says_so(self):
+        with patch.object(QuizLogic, "hard_mode_available", return_value=False):
+            app = self.make_app(FakeMaster(), prefetch_depth=0, difficulty="hard")
+            self.run_until_decks_loaded(app)
+
+        self.assertEqual(app.get_message(), HARD_MODE_UNAVAILABLE)
+
+    def test_heavy_modules_are_not_imported_at_startup(self):
+        code = "import sys, language_quiz_app; print(' '.join(sorted(sys.modules)))"
+        env = dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path))
+        modules = subprocess.run(
+            [sys.executable, "-c", code], capture_output=True, text=True, check=True, env=env,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.split()
+
+        for name in ("gtts", "PIL.Image", "PIL.ImageTk", "playsound", "numpy"):
+            self.assertNotIn(name, modules)
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,58 @@
+import threading
+import time
+import unittest
+
+from prefetch import Prefetcher
+
+
+class TestPrefetcher(unittest.TestCase):
+    def setUp(self):
+        self.prepared = []
+        self.release = threading.Event()
+        self.release.set()
+        self.prefetcher = Prefetcher(self.prepare)
+
+    def tearDown(self):
+        self.release.set()
+        self.prefetcher.close()
+
+    def prepare(self, option):
+        self.release.wait()
+        self.prepared.append(option)
+
+    def wait_until_idle(self):
+        deadline = time.time() + 2
+        while self.prefetcher.stats()["pending"] and time.time() < deadline:
+            time.sleep(0.01)
+
+    def test_claim_counts_hits_and_misses(self):
+        self.prefetcher.submit([["cat", "dog", "goat"]])
+        self.wait_until_idle()
+
+        self.assertTrue(self.prefetcher.claim("cat"))
+        self.assertFalse(self.prefetcher.claim("cow"))
+        stats = self.prefetcher.stats()
+        self.assertEqual((stats["hits"], stats["misses"]), (1, 1))
+        self.assertEqual(stats["hit_rate"], 0.5)
+
+    def test_each_option_is_prepared_once(self):
+        self.prefetcher.submit([["cat", "dog", "goat"], ["cat", "cow", "dog"]])
+        self.wait_until_idle()
+        self.prefetcher.submit([["cat", "dog", "goat"]])
+        self.wait_until_idle()
+
+        self.assertEqual(sorted(self.prepared), ["cat", "cow", "dog", "goat"])
+
+    def test_clear_skips_queued_options(self):
+        self.release.clear()
+        self.prefetcher.submit([["cat", "dog", "goat"]])
+        self.prefetcher.clear()
+        self.release.set()
+        time.sleep(0.1)
+
+        self.assertLessEqual(len(self.prepared), 1)
+        self.assertFalse(self.prefetcher.claim("goat"))
+
+
+if __name__ == "__main__":
+    unittest.main()
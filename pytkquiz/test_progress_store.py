@@ -0,0 +1,130 @@
+import os
+import sqlite3
+import tempfile
+import threading
+import unittest
+from unittest.mock import patch
+
+from deck import WordData
+from progress_store import ProgressStore
+from quiz_logic import QuizLogic
+
+
+class TestProgressStore(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp_dir.name, "progress.sqlite3")
+        self.store = ProgressStore(self.path, flush_interval=0.05)
+
+    def tearDown(self):
+        self.store.close()
+        self.tmp_dir.cleanup()
+
+    def count_answers(self):
+        conn = sqlite3.connect(self.path)
+        try:
+            return conn.execute("SELECT COUNT(*) FROM answers").fetchone()[0]
+        finally:
+            conn.close()
+
+    def test_stats_are_updated_before_writing(self):
+        self.store.record_answer("alice", "en", "cat", True)
+        self.store.record_answer("alice", "en", "dog", False)
+
+        self.assertEqual(self.store.get_stats("alice"), (1, 2))
+        self.assertEqual(self.store.get_stats("bob"), (0, 0))
+
+    def test_answers_survive_reopening(self):
+        self.store.record_answer("alice", "el", "Γάτα", True)
+        self.store.close()
+
+        reopened = ProgressStore(self.path)
+        try:
+            self.assertEqual(reopened.get_stats("alice"), (1, 1))
+        finally:
+            reopened.close()
+        self.assertEqual(self.count_answers(), 1)
+
+    def test_many_concurrent_sessions(self):
+        n_sessions = 50
+        answers_per_session = 200
+
+        def session(i):
+            user_id = f"user{i % 10}"
+            for j in range(answers_per_session):
+                self.store.record_answer(user_id, "en", f"word{j}", j % 2 == 0)
+
+        threads = [threading.Thread(target=session, args=(i,)) for i in range(n_sessions)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.store.flush()
+
+        # Latencies are measured by benchmarks/bench_progress_store.py.
+        total = n_sessions * answers_per_session
+        self.assertEqual(self.count_answers(), total)
+        for user in range(10):
+            self.assertEqual(self.store.get_stats(f"user{user}"), (500, 1000))
+
+        self.store.close()
+        reopened = ProgressStore(self.path)
+        try:
+            self.assertEqual(reopened.get_stats("user3"), (500, 1000))
+        finally:
+            reopened.close()
+
+    def test_answers_are_written_in_batches(self):
+        store = ProgressStore(self.path, flush_interval=60, batch_size=100)
+        try:
+            with patch.object(ProgressStore, "_write", wraps=ProgressStore._write) as mock_write:
+                for i in range(1000):
+                    store.record_answer("alice", "en", f"word{i}", True)
+                # Only full batches are written before the flush interval is up.
+                store.flush()
+        finally:
+            store.close()
+
+        self.assertEqual(mock_write.call_count, 10)
+        self.assertTrue(all(len(call.args[1]) == 100 for call in mock_write.call_args_list))
+        self.assertEqual(self.count_answers(), 1000)
+
+    def test_stats_include_answers_saved_by_other_processes(self):
+        other = ProgressStore(self.path, flush_interval=0.05)
+        try:
+            self.assertEqual(self.store.get_stats("alice"), (0, 0))
+            other.record_answer("alice", "en", "cat", True)
+            other.flush()
+            self.store.record_answer("alice", "en", "dog", False)
+
+            self.assertEqual(self.store.get_stats("alice"), (1, 2))
+            self.store.flush()
+            self.assertEqual(other.get_stats("alice"), (1, 2))
+        finally:
+            other.close()
+
+    def test_writer_survives_a_failed_batch(self):
+        with patch.object(ProgressStore, "_write", side_effect=TypeError("bad row")):
+            self.store.record_answer("alice", "en", "cat", True)
+            self.store.flush()
+            self.assertEqual(self.store.get_stats("alice"), (0, 0))
+
+        self.store.record_answer("alice", "en", "dog", True)
+        self.store.flush()
+        self.assertEqual(self.store.get_stats("alice"), (1, 1))
+        self.assertEqual(self.count_answers(), 1)
+
+    def test_quiz_logic_records_answers(self):
+        quiz_logic = QuizLogic("/test/root/dir", progress_store=self.store, user_id="alice")
+        quiz_logic.set_questions([WordData(w, w + ".jpg", w + ".mp3", "", w) for w in ["cat", "dog", "goat"]])
+        quiz_logic.next_question()
+        quiz_logic.check_answer(quiz_logic.current_id)
+
+        restored = QuizLogic("/test/root/dir", progress_store=self.store, user_id="alice")
+        restored.restore_progress()
+
+        self.assertEqual((restored.score, restored.attempts), (1, 1))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,113 @@
+import os
+import tempfile
+import tracemalloc
+import unittest
+from unittest.mock import patch
+
+from deck import Deck, WordData
+from question_token import TOKEN_SECRET_ENV, QuestionTokens, token_secret
+from quiz_logic import QuizLogic
+
+N_SESSIONS = 10_000
+
+
+def make_deck(names):
+    return Deck.from_word_data(
+        WordData(name, name + ".jpg", name + ".mp3", "A " + name, name) for name in names
+    )
+
+
+class TestQuestionTokens(unittest.TestCase):
+    def setUp(self):
+        self.deck = make_deck([f"word{i}" for i in range(50)])
+        self.tokens = QuestionTokens(b"secret")
+
+    def test_round_trip(self):
+        token = self.tokens.encode(self.deck, "el", 7, [3, 7, 42], 2 ** 64 - 1)
+
+        question = self.tokens.decode(token, self.deck)
+
+        self.assertEqual(question, ("el", 7, [3, 7, 42], 2 ** 64 - 1))
+        self.assertEqual(len(token), 68)
+
+    def test_other_process_with_same_deck_accepts_token(self):
+        token = self.tokens.encode(self.deck, "en", 1, [1, 2, 3], 5)
+        other_deck = make_deck([f"word{i}" for i in range(50)])
+
+        self.assertEqual(QuestionTokens(b"secret").decode(token, other_deck).option_ids, [1, 2, 3])
+
+    def test_invalid_tokens_are_rejected(self):
+        token = self.tokens.encode(self.deck, "en", 1, [1, 2, 3], 5)
+        tampered = token[:20] + ("A" if token[20] != "A" else "B") + token[21:]
+
+        self.assertIsNone(self.tokens.decode(tampered, self.deck))
+        self.assertIsNone(QuestionTokens(b"other").decode(token, self.deck))
+        self.assertIsNone(self.tokens.decode(token, make_deck([f"word{i}" for i in range(51)])))
+        self.assertIsNone(self.tokens.decode("not a token", self.deck))
+        self.assertIsNone(self.tokens.decode("", self.deck))
+
+    def test_ids_outside_the_deck_are_rejected(self):
+        small_deck = make_deck(["cat", "dog", "cow"])
+        with patch.object(Deck, "fingerprint", return_value=b"12345678"):
+            token = self.tokens.encode(self.deck, "en", 1, [1, 2, 40], 5)
+            self.assertIsNone(self.tokens.decode(token, small_deck))
+
+    def test_seed_reproduces_the_next_question(self):
+        first, second = QuizLogic("/test/root/dir"), QuizLogic("/test/root/dir")
+        for quiz_logic in (first, second):
+            quiz_logic.set_questions(self.deck)
+            quiz_logic.seed(1234)
+
+        for _ in range(5):
+            self.assertEqual(first.next_question(), second.next_question())
+
+    def test_session_memory(self):
+        """Measure what 10k sessions keep for their question, before and with tokens."""
+
+        def measure(make_state):
+            quiz_logic = QuizLogic("/test/root/dir")
+            quiz_logic.set_questions(self.deck)
+            tracemalloc.start()
+            try:
+                before = tracemalloc.get_traced_memory()[0]
+                sessions = []
+                for seed in range(N_SESSIONS):
+                    quiz_logic.next_question()
+                    sessions.append(make_state(quiz_logic, seed))
+                return (tracemalloc.get_traced_memory()[0] - before) / N_SESSIONS
+            finally:
+                tracemalloc.stop()
+
+        objects = measure(lambda quiz_logic, seed: {
+            "current_question": quiz_logic.current_question,
+            "options": [quiz_logic.deck[i] for i in quiz_logic.option_ids],
+        })
+        tokens = measure(lambda quiz_logic, seed: {
+            "question": self.tokens.encode(quiz_logic.deck, "en", quiz_logic.current_id, quiz_logic.option_ids, seed),
+        })
+
+        self.assertLess(tokens, 400)
+        self.assertLess(tokens, objects * 0.6)
+
+
+class TestTokenSecret(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+
+    @patch.dict(os.environ, {TOKEN_SECRET_ENV: ""})
+    def test_secret_is_created_once_and_shared(self):
+        first = token_secret(self.tmp_dir.name)
+
+        self.assertEqual(len(first), 32)
+        self.assertEqual(token_secret(self.tmp_dir.name), first)
+        self.assertEqual(os.listdir(self.tmp_dir.name), [".question_token_secret"])
+
+    @patch.dict(os.environ, {TOKEN_SECRET_ENV: "shared-key"})
+    def test_environment_overrides_file(self):
+        self.assertEqual(token_secret(self.tmp_dir.name), b"shared-key")
+        self.assertEqual(os.listdir(self.tmp_dir.name), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
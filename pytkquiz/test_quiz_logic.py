@@ -1,7 +1,25 @@
+import os
+import tempfile
+import io
+import json
 import unittest
 from unittest.mock import patch, mock_open
+
+import numpy as np
+
+from quiz_batch import write_csv, write_jsonl
 from quiz_logic import QuizLogic, WordData
 
+word_col_index = 0
+
+
+class FakeReader(list):
+    """Stands in for csv.DictReader, with the field names taken from the first row."""
+
+    @property
+    def fieldnames(self):
+        return list(self[0]) if self else ["Word", "Image", "Sound", "Definition"]
+
 
 class TestQuizLogic(unittest.TestCase):
     def setUp(self):
@@ -9,13 +27,13 @@ class TestQuizLogic(unittest.TestCase):
 
     @patch('quiz_logic.csv.DictReader')
     @patch('quiz_logic.open', new_callable=mock_open)
-    @patch('quiz_logic.os.path.exists')
-    def test_load_word_data_success(self, mock_exists, mock_file, mock_reader):
-        mock_exists.return_value = True
-        mock_reader.return_value = [
+    @patch('quiz_logic.QuizLogic.image_names')
+    def test_load_word_data_success(self, mock_image_names, mock_file, mock_reader):
+        mock_image_names.return_value = {"apple.jpg", "banana.jpg"}
+        mock_reader.return_value = FakeReader([
             {"Word": "apple", "Image": "apple.jpg", "Sound": "apple.mp3", "Definition": "A fruit"},
             {"Word": "banana", "Image": "banana.jpg", "Sound": "banana.mp3", "Definition": "A yellow fruit"}
-        ]
+        ])
 
         word_data = self.quiz_logic.load_word_data("dummy_path", word_col_index)
 
@@ -25,13 +43,13 @@ class TestQuizLogic(unittest.TestCase):
 
     @patch('quiz_logic.csv.DictReader')
     @patch('quiz_logic.open', new_callable=mock_open)
-    @patch('quiz_logic.os.path.exists')
-    def test_load_word_data_missing_image(self, mock_exists, mock_file, mock_reader):
-        mock_exists.side_effect = [True, False]
-        mock_reader.return_value = [
+    @patch('quiz_logic.QuizLogic.image_names')
+    def test_load_word_data_missing_image(self, mock_image_names, mock_file, mock_reader):
+        mock_image_names.return_value = {"apple.jpg"}
+        mock_reader.return_value = FakeReader([
             {"Word": "apple", "Image": "apple.jpg", "Sound": "apple.mp3", "Definition": "A fruit"},
             {"Word": "banana", "Image": "banana.jpg", "Sound": "banana.mp3", "Definition": "A yellow fruit"}
-        ]
+        ])
 
         word_data = self.quiz_logic.load_word_data("dummy_path", word_col_index)
 
@@ -40,10 +58,10 @@ class TestQuizLogic(unittest.TestCase):
 
     @patch('quiz_logic.csv.DictReader')
     @patch('quiz_logic.open', new_callable=mock_open)
-    @patch('quiz_logic.os.path.exists')
-    def test_load_word_data_empty_file(self, mock_exists, mock_file, mock_reader):
-        mock_exists.return_value = True
-        mock_reader.return_value = []
+    @patch('quiz_logic.QuizLogic.image_names')
+    def test_load_word_data_empty_file(self, mock_image_names, mock_file, mock_reader):
+        mock_image_names.return_value = set()
+        mock_reader.return_value = FakeReader([])
 
         word_data = self.quiz_logic.load_word_data("dummy_path", word_col_index)
 
@@ -51,12 +69,12 @@ class TestQuizLogic(unittest.TestCase):
 
     @patch('quiz_logic.csv.DictReader')
     @patch('quiz_logic.open', new_callable=mock_open)
-    @patch('quiz_logic.os.path.exists')
-    def test_load_word_data_unicode_characters(self, mock_exists, mock_file, mock_reader):
-        mock_exists.return_value = True
-        mock_reader.return_value = [
+    @patch('quiz_logic.QuizLogic.image_names')
+    def test_load_word_data_unicode_characters(self, mock_image_names, mock_file, mock_reader):
+        mock_image_names.return_value = {"cafe.jpg"}
+        mock_reader.return_value = FakeReader([
             {"Word": "café", "Image": "cafe.jpg", "Sound": "cafe.mp3", "Definition": "A place to drink coffee"}
-        ]
+        ])
 
         word_data = self.quiz_logic.load_word_data("dummy_path", word_col_index)
 
@@ -65,18 +83,59 @@ class TestQuizLogic(unittest.TestCase):
 
     @patch('quiz_logic.csv.DictReader')
     @patch('quiz_logic.open', new_callable=mock_open)
-    @patch('quiz_logic.os.path.exists')
-    def test_load_word_data_missing_fields(self, mock_exists, mock_file, mock_reader):
-        mock_exists.return_value = True
-        mock_reader.return_value = [
+    @patch('quiz_logic.QuizLogic.image_names')
+    def test_load_word_data_missing_fields(self, mock_image_names, mock_file, mock_reader):
+        mock_image_names.return_value = {"apple.jpg", "banana.jpg"}
+        mock_reader.return_value = FakeReader([
             {"Word": "apple", "Image": "apple.jpg", "Sound": "apple.mp3"},
             {"Word": "banana", "Image": "banana.jpg", "Definition": "A yellow fruit"}
-        ]
+        ])
 
         with self.assertRaises(KeyError):
             self.quiz_logic.load_word_data("dummy_path", word_col_index)
 
 
+class TestStreamingLoad(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.root_dir = self.tmp_dir.name
+        os.makedirs(os.path.join(self.root_dir, "word_images"))
+        self.words = ["cat", "dog", "goat", "cow", "pig"]
+        for word in self.words[:-1]:
+            open(os.path.join(self.root_dir, "word_images", word + ".jpg"), "wb").close()
+        self.csv_path = os.path.join(self.root_dir, "words.csv")
+        with open(self.csv_path, "w", encoding="utf-8") as f:
+            f.write("Word,Image,Sound,Definition\n")
+            for word in self.words:
+                f.write(f"{word},{word}.jpg,{word}.mp3,A {word}\n")
+        self.quiz_logic = QuizLogic(self.root_dir)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_validates_images_without_stat_per_row(self):
+        with patch("quiz_logic.os.path.exists") as mock_exists:
+            deck = self.quiz_logic.load_word_data(self.csv_path, word_col_index)
+            mock_exists.assert_not_called()
+
+        self.assertEqual([w.word for w in deck], self.words[:-1])
+
+    def test_iter_word_data_is_lazy(self):
+        rows = self.quiz_logic.iter_word_data(self.csv_path, word_col_index)
+
+        self.assertEqual(next(rows).word, "cat")
+
+    def test_background_load(self):
+        ready = self.quiz_logic.load_word_data_in_background(self.csv_path, word_col_index)
+
+        self.assertTrue(ready.wait(2))
+        self.assertGreaterEqual(len(self.quiz_logic.questions), 3)
+        self.assertEqual(len(self.quiz_logic.next_question()), 3)
+        self.assertTrue(self.quiz_logic.loaded.wait(2))
+        self.assertEqual(len(self.quiz_logic.questions), 4)
+        self.assertIsNone(self.quiz_logic.load_error)
+
+
 class TestImagePathForWord(unittest.TestCase):
     def setUp(self):
         self.quiz_logic = QuizLogic("/test/root/dir")
@@ -103,6 +162,98 @@ class TestImagePathForWord(unittest.TestCase):
         mock_join.assert_called_once_with(self.quiz_logic.root_dir, "word_images", "fish.jpg")
 
 
+class TestUpcomingQuestions(unittest.TestCase):
+    def setUp(self):
+        self.quiz_logic = QuizLogic("/test/root/dir")
+        self.quiz_logic.set_questions([
+            WordData(word, word + ".jpg", word + ".mp3", "A " + word, word)
+            for word in ["cat", "dog", "goat", "cow", "pig"]
+        ])
+
+    def test_next_question_follows_peeked_order(self):
+        upcoming = self.quiz_logic.peek_upcoming(3)
+
+        self.assertEqual(len(upcoming), 3)
+        for options in upcoming:
+            self.assertEqual(self.quiz_logic.next_question(), options)
+            self.assertIn(self.quiz_logic.current_question, options)
+            self.assertEqual(len(set(options)), 3)
+
+    def test_set_questions_discards_upcoming(self):
+        self.quiz_logic.peek_upcoming(2)
+        self.quiz_logic.set_questions(self.quiz_logic.questions[:3])
+
+        self.assertEqual(len(self.quiz_logic.upcoming), 0)
+
+
+class TestGenerateBatch(unittest.TestCase):
+    def setUp(self):
+        self.quiz_logic = QuizLogic("/test/root/dir")
+        self.quiz_logic.set_questions([
+            WordData(word, word + ".jpg", word + ".mp3", "A " + word, word)
+            for word in ["cat", "dog", "goat", "cow"]
+        ])
+
+    def test_options_are_distinct_and_answers_uniform(self):
+        batch = self.quiz_logic.generate_batch(60_000, seed=7)
+
+        self.assertEqual(batch.option_ids.shape, (60_000, 3))
+        self.assertTrue((np.diff(np.sort(batch.option_ids, axis=1), axis=1) > 0).all())
+        self.assertEqual(batch.option_ids.min(), 0)
+        self.assertEqual(batch.option_ids.max(), 3)
+        # All 24 ordered option rows and every target word and position turn up about equally often.
+        rows, counts = np.unique(batch.option_ids, axis=0, return_counts=True)
+        self.assertEqual(len(rows), 24)
+        self.assertLess(counts.max() / counts.min(), 1.2)
+        for values in (batch.target_ids, batch.answers):
+            counts = np.bincount(values)
+            self.assertLess(counts.max() / counts.min(), 1.1)
+
+    def test_seed_makes_batch_reproducible(self):
+        first = self.quiz_logic.generate_batch(100, seed=3)
+        second = self.quiz_logic.generate_batch(100, seed=3)
+
+        np.testing.assert_array_equal(first.option_ids, second.option_ids)
+        np.testing.assert_array_equal(first.answers, second.answers)
+        self.assertIsNone(self.quiz_logic.current_id)
+
+    def test_deck_smaller_than_choices_is_rejected(self):
+        self.quiz_logic.set_questions(self.quiz_logic.questions[:2])
+        with self.assertRaises(ValueError):
+            self.quiz_logic.generate_batch(10)
+
+    def test_numpy_ids_are_accepted(self):
+        batch = self.quiz_logic.generate_batch(1, seed=1)
+        target_id = batch.target_ids[0]
+
+        self.assertEqual(self.quiz_logic.word_id(target_id), int(target_id))
+        self.assertIs(type(self.quiz_logic.word_id(target_id)), int)
+        word = self.quiz_logic.questions[int(target_id)].word
+        self.assertTrue(self.quiz_logic.image_path_for_word(target_id).endswith(word + ".jpg"))
+        self.assertTrue(self.quiz_logic.sound_path_for_word(target_id).endswith(word + ".mp3"))
+
+    def test_export_formats(self):
+        batch = self.quiz_logic.generate_batch(5, seed=2)
+        deck = self.quiz_logic.deck
+
+        jsonl = io.StringIO()
+        self.assertEqual(write_jsonl(deck, batch, jsonl), 5)
+        rows = [json.loads(line) for line in jsonl.getvalue().splitlines()]
+        csv_out = io.StringIO()
+        write_csv(deck, batch, csv_out)
+        csv_lines = csv_out.getvalue().splitlines()
+
+        self.assertEqual(len(rows), 5)
+        self.assertEqual(len(csv_lines), 6)
+        self.assertEqual(csv_lines[0], "question,word,option_1,option_2,option_3,image_1,image_2,image_3,answer")
+        for row, line, options, answer in zip(rows, csv_lines[1:], batch.option_ids, batch.answers):
+            words = [deck.words[i] for i in options]
+            self.assertEqual(row["options"], words)
+            self.assertEqual(row["images"], [word + ".jpg" for word in words])
+            self.assertEqual(row["word"], words[answer])
+            self.assertEqual(row["answer"], answer)
+            self.assertEqual(line.split(",")[1:5], [words[answer]] + words)
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,145 @@
+import os
+import random
+import unittest
+from unittest.mock import MagicMock, patch
+
+from deck import WordData
+from quiz_logic import QuizLogic
+from scheduler import SCHEDULER_ENV, LeitnerScheduler, RandomScheduler, make_scheduler, sample_distinct_ids
+
+
+class TestSampleDistinctIds(unittest.TestCase):
+    def test_ids_are_distinct_and_excluded(self):
+        rng = random.Random(1)
+        for _ in range(200):
+            ids = sample_distinct_ids(5, 3, {0}, rng)
+            self.assertEqual(len(set(ids)), 3)
+            self.assertNotIn(0, ids)
+
+    def test_too_small_deck(self):
+        with self.assertRaises(ValueError):
+            sample_distinct_ids(3, 3, {0}, random.Random())
+
+
+class TestLeitnerScheduler(unittest.TestCase):
+    def setUp(self):
+        self.scheduler = LeitnerScheduler(random.Random(7))
+
+    def test_introduces_new_words_in_order(self):
+        targets = []
+        for _ in range(3):
+            target_id, option_ids = self.scheduler.pick(100, 3)
+            self.scheduler.record(target_id, target_id, True)
+            targets.append(target_id)
+            self.assertIn(target_id, option_ids)
+            self.assertEqual(len(set(option_ids)), 3)
+        self.assertEqual(targets, [0, 1, 2])
+
+    def test_missed_word_comes_back_first(self):
+        target_id, _ = self.scheduler.pick(100, 3)
+        self.scheduler.record(target_id, 50, False)
+
+        self.scheduler.pick(100, 3)
+        next_target, _ = self.scheduler.pick(100, 3)
+
+        self.assertEqual(next_target, target_id)
+        self.assertEqual(self.scheduler.boxes[target_id], 0)
+
+    def test_known_words_are_spaced_out(self):
+        asked = []
+        for _ in range(40):
+            target_id, _ = self.scheduler.pick(1000, 3)
+            asked.append(target_id)
+            self.scheduler.record(target_id, target_id, True)
+
+        # Asked at questions 1, 5, 13 and 33.
+        self.assertEqual(asked.count(0), 4)
+        self.assertEqual(self.scheduler.boxes[0], 4)
+
+    def test_confused_words_become_distractors(self):
+        target_id, _ = self.scheduler.pick(1000, 3)
+        self.scheduler.record(target_id, 777, False)
+
+        self.scheduler.pick(1000, 3)
+        again, option_ids = self.scheduler.pick(1000, 3)
+
+        self.assertEqual(again, target_id)
+        self.assertIn(777, option_ids)
+
+    def test_skipped_question_is_put_back(self):
+        target_id, _ = self.scheduler.pick(10, 3)
+        self.scheduler.done(target_id)
+
+        self.scheduler.pick(10, 3)
+        self.scheduler.record(1, 1, True)
+        next_target, _ = self.scheduler.pick(10, 3)
+
+        self.assertEqual(next_target, target_id)
+
+    def test_released_picks_are_undone(self):
+        first, _ = self.scheduler.pick(10, 3)
+        second, _ = self.scheduler.pick(10, 3)
+        self.scheduler.release(second)
+        self.scheduler.release(first)
+
+        self.assertEqual(self.scheduler.step, 0)
+        self.assertEqual([self.scheduler.pick(10, 3)[0] for _ in range(2)], [first, second])
+
+
+class TestMakeScheduler(unittest.TestCase):
+    def test_name_or_environment(self):
+        with patch.dict(os.environ, {SCHEDULER_ENV: "leitner"}):
+            self.assertIsInstance(make_scheduler(), LeitnerScheduler)
+            self.assertNotIsInstance(make_scheduler("random"), LeitnerScheduler)
+        with patch.dict(os.environ, {SCHEDULER_ENV: ""}):
+            self.assertNotIsInstance(make_scheduler(), LeitnerScheduler)
+
+    def test_unknown_name(self):
+        with self.assertRaises(ValueError):
+            make_scheduler("alphabetical")
+
+
+class TestQuizLogicScheduler(unittest.TestCase):
+    def test_quiz_logic_reports_answers_to_scheduler(self):
+        scheduler = LeitnerScheduler(random.Random(3))
+        quiz_logic = QuizLogic("/test/root/dir", scheduler=scheduler)
+        quiz_logic.set_questions([WordData(str(i), f"{i}.jpg", f"{i}.mp3", "", str(i)) for i in range(10)])
+
+        quiz_logic.next_question()
+        quiz_logic.check_answer(quiz_logic.current_id)
+
+        self.assertEqual(scheduler.boxes[quiz_logic.current_id], 1)
+
+    def test_answer_is_recorded_once(self):
+        quiz_logic = QuizLogic("/test/root/dir", scheduler=LeitnerScheduler(random.Random(3)),
+                               progress_store=MagicMock())
+        quiz_logic.set_questions([WordData(str(i), f"{i}.jpg", f"{i}.mp3", "", str(i)) for i in range(10)])
+
+        quiz_logic.next_question()
+        quiz_logic.check_answer(quiz_logic.current_id)
+        quiz_logic.check_answer(quiz_logic.current_id)
+
+        self.assertEqual(quiz_logic.scheduler.boxes[quiz_logic.current_id], 1)
+        quiz_logic.progress_store.record_answer.assert_called_once()
+
+    def test_questions_picked_before_an_answer_are_picked_again(self):
+        # A missed word is due right after the next question.
+        quiz_logic = QuizLogic("/test/root/dir", scheduler=LeitnerScheduler(random.Random(3), intervals=(1, 2, 4)))
+        quiz_logic.set_questions([WordData(str(i), f"{i}.jpg", f"{i}.mp3", "", str(i)) for i in range(10)])
+
+        quiz_logic.next_question()
+        missed = quiz_logic.current_id
+        quiz_logic.peek_upcoming(2)
+        quiz_logic.check_answer(None)
+
+        self.assertEqual(len(quiz_logic.upcoming), 0)
+        quiz_logic.next_question()
+        quiz_logic.next_question()
+        self.assertEqual(quiz_logic.current_id, missed)
+
+    def test_default_scheduler_is_random(self):
+        self.assertIsInstance(QuizLogic("/test/root/dir").scheduler, RandomScheduler)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,186 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+from PIL import Image
+
+import similarity_index
+from deck import WordData
+from quiz_logic import QuizLogic
+from similarity_index import (
+    SimilarityIndex, build_index, colour_histograms, difference_hashes, feature_vectors, load_index,
+    nearest_neighbours,
+)
+
+COLOURS = {
+    "red": (220, 30, 30), "crimson": (200, 20, 60), "scarlet": (250, 40, 10),
+    "blue": (30, 30, 220), "navy": (10, 20, 140), "teal": (20, 120, 200),
+}
+
+
+class TestFeatures(unittest.TestCase):
+    def test_difference_hash_bits(self):
+        rising = np.tile(np.arange(9, dtype=np.uint8) * 20, (8, 1))
+        grays = np.stack([rising, rising[:, ::-1]])
+
+        hashes = difference_hashes(grays)
+
+        self.assertEqual(hashes.tolist(), [2 ** 64 - 1, 0])
+        self.assertEqual(similarity_index.hamming_distances(hashes[0], hashes).tolist(), [0, 64])
+
+    def test_colour_histograms_are_normalized(self):
+        rgbs = np.zeros((2, 256, 3), dtype=np.uint8)
+        rgbs[0, :] = (255, 0, 0)
+        rgbs[1, :128] = (0, 0, 255)
+        rgbs[1, 128:] = (0, 255, 0)
+
+        hist = colour_histograms(rgbs)
+
+        self.assertEqual(hist.shape, (2, 64))
+        np.testing.assert_allclose(np.linalg.norm(hist, axis=1), 1.0, rtol=1e-6)
+        self.assertEqual(np.count_nonzero(hist[0]), 1)
+        self.assertEqual(np.count_nonzero(hist[1]), 2)
+
+    def test_clustered_neighbours_match_exhaustive_search(self):
+        rng = np.random.default_rng(0)
+        groups = rng.integers(0, 40, size=2000)
+        centres = rng.normal(size=(40, 128)).astype(np.float32)
+        features = centres[groups] + rng.normal(scale=0.05, size=(2000, 128)).astype(np.float32)
+
+        exact = nearest_neighbours(features, k=4, n_clusters=1)
+        approximate = nearest_neighbours(features, k=4, n_clusters=40)
+
+        self.assertEqual(approximate.shape, (2000, 4))
+        self.assertFalse((approximate == np.arange(2000)[:, None]).any())
+        self.assertTrue((groups[approximate] == groups[:, None]).all())
+        self.assertGreater((exact[:, 0] == approximate[:, 0]).mean(), 0.95)
+
+    def test_tiny_sets(self):
+        self.assertEqual(nearest_neighbours(np.zeros((1, 4), np.float32)).shape, (1, 0))
+        self.assertEqual(nearest_neighbours(np.eye(3, dtype=np.float32), k=8).shape, (3, 2))
+
+
+class TestSimilarityIndex(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.root_dir = self.tmp_dir.name
+        image_dir = os.path.join(self.root_dir, "word_images")
+        os.makedirs(image_dir)
+        for name, colour in COLOURS.items():
+            img = Image.new("RGB", (120, 90), colour)
+            # Reds get a bright left half and blues a bright right half, so their hashes differ too.
+            box = (0, 0, 60, 90) if name in ("red", "crimson", "scarlet") else (60, 0, 120, 90)
+            img.paste((255, 255, 255), box)
+            img.save(os.path.join(image_dir, name + ".jpg"))
+        self.names = sorted(n + ".jpg" for n in COLOURS)
+
+    def build(self, **kwargs):
+        index, failed = build_index(self.root_dir, self.names, k=2, **kwargs)
+        self.assertEqual(failed, [])
+        index.save(similarity_index.index_path(self.root_dir))
+        return index
+
+    def test_similar_images_are_neighbours(self):
+        index = self.build(workers=1)
+
+        self.assertEqual(set(index.similar("red.jpg")), {"crimson.jpg", "scarlet.jpg"})
+        self.assertEqual(set(index.similar("navy.jpg")), {"blue.jpg", "teal.jpg"})
+        self.assertEqual(index.similar("missing.jpg"), ())
+        self.assertGreater(index.hamming("red.jpg", "blue.jpg"), index.hamming("red.jpg", "crimson.jpg"))
+
+    def test_saved_index_round_trips(self):
+        index = self.build(workers=2)
+
+        loaded = load_index(self.root_dir)
+
+        self.assertEqual(loaded.names, index.names)
+        np.testing.assert_array_equal(loaded.hashes, index.hashes)
+        np.testing.assert_array_equal(loaded.neighbours, index.neighbours)
+        self.assertIs(load_index(self.root_dir), loaded)
+
+    def test_index_is_ignored_after_images_change(self):
+        self.build(workers=1)
+        path = os.path.join(self.root_dir, "word_images", "green.jpg")
+        Image.new("RGB", (10, 10), "green").save(path)
+        stat = os.stat(os.path.dirname(path))
+        os.utime(os.path.dirname(path), ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+        self.assertIsNone(load_index(self.root_dir))
+
+    def test_undecodable_image_is_reported(self):
+        with open(os.path.join(self.root_dir, "word_images", "broken.jpg"), "wb") as f:
+            f.write(b"not an image")
+
+        index, failed = build_index(self.root_dir, self.names + ["broken.jpg"], workers=1)
+
+        self.assertEqual([name for name, _ in failed], ["broken.jpg"])
+        self.assertEqual(index.names, self.names)
+
+    def test_from_features(self):
+        hashes = np.array([0, 1, 2 ** 64 - 1], dtype=np.uint64)
+        histograms = np.eye(3, 64, dtype=np.float32)
+
+        index = SimilarityIndex.from_features(["a", "b", "c"], hashes, histograms, k=1)
+
+        self.assertEqual(feature_vectors(hashes, histograms).shape, (3, 128))
+        self.assertEqual(index.similar("a"), ("b",))
+
+
+class TestHardDifficulty(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.root_dir = self.tmp_dir.name
+        image_dir = os.path.join(self.root_dir, "word_images")
+        os.makedirs(image_dir)
+        for name, colour in COLOURS.items():
+            Image.new("RGB", (60, 60), colour).save(os.path.join(image_dir, name + ".jpg"))
+        self.words = [WordData(name, name + ".jpg", name + ".mp3", "A " + name, name) for name in COLOURS]
+
+    def quiz(self, difficulty):
+        quiz_logic = QuizLogic(self.root_dir, difficulty=difficulty)
+        quiz_logic.set_questions(self.words)
+        quiz_logic.rng.seed(5)
+        return quiz_logic
+
+    def test_distractors_look_like_the_target(self):
+        build_index(self.root_dir, [word.image for word in self.words], k=2, workers=1)[0].save(
+            similarity_index.index_path(self.root_dir)
+        )
+        quiz_logic = self.quiz("hard")
+        reds = {"red", "crimson", "scarlet"}
+
+        for _ in range(20):
+            options = {word.word for word in quiz_logic.next_question()}
+            target = quiz_logic.current_question.word
+            self.assertEqual(len(options), 3)
+            self.assertEqual(options <= reds, target in reds)
+
+    def test_without_index_options_are_random(self):
+        quiz_logic = self.quiz("hard")
+
+        for _ in range(10):
+            options = quiz_logic.next_question()
+            self.assertEqual(len({word.word for word in options}), 3)
+            self.assertIn(quiz_logic.current_question, options)
+        self.assertIsNone(quiz_logic.similarity_index())
+
+    def test_index_built_after_first_check_is_used(self):
+        quiz_logic = self.quiz("hard")
+        self.assertFalse(quiz_logic.hard_mode_available())
+
+        build_index(self.root_dir, [word.image for word in self.words], k=2, workers=1)[0].save(
+            similarity_index.index_path(self.root_dir)
+        )
+
+        self.assertTrue(quiz_logic.hard_mode_available())
+
+    def test_unknown_difficulty_is_rejected(self):
+        with self.assertRaises(ValueError):
+            QuizLogic(self.root_dir, difficulty="impossible")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,127 @@
+import multiprocessing
+import os
+import tempfile
+import threading
+import time
+import unittest
+
+import single_flight
+from single_flight import KeyedLock
+from sound_gen import generate_sound_if_not_found
+
+
+class SlowLoggingSynthesizer:
+    """Writes clips slowly and logs every call to a file shared by all processes."""
+
+    extension = ".mp3"
+
+    def __init__(self, log_path):
+        self.log_path = log_path
+
+    def save(self, language, text, sound_path):
+        fd = os.open(self.log_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(fd, f"{language}:{text}\n".encode("utf-8"))
+        finally:
+            os.close(fd)
+        with open(sound_path, "w", encoding="utf-8") as f:
+            for c in f"{language}:{text}":
+                f.write(c)
+                f.flush()
+                time.sleep(0.002)
+
+
+def request_clips(sound_dir, log_path, words, threads):
+    synthesizer = SlowLoggingSynthesizer(log_path)
+
+    def request(word):
+        path = os.path.join(sound_dir, f"{word}.mp3")
+        generate_sound_if_not_found("en", word, path, synthesizer)
+
+    workers = [threading.Thread(target=request, args=(words[i % len(words)],)) for i in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+
+class TestSingleFlight(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.sound_dir = os.path.join(self.tmp_dir.name, "word_sounds")
+        self.log_path = os.path.join(self.tmp_dir.name, "calls.log")
+
+    def read(self, path):
+        with open(path, encoding="utf-8") as f:
+            return f.read()
+
+    def test_keyed_lock_drops_unused_keys(self):
+        lock = KeyedLock()
+        with lock.hold("a") as held:
+            self.assertTrue(held)
+            with lock.hold("b"):
+                self.assertEqual(len(lock), 2)
+        self.assertEqual(len(lock), 0)
+
+    def test_busy_key_does_not_block_when_not_waiting(self):
+        started, release = threading.Event(), threading.Event()
+        done = []
+
+        def produce():
+            started.set()
+            release.wait()
+            done.append(True)
+
+        thread = threading.Thread(target=single_flight.run_once, args=("busy", lambda: bool(done), produce))
+        thread.start()
+        started.wait()
+        try:
+            self.assertFalse(single_flight.run_once("busy", lambda: bool(done), self.fail, wait=False))
+            self.assertTrue(single_flight.run_once("other", lambda: True, self.fail, wait=False))
+        finally:
+            release.set()
+            thread.join()
+
+    def test_missing_result_is_produced_in_the_background(self):
+        produced = threading.Event()
+        release = threading.Event()
+        callers = []
+
+        def produce():
+            callers.append(threading.current_thread().name)
+            release.wait(10)
+            produced.set()
+
+        self.assertFalse(single_flight.run_once("background", produced.is_set, produce, wait=False))
+        # Queued once, however often it is asked for while being produced.
+        self.assertFalse(single_flight.run_once("background", produced.is_set, produce, wait=False))
+        release.set()
+
+        self.assertTrue(produced.wait(10))
+        self.assertTrue(single_flight.run_once("background", produced.is_set, self.fail, wait=False))
+        self.assertEqual(len(callers), 1)
+        self.assertTrue(callers[0].startswith("single-flight"))
+
+    def test_each_clip_is_synthesized_once_across_threads_and_processes(self):
+        words = ["cat", "dog", "goat"]
+        context = multiprocessing.get_context("fork")
+        processes = [
+            context.Process(target=request_clips, args=(self.sound_dir, self.log_path, words, 6))
+            for _ in range(3)
+        ]
+        for process in processes:
+            process.start()
+        request_clips(self.sound_dir, self.log_path, words, 6)
+        for process in processes:
+            process.join()
+            self.assertEqual(process.exitcode, 0)
+
+        self.assertEqual(sorted(self.read(self.log_path).splitlines()), [f"en:{word}" for word in words])
+        self.assertEqual(sorted(os.listdir(self.sound_dir)), [f"{word}.mp3" for word in words])
+        for word in words:
+            self.assertEqual(self.read(os.path.join(self.sound_dir, f"{word}.mp3")), f"en:{word}")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,75 @@
+import os
+import tempfile
+import unittest
+
+from PIL import Image
+
+import cli
+from validate_deck import ImageJob, jobs_for_decks, validate_images
+
+CSV_HEADER = "Word,Image,Sound,Definition\n"
+
+
+class TestValidateDeck(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.root_dir = self.tmp_dir.name
+        self.image_dir = os.path.join(self.root_dir, "word_images")
+        os.makedirs(self.image_dir)
+        Image.new("RGB", (200, 100), "red").save(os.path.join(self.image_dir, "cat.jpg"), quality=90)
+        Image.new("RGB", (3000, 10), "green").save(os.path.join(self.image_dir, "dog.jpg"), quality=90)
+        with open(os.path.join(self.image_dir, "cat.jpg"), "rb") as f:
+            data = f.read()
+        with open(os.path.join(self.image_dir, "goat.jpg"), "wb") as f:
+            f.write(data[:len(data) // 2])
+        with open(os.path.join(self.root_dir, "words.csv"), "w", encoding="utf-8") as f:
+            f.write(CSV_HEADER)
+            for word in ["cat", "dog", "goat", "cow", "cat"]:
+                f.write(f"{word},{word}.jpg,{word}.mp3,A {word}\n")
+        self.thumbnail_dir = os.path.join(self.root_dir, "thumbnail_cache")
+
+    def validate(self, workers, thumbnail_size=0):
+        jobs = jobs_for_decks(self.root_dir, ["en"], thumbnail_dir=self.thumbnail_dir, thumbnail_size=thumbnail_size)
+        return validate_images(jobs, workers)
+
+    def test_reports_each_problem(self):
+        summary = self.validate(workers=1)
+
+        statuses = {report.image: report.status for report in summary.reports}
+        self.assertEqual(statuses, {"cat.jpg": "ok", "dog.jpg": "oversized", "goat.jpg": "corrupt", "cow.jpg": "missing"})
+        self.assertEqual([report.image for report in summary.failed], ["cow.jpg", "goat.jpg"])
+        self.assertEqual(summary.reports[0][3:5], (200, 100))
+        self.assertIn("1 ok, 1 oversized, 1 corrupt, 1 missing", summary.format())
+
+    def test_warm_thumbnails_fails_on_corrupt_images(self):
+        for workers in ("1", "2"):
+            status = cli.main(["--root-dir", self.root_dir, "warm-thumbnails", "--languages", "en", "--workers", workers])
+
+            self.assertEqual(status, 1)
+        self.assertEqual(len(os.listdir(self.thumbnail_dir)), 2)
+
+    def test_process_pool_matches_serial_run(self):
+        serial = self.validate(workers=1)
+        parallel = self.validate(workers=2)
+
+        self.assertEqual(parallel.workers, 2)
+        self.assertEqual([r.status for r in parallel.reports], [r.status for r in serial.reports])
+
+    def test_writes_missing_thumbnails_once(self):
+        first = self.validate(workers=2, thumbnail_size=64)
+        second = self.validate(workers=2, thumbnail_size=64)
+
+        self.assertEqual(sum(r.thumbnail_generated for r in first.reports), 2)
+        self.assertEqual(sum(r.thumbnail_generated for r in second.reports), 0)
+        self.assertEqual(len(os.listdir(self.thumbnail_dir)), 2)
+
+    def test_byte_limit(self):
+        job = ImageJob("cat.jpg", os.path.join(self.image_dir, "cat.jpg"), max_side=4096, max_bytes=10)
+        report = validate_images([job], workers=1).reports[0]
+        self.assertEqual(report.status, "oversized")
+        self.assertIn("KiB", report.detail)
+
+
+if __name__ == "__main__":
+    unittest.main()
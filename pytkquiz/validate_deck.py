@@ -0,0 +1,175 @@
+import csv
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import NamedTuple, Optional
+
+from PIL import Image
+
+from image_cache import ThumbnailCache
+from quiz_logic import words_path_for_language
+
+# Larger than any size the apps display, including the biggest `build-assets` variant.
+DEFAULT_MAX_SIDE = 2048
+DEFAULT_MAX_BYTES = 1024 * 1024
+
+
+def available_cores() -> int:
+    """Return the number of cores this process may run on."""
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+class ImageJob(NamedTuple):
+    image: str
+    path: str
+    max_side: int
+    max_bytes: int
+    thumbnail_dir: Optional[str] = None
+    thumbnail_size: int = 0
+
+
+class ImageReport(NamedTuple):
+    image: str
+    # "ok", "missing", "corrupt" or "oversized".
+    status: str
+    detail: str = ""
+    width: int = 0
+    height: int = 0
+    bytes: int = 0
+    thumbnail_generated: bool = False
+
+
+class ValidationSummary(NamedTuple):
+    reports: list
+    workers: int
+    elapsed: float
+
+    def with_status(self, status: str) -> list:
+        return [report for report in self.reports if report.status == status]
+
+    @property
+    def failed(self) -> list:
+        return self.with_status("missing") + self.with_status("corrupt")
+
+    def format(self) -> str:
+        counts = {status: len(self.with_status(status)) for status in ("ok", "oversized", "corrupt", "missing")}
+        thumbnails = sum(report.thumbnail_generated for report in self.reports)
+        rate = len(self.reports) / self.elapsed if self.elapsed > 0 else 0.0
+        lines = [
+            f"Checked {len(self.reports)} images with {self.workers} workers in {self.elapsed:.2f}s "
+            f"({rate:.1f} images/s): " + ", ".join(f"{count} {status}" for status, count in counts.items())
+            + (f", {thumbnails} thumbnails generated" if thumbnails else "")
+        ]
+        for report in self.reports:
+            if report.status != "ok":
+                lines.append(f"  {report.status}: {report.image} {report.detail}")
+        return "\n".join(lines)
+
+
+def check_image(job: ImageJob) -> ImageReport:
+    """
+    Check that one image decodes and is not larger than needed, optionally writing its thumbnail.
+
+    Runs in a worker process, so it only takes and returns picklable tuples.
+    """
+    try:
+        size = os.path.getsize(job.path)
+    except FileNotFoundError:
+        return ImageReport(job.image, "missing", job.path)
+
+    thumbnail_generated = False
+    try:
+        with Image.open(job.path) as img:
+            img.verify()
+        # verify() leaves the image unusable and does not decode the pixel data, so the image
+        # is decoded again to catch truncated files. Generating a thumbnail decodes it anyway.
+        thumb_path = None
+        if job.thumbnail_size:
+            cache = ThumbnailCache(job.thumbnail_dir, job.thumbnail_size)
+            thumb_path = cache.cache_path(job.path)
+        with Image.open(job.path) as img:
+            width, height = img.size
+            if thumb_path is None or os.path.exists(thumb_path):
+                img.load()
+        if thumb_path is not None and not os.path.exists(thumb_path):
+            cache.generate(job.path, thumb_path)
+            thumbnail_generated = True
+    except (OSError, SyntaxError, ValueError, Image.DecompressionBombError) as e:
+        return ImageReport(job.image, "corrupt", str(e), bytes=size)
+
+    problems = []
+    if max(width, height) > job.max_side:
+        problems.append(f"{width}x{height} px is larger than {job.max_side} px")
+    if size > job.max_bytes:
+        problems.append(f"{size / 1024:.0f} KiB is larger than {job.max_bytes / 1024:.0f} KiB")
+    status = "oversized" if problems else "ok"
+    return ImageReport(job.image, status, "; ".join(problems), width, height, size, thumbnail_generated)
+
+
+def validate_images(jobs: list, workers: Optional[int] = None) -> ValidationSummary:
+    """
+    Run `check_image` for every job, spread across a process pool.
+
+    Decoding and resizing are CPU bound, so separate processes scale with the number of cores
+    where threads would mostly wait on each other. Jobs are handed out in chunks to keep the
+    per-image overhead of the pool low.
+
+    Args:
+        jobs (list): The `ImageJob`s to run.
+        workers (Optional[int]): Number of processes, all available cores if None. With 1 the
+            images are checked in this process.
+
+    Returns:
+        ValidationSummary: One report per job, in the order of `jobs`.
+    """
+    workers = workers or available_cores()
+    start = time.monotonic()
+    if workers == 1 or len(jobs) <= 1:
+        reports = [check_image(job) for job in jobs]
+    else:
+        chunksize = max(1, len(jobs) // (workers * 8))
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            reports = list(executor.map(check_image, jobs, chunksize=chunksize))
+    return ValidationSummary(reports, workers, time.monotonic() - start)
+
+
+def image_names_in_csv(csv_path: str) -> list[str]:
+    """Return every name in the Image column of a word CSV, including images that do not exist."""
+    with open(csv_path, newline="", encoding="utf-8") as f:
+        return list(dict.fromkeys(row["Image"] for row in csv.DictReader(f)))
+
+
+def jobs_for_decks(root_dir: str, languages, max_side: int = DEFAULT_MAX_SIDE, max_bytes: int = DEFAULT_MAX_BYTES,
+                   thumbnail_dir: Optional[str] = None, thumbnail_size: int = 0) -> list:
+    """Return one `ImageJob` per distinct image used by the decks of `languages`."""
+    names = {}
+    for language in languages:
+        names.update(dict.fromkeys(image_names_in_csv(words_path_for_language(root_dir, language))))
+    return [
+        ImageJob(name, os.path.join(root_dir, "word_images", name), max_side, max_bytes, thumbnail_dir,
+                 thumbnail_size)
+        for name in names
+    ]
+
+
+def add_arguments(parser) -> None:
+    parser.add_argument("--languages", nargs="+", default=["en", "el"], help="Decks whose images to check.")
+    parser.add_argument("--workers", type=int, default=None, help="Number of processes, all cores by default.")
+    parser.add_argument("--max-side", type=int, default=DEFAULT_MAX_SIDE,
+                        help="Report images whose longest side is larger than this many pixels.")
+    parser.add_argument("--max-bytes", type=int, default=DEFAULT_MAX_BYTES,
+                        help="Report image files larger than this many bytes.")
+    parser.add_argument("--thumbnails", type=int, default=0, metavar="SIZE",
+                        help="Also write thumbnails of this size to the thumbnail cache.")
+
+
+def run(args) -> int:
+    jobs = jobs_for_decks(
+        args.root_dir, args.languages, args.max_side, args.max_bytes,
+        os.path.join(args.root_dir, "thumbnail_cache"), args.thumbnails,
+    )
+    summary = validate_images(jobs, args.workers)
+    print(summary.format())
+    return 1 if summary.failed else 0